@@ -1,21 +1,25 @@
-from webob.datetime_utils import (  # noqa: F401
-    UTC,
-    day,
-    hour,
-    minute,
-    month,
-    parse_date,
-    parse_date_delta,
-    second,
-    serialize_date,
-    serialize_date_delta,
-    timedelta_to_seconds,
-    week,
-    year,
-)
-from webob.request import BaseRequest, Request
-from webob.response import Response
-from webob.util import html_escape
+# The names exported here are imported from their modules when they are first
+# used, so that "import webob" (or importing a single submodule) does not
+# import all of WebOb.
+_lazy_names = {
+    "BaseRequest": "webob.request",
+    "Request": "webob.request",
+    "Response": "webob.response",
+    "html_escape": "webob.util",
+    "UTC": "webob.datetime_utils",
+    "day": "webob.datetime_utils",
+    "hour": "webob.datetime_utils",
+    "minute": "webob.datetime_utils",
+    "month": "webob.datetime_utils",
+    "parse_date": "webob.datetime_utils",
+    "parse_date_delta": "webob.datetime_utils",
+    "second": "webob.datetime_utils",
+    "serialize_date": "webob.datetime_utils",
+    "serialize_date_delta": "webob.datetime_utils",
+    "timedelta_to_seconds": "webob.datetime_utils",
+    "week": "webob.datetime_utils",
+    "year": "webob.datetime_utils",
+}
 
 __all__ = [
     "Request",
@@ -31,4 +35,20 @@ __all__ = [
     "html_escape",
 ]
 
-BaseRequest.ResponseClass = Response
+
+def __getattr__(name):
+    module_name = _lazy_names.get(name)
+
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+    import importlib
+
+    value = getattr(importlib.import_module(module_name), name)
+    globals()[name] = value
+
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_lazy_names))
@@ -10,6 +10,8 @@ import re
 import textwrap
 import warnings
 
+from webob.util import _timed_phase
+
 # RFC 7230 Section 3.2.3 "Whitespace"
 # OWS            = *( SP / HTAB )
 #                ; optional whitespace
@@ -89,6 +91,27 @@ def _list_1_or_more__compiled_re(element_re):
     )
 
 
+class _lazy_re:
+    # A regular expression class attribute, compiled by compile(*args) the
+    # first time it is used, rather than when the module is imported.
+
+    def __init__(self, compile, *args, **kw):
+        self.compile = compile
+        self.args = args
+        self.kw = kw
+
+    def __set_name__(self, owner, name):
+        self.owner = owner
+        self.name = name
+
+    def __get__(self, obj, objtype=None):
+        compiled = self.compile(*self.args, **self.kw)
+        # Replaces this descriptor
+        setattr(self.owner, self.name, compiled)
+
+        return compiled
+
+
 class AcceptOffer(namedtuple("AcceptOffer", ["type", "subtype", "params"])):
     """
     A pre-parsed offer tuple represeting a value in the format
@@ -197,15 +220,18 @@ class Accept:
     accept_params_re = weight_re + "((?:" + accept_ext_re + ")*)"
 
     media_range_n_accept_params_re = media_range_re + "(?:" + accept_params_re + ")?"
-    media_range_n_accept_params_compiled_re = re.compile(media_range_n_accept_params_re)
+    media_range_n_accept_params_compiled_re = _lazy_re(
+        re.compile, media_range_n_accept_params_re
+    )
 
-    accept_compiled_re = _list_0_or_more__compiled_re(
-        element_re=media_range_n_accept_params_re
+    accept_compiled_re = _lazy_re(
+        _list_0_or_more__compiled_re, element_re=media_range_n_accept_params_re
     )
 
     # For parsing repeated groups within the media type parameters and
     # extension parameters segments
-    parameters_compiled_re = re.compile(
+    parameters_compiled_re = _lazy_re(
+        re.compile,
         OWS_re
         + ";"
         + OWS_re
@@ -215,9 +241,10 @@ class Accept:
         + token_re
         + "|"
         + quoted_string_re
-        + ")"
+        + ")",
     )
-    accept_ext_compiled_re = re.compile(
+    accept_ext_compiled_re = _lazy_re(
+        re.compile,
         OWS_re
         + ";"
         + OWS_re
@@ -234,14 +261,14 @@ class Accept:
         + ")"
         + ")"
         + ")"
-        + ")?"
+        + ")?",
     )
 
     # For parsing the media types in the `offers` argument to
     # .acceptable_offers(), we re-use the media range regex for media types, as
     # they work out to have the exact same syntax according to RFC 7231.
     media_type_re = media_range_re
-    media_type_compiled_re = re.compile("^" + media_type_re + "$")
+    media_type_compiled_re = _lazy_re(re.compile, "^" + media_type_re + "$")
 
     @classmethod
     def _escape_and_quote_parameter_value(cls, param_value):
@@ -1740,7 +1767,11 @@ def accept_property():
     def fget(request):
         """Get an object representing the header in the request."""
 
-        return create_accept_header(header_value=request.environ.get(ENVIRON_KEY))
+        env = request.environ
+
+        return _timed_phase(
+            env, "negotiation", create_accept_header, env.get(ENVIRON_KEY)
+        )
 
     def fset(request, value):
         """
@@ -1799,9 +1830,9 @@ class AcceptCharset:
     # RFC 7231 Section 5.3.3 "Accept-Charset":
     # Accept-Charset = 1#( ( charset / "*" ) [ weight ] )
     charset_n_weight_re = _item_n_weight_re(item_re=charset_re)
-    charset_n_weight_compiled_re = re.compile(charset_n_weight_re)
-    accept_charset_compiled_re = _list_1_or_more__compiled_re(
-        element_re=charset_n_weight_re
+    charset_n_weight_compiled_re = _lazy_re(re.compile, charset_n_weight_re)
+    accept_charset_compiled_re = _lazy_re(
+        _list_1_or_more__compiled_re, element_re=charset_n_weight_re
     )
 
     @classmethod
@@ -2733,8 +2764,10 @@ def accept_charset_property():
     def fget(request):
         """Get an object representing the header in the request."""
 
-        return create_accept_charset_header(
-            header_value=request.environ.get(ENVIRON_KEY)
+        env = request.environ
+
+        return _timed_phase(
+            env, "negotiation", create_accept_charset_header, env.get(ENVIRON_KEY)
         )
 
     def fset(request, value):
@@ -2792,9 +2825,9 @@ class AcceptEncoding:
     # "identity" (case-insensitive) and "*" are both already included in token
     # rule
     codings_n_weight_re = _item_n_weight_re(item_re=codings_re)
-    codings_n_weight_compiled_re = re.compile(codings_n_weight_re)
-    accept_encoding_compiled_re = _list_0_or_more__compiled_re(
-        element_re=codings_n_weight_re
+    codings_n_weight_compiled_re = _lazy_re(re.compile, codings_n_weight_re)
+    accept_encoding_compiled_re = _lazy_re(
+        _list_0_or_more__compiled_re, element_re=codings_n_weight_re
     )
 
     @classmethod
@@ -3770,8 +3803,10 @@ def accept_encoding_property():
     def fget(request):
         """Get an object representing the header in the request."""
 
-        return create_accept_encoding_header(
-            header_value=request.environ.get(ENVIRON_KEY)
+        env = request.environ
+
+        return _timed_phase(
+            env, "negotiation", create_accept_encoding_header, env.get(ENVIRON_KEY)
         )
 
     def fset(request, value):
@@ -3831,9 +3866,9 @@ class AcceptLanguage:
     # alphanum         = ALPHA / DIGIT
     lang_range_re = r"\*|" "(?:" "[A-Za-z]{1,8}" "(?:-[A-Za-z0-9]{1,8})*" ")"
     lang_range_n_weight_re = _item_n_weight_re(item_re=lang_range_re)
-    lang_range_n_weight_compiled_re = re.compile(lang_range_n_weight_re)
-    accept_language_compiled_re = _list_1_or_more__compiled_re(
-        element_re=lang_range_n_weight_re
+    lang_range_n_weight_compiled_re = _lazy_re(re.compile, lang_range_n_weight_re)
+    accept_language_compiled_re = _lazy_re(
+        _list_1_or_more__compiled_re, element_re=lang_range_n_weight_re
     )
 
     @classmethod
@@ -5339,8 +5374,10 @@ def accept_language_property():
     def fget(request):
         """Get an object representing the header in the request."""
 
-        return create_accept_language_header(
-            header_value=request.environ.get(ENVIRON_KEY)
+        env = request.environ
+
+        return _timed_phase(
+            env, "negotiation", create_accept_language_header, env.get(ENVIRON_KEY)
         )
 
     def fset(request, value):
@@ -0,0 +1,426 @@
+"""
+Running WebOb applications under an ASGI server.
+
+:class:`ASGIApp` turns a WSGI application written with WebOb (typically a
+:class:`webob.dec.wsgify` function) into an ASGI application::
+
+    from webob.asgi import ASGIApp
+    from webob.dec import wsgify
+
+    @wsgify
+    def hello(req):
+        return 'Hello %s' % req.params.get('name', 'world')
+
+    application = ASGIApp(hello)
+
+Async code can also use the pieces directly: :class:`ASGIRequest` is a
+:class:`webob.Request` built from an ASGI ``scope``, and
+:func:`send_response` sends a :class:`webob.Response` through an ASGI
+``send`` channel.
+"""
+
+import asyncio
+from functools import lru_cache
+import io
+import sys
+
+from webob.request import DisconnectionError, Request
+
+__all__ = ["ASGIApp", "ASGIInput", "ASGIRequest", "environ_from_scope", "send_response"]
+
+# Header names that do not become HTTP_* keys in the environ.
+_CGI_HEADERS = {b"content-type": "CONTENT_TYPE", b"content-length": "CONTENT_LENGTH"}
+
+
+def environ_from_scope(scope, receive=None):
+    """
+    Build a WSGI environ from the ASGI HTTP connection ``scope``.
+
+    ``wsgi.input`` is an :class:`ASGIInput` reading from ``receive``; it
+    can only be read asynchronously (see :meth:`ASGIRequest.load_body`).
+    The scope itself is available as ``environ['asgi.scope']``.
+    """
+    script_name = scope.get("root_path", "").encode("utf-8").decode("latin-1")
+    path_info = scope["path"].encode("utf-8").decode("latin-1")
+
+    if script_name and path_info.startswith(script_name):
+        path_info = path_info[len(script_name) :]
+
+    server = scope.get("server") or ("localhost", 80)
+    environ = {
+        "REQUEST_METHOD": scope["method"],
+        "SCRIPT_NAME": script_name,
+        "PATH_INFO": path_info,
+        "QUERY_STRING": scope.get("query_string", b"").decode("latin-1"),
+        "SERVER_NAME": server[0],
+        "SERVER_PORT": str(server[1] if server[1] is not None else 80),
+        "SERVER_PROTOCOL": "HTTP/%s" % scope.get("http_version", "1.1"),
+        "wsgi.version": (1, 0),
+        "wsgi.url_scheme": scope.get("scheme", "http"),
+        "wsgi.input": ASGIInput(receive),
+        "wsgi.errors": sys.stderr,
+        "wsgi.multithread": True,
+        "wsgi.multiprocess": True,
+        "wsgi.run_once": False,
+        "asgi.scope": scope,
+    }
+    client = scope.get("client")
+
+    if client:
+        environ["REMOTE_ADDR"] = client[0]
+        environ["REMOTE_PORT"] = str(client[1])
+
+    for name, value in scope.get("headers", ()):
+        key = _CGI_HEADERS.get(name)
+
+        if key is None:
+            key = "HTTP_" + name.decode("latin-1").upper().replace("-", "_")
+        value = value.decode("latin-1")
+
+        if key in environ:
+            # Repeated headers are folded into one value
+            sep = "; " if key == "HTTP_COOKIE" else ", "
+            value = environ[key] + sep + value
+        environ[key] = value
+
+    return environ
+
+
+class ASGIInput:
+    """
+    The request body of an ASGI connection, received from the ``receive``
+    channel.
+
+    It is read asynchronously, with ``await body.aread()`` or by iterating
+    over the chunks with ``async for``.  Reading it synchronously (which is
+    what ``req.body`` and ``req.POST`` do) is only possible once the body
+    has been received with :meth:`ASGIRequest.load_body`.
+    """
+
+    def __init__(self, receive):
+        self.receive = receive
+        self.complete = receive is None
+
+    def __repr__(self):
+        return f"<{self.__class__.__name__} for {self.receive!r}>"
+
+    def __aiter__(self):
+        return self._chunks()
+
+    async def _chunks(self):
+        while not self.complete:
+            message = await self.receive()
+
+            if message["type"] == "http.disconnect":
+                self.complete = True
+                raise DisconnectionError(
+                    "The client disconnected while sending the body"
+                )
+            self.complete = not message.get("more_body", False)
+            chunk = message.get("body", b"")
+
+            if chunk:
+                yield chunk
+
+    async def aread(self, size=-1):
+        """
+        Read up to ``size`` bytes (everything that is left if ``size`` is
+        negative).  Bytes of a received chunk beyond ``size`` are kept for
+        the next read.
+        """
+        pending = self.__dict__.pop("_pending", b"")
+        data = bytearray(pending)
+
+        if size is None or size < 0:
+            async for chunk in self:
+                data += chunk
+
+            return bytes(data)
+
+        if len(data) < size:
+            async for chunk in self:
+                data += chunk
+
+                if len(data) >= size:
+                    break
+
+        if len(data) > size:
+            self._pending = bytes(data[size:])
+            del data[size:]
+
+        return bytes(data)
+
+    def read(self, size=-1):
+        raise RuntimeError(
+            "The ASGI request body has not been received; "
+            "use 'await req.load_body()' first"
+        )
+
+
+class ASGIRequest(Request):
+    """
+    A :class:`webob.Request` for an ASGI connection.
+
+    The request body must be received before the synchronous body APIs
+    (``body``, ``body_file``, ``POST``, ``json_body``...) are used, with
+    ``await req.load_body()``; those APIs then work as usual and parse the
+    body only when they are accessed.  :attr:`body_stream` reads the body
+    asynchronously instead, without loading it.
+    """
+
+    def __init__(self, environ, *args, **kw):
+        Request.__init__(self, environ, *args, **kw)
+        body_stream = environ.get("wsgi.input")
+
+        if isinstance(body_stream, ASGIInput):
+            environ.setdefault("asgi.input", body_stream)
+
+    @classmethod
+    def from_scope(cls, scope, receive=None, **kw):
+        """Create a request from an ASGI HTTP ``scope`` and ``receive``."""
+
+        return cls(environ_from_scope(scope, receive), **kw)
+
+    @property
+    def scope(self):
+        """The ASGI scope of the request."""
+
+        return self.environ["asgi.scope"]
+
+    @property
+    def body_stream(self):
+        """
+        The :class:`ASGIInput` of the request, to read the body
+        asynchronously::
+
+            async for chunk in req.body_stream:
+                ...
+        """
+
+        return self.environ["asgi.input"]
+
+    async def load_body(self):
+        """
+        Receive the whole request body, in memory or (beyond
+        :attr:`request_body_tempfile_limit`) in a temporary file, and make
+        it the (seekable) ``body_file`` of the request.  Calling it again
+        does nothing.
+        """
+        env = self.environ
+        body_stream = env.get("wsgi.input")
+
+        if not isinstance(body_stream, ASGIInput):
+            return
+
+        limit = self.request_body_tempfile_limit
+        output = io.BytesIO()
+        # What an earlier aread() received but did not return
+        output.write(body_stream.__dict__.pop("_pending", b""))
+
+        async for chunk in body_stream:
+            output.write(chunk)
+
+            if limit and isinstance(output, io.BytesIO) and output.tell() > limit:
+                fileobj = self.make_tempfile()
+                fileobj.write(output.getbuffer())
+                output = fileobj
+
+        length = output.tell()
+        output.seek(0)
+        env["wsgi.input"] = output
+
+        if length or "CONTENT_LENGTH" in env:
+            env["CONTENT_LENGTH"] = str(length)
+        self.is_body_seekable = True
+
+
+async def send_response(resp, send, environ):
+    """
+    Send ``resp`` (a :class:`webob.Response`, or any WSGI application)
+    through the ASGI ``send`` channel, as an answer to the request
+    described by ``environ`` (e.g. ``req.environ``).
+    """
+    await _send_wsgi(resp, environ, send, threaded=False)
+
+
+class ASGIApp:
+    """
+    An ASGI application that serves the WSGI application ``app``.
+
+    The request body is received before ``app`` is called.  ``app`` is
+    called in a thread of the event loop's default executor, so that it
+    may block; a body that is not a list is also iterated there.  With
+    ``threaded=False`` everything runs in the event loop, which is faster
+    for applications that never block.
+
+    A :class:`webob.dec.wsgify` ``async def`` function is awaited in the
+    event loop instead, and a body that is an async iterator (see
+    :class:`webob.response.AsyncAppIter`) is iterated over there with
+    ``async for``, then closed with ``aclose()``.
+
+    Lifespan events are acknowledged; other non-HTTP connections (like
+    websockets) are not supported.
+    """
+
+    RequestClass = ASGIRequest
+
+    def __init__(self, app, RequestClass=None, threaded=True):
+        self.app = app
+
+        if RequestClass is not None:
+            self.RequestClass = RequestClass
+        self.threaded = threaded
+
+    def __repr__(self):
+        return f"<{self.__class__.__name__} at {id(self)} wrapping {self.app!r}>"
+
+    async def __call__(self, scope, receive, send):
+        scope_type = scope["type"]
+
+        if scope_type == "lifespan":
+            while True:
+                message = await receive()
+
+                if message["type"] == "lifespan.startup":
+                    await send({"type": "lifespan.startup.complete"})
+                elif message["type"] == "lifespan.shutdown":
+                    await send({"type": "lifespan.shutdown.complete"})
+
+                    return
+
+        if scope_type != "http":
+            raise ValueError("Unsupported ASGI connection type: %r" % scope_type)
+
+        req = self.RequestClass.from_scope(scope, receive)
+        await req.load_body()
+        app = self.app
+
+        if getattr(app, "is_async", False):
+            # An async wsgify function runs in the event loop
+            app = await app.handle_async(req)
+            await _send_wsgi(app, req.environ, send, threaded=False)
+        else:
+            await _send_wsgi(app, req.environ, send, self.threaded)
+
+
+def _encode_headers(headerlist):
+    return [(_encode_name(name), value.encode("latin-1")) for name, value in headerlist]
+
+
+# Applications send a few header names over and over
+@lru_cache(maxsize=1024)
+def _encode_name(name):
+    return name.lower().encode("latin-1")
+
+
+def _no_write(data):
+    raise NotImplementedError("The WSGI write() callable is not supported")
+
+
+_done = object()
+
+
+async def _send_wsgi(app, environ, send, threaded):
+    # Call the WSGI application app and send what it returns
+    started = []
+
+    def start_response(status, headerlist, exc_info=None):
+        if exc_info is not None and started:
+            raise exc_info[1].with_traceback(exc_info[2])
+        started[:] = [status, headerlist]
+
+        return _no_write
+
+    if threaded:
+        loop = asyncio.get_running_loop()
+        app_iter = await loop.run_in_executor(None, app, environ, start_response)
+    else:
+        app_iter = app(environ, start_response)
+
+    try:
+        if isinstance(app_iter, (list, tuple)):
+            await _send_start(send, started)
+            chunks = [bytes(chunk) for chunk in app_iter if chunk]
+
+            for chunk in chunks[:-1]:
+                await send(
+                    {"type": "http.response.body", "body": chunk, "more_body": True}
+                )
+            await send(
+                {
+                    "type": "http.response.body",
+                    "body": chunks[-1] if chunks else b"",
+                    "more_body": False,
+                }
+            )
+
+            return
+
+        if hasattr(app_iter, "__aiter__"):
+            # An async body (see webob.response.AsyncAppIter)
+            await _send_start(send, started)
+
+            async for chunk in app_iter:
+                if chunk:
+                    await send(
+                        {
+                            "type": "http.response.body",
+                            "body": bytes(chunk),
+                            "more_body": True,
+                        }
+                    )
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+
+            return
+
+        iterator = iter(app_iter)
+
+        if threaded:
+            loop = asyncio.get_running_loop()
+
+            async def next_chunk():
+                return await loop.run_in_executor(None, next, iterator, _done)
+
+        else:
+
+            async def next_chunk():
+                return next(iterator, _done)
+
+        # start_response may be called while the first chunk is produced
+        chunk = await next_chunk()
+        await _send_start(send, started)
+
+        while chunk is not _done:
+            if chunk:
+                await send(
+                    {
+                        "type": "http.response.body",
+                        "body": bytes(chunk),
+                        "more_body": True,
+                    }
+                )
+            chunk = await next_chunk()
+        await send({"type": "http.response.body", "body": b"", "more_body": False})
+    finally:
+        aclose = getattr(app_iter, "aclose", None)
+
+        if aclose is not None:
+            await aclose()
+        else:
+            close = getattr(app_iter, "close", None)
+
+            if close is not None:
+                close()
+
+
+async def _send_start(send, started):
+    if not started:
+        raise RuntimeError("The application did not call start_response")
+    status, headerlist = started
+    await send(
+        {
+            "type": "http.response.start",
+            "status": int(status.split(" ", 1)[0]),
+            "headers": _encode_headers(headerlist),
+        }
+    )
@@ -0,0 +1,514 @@
+"""
+An in-process HTTP cache for WSGI applications.
+
+:class:`ResponseCache` keeps complete responses in memory, following the
+``Cache-Control`` directives of the application, and :func:`response_cache`
+is the middleware that puts it in front of an application::
+
+    from webob.cache import ResponseCache, response_cache
+
+    app = response_cache(app, cache=ResponseCache(max_size=32 << 20))
+
+Responses are served from the cache through
+:meth:`webob.Response.conditional_response_app`, so ``If-None-Match``,
+``If-Modified-Since`` and ``Range`` requests are answered without calling
+the application.
+
+:func:`auto_etag` is a lighter middleware that only adds an ETag (see
+:meth:`webob.Response.hash_etag`) to responses that lack one, so they can
+be answered with ``304 Not Modified``.
+"""
+
+from collections import OrderedDict
+from datetime import datetime
+import threading
+import time
+
+from webob.datetime_utils import UTC
+from webob.dec import wsgify
+
+__all__ = ["ResponseCache", "response_cache", "auto_etag"]
+
+# Request headers that are answered by the cache itself; they are not
+# passed on when a response is fetched from the application to be stored.
+_CLIENT_CONDITIONALS = (
+    "HTTP_IF_NONE_MATCH",
+    "HTTP_IF_MODIFIED_SINCE",
+    "HTTP_RANGE",
+    "HTTP_IF_RANGE",
+)
+
+# Requests with any of these headers are always passed to the application.
+_BYPASS_KEYS = ("HTTP_AUTHORIZATION", "HTTP_IF_MATCH", "HTTP_IF_UNMODIFIED_SINCE")
+
+# Headers of a stored response that a 304 Not Modified does not update.
+_KEEP_ON_REVALIDATE = frozenset(
+    ["content-length", "content-type", "content-encoding", "content-range"]
+)
+
+
+class _CacheEntry:
+    __slots__ = (
+        "status",
+        "headerlist",
+        "body",
+        "vary",
+        "vary_values",
+        "stored",
+        "fresh_for",
+        "stale_for",
+        "etag",
+        "last_modified",
+        "size",
+    )
+
+    def __init__(self, status, headerlist, body, vary, vary_values, stored):
+        self.status = status
+        self.headerlist = headerlist
+        self.body = body
+        self.vary = vary
+        self.vary_values = vary_values
+        self.stored = stored
+        self.size = len(body) + sum(len(k) + len(v) for k, v in headerlist)
+
+
+class ResponseCache:
+    """
+    A bounded, thread-safe store of responses, keyed by the URL of the
+    request and the request headers named by the response's ``Vary``.
+
+    Only ``GET`` and ``HEAD`` requests are served from the cache; ``HEAD``
+    requests are answered from the stored ``GET`` response.  A response is
+    stored when its status is in :attr:`cacheable_statuses` and it is given
+    a lifetime with ``s-maxage``, ``max-age`` or ``Expires``.  Responses
+    marked ``no-store`` or ``private``, responses setting cookies, and
+    responses with ``Vary: *`` are never stored.  Requests carrying
+    ``Authorization``, ``If-Match`` or ``If-Unmodified-Since`` are always
+    passed to the application.  ``Cache-Control: no-store``, ``no-cache``
+    and ``max-age`` on the request are honoured.
+
+    Once a response is stale it is revalidated with the application, using
+    its ``ETag`` and ``Last-Modified``; a ``304 Not Modified`` refreshes the
+    stored copy.  While a response is within its ``stale-while-revalidate``
+    window the stale copy is served and the revalidation happens in a
+    background thread.
+
+    Concurrent requests for a URL that is not in the cache (or must be
+    revalidated) are coalesced: one of them calls the application, and the
+    others wait for and share its response if it could be stored.
+
+    The cache holds at most ``max_entries`` responses and ``max_size``
+    bytes (bodies and headers); the least recently used URLs are evicted
+    first.  Responses larger than ``max_entry_size`` are not stored.
+    Successful ``POST``, ``PUT``, ``PATCH`` and ``DELETE`` requests remove
+    the stored responses for their URL.
+    """
+
+    #: Status codes of responses that may be stored.
+    cacheable_statuses = frozenset(
+        [200, 203, 204, 300, 301, 308, 404, 405, 410, 414, 501]
+    )
+
+    #: How long, in seconds, a request waits for another request that is
+    #: already fetching the same URL before calling the application itself.
+    flight_timeout = 30
+
+    clock = staticmethod(time.monotonic)
+
+    def __init__(self, max_entries=1024, max_size=64 << 20, max_entry_size=1 << 20):
+        self.max_entries = max_entries
+        self.max_size = max_size
+        self.max_entry_size = max_entry_size
+        self.size = 0
+        self._count = 0
+        # url -> list of variants (most recent first), in LRU order
+        self._entries = OrderedDict()
+        # url -> threading.Event of the request fetching it
+        self._flights = {}
+        self._lock = threading.Lock()
+
+    def __repr__(self):
+        return "<{} {} entries, {} bytes>".format(
+            self.__class__.__name__, self._count, self.size
+        )
+
+    def __len__(self):
+        return self._count
+
+    def clear(self):
+        """Remove all stored responses."""
+
+        with self._lock:
+            self._entries.clear()
+            self._count = 0
+            self.size = 0
+
+    def invalidate(self, url):
+        """Remove the stored responses for ``url``."""
+
+        with self._lock:
+            self._discard(url)
+
+    def get_response(self, req, app):
+        """
+        Return the response to ``req``, from the cache when possible and
+        otherwise from the WSGI application ``app`` (storing it if it can
+        be).
+        """
+        environ = req.environ
+        method = environ["REQUEST_METHOD"]
+
+        if method not in ("GET", "HEAD"):
+            resp = req.get_response(app)
+
+            if method not in ("OPTIONS", "TRACE") and resp.status_code < 400:
+                self.invalidate(req.url)
+
+            return resp
+
+        for key in _BYPASS_KEYS:
+            if key in environ:
+                return req.get_response(app)
+
+        req_cc = None
+
+        if environ.get("HTTP_CACHE_CONTROL"):
+            req_cc = req.cache_control
+
+            if req_cc.no_store:
+                return req.get_response(app)
+
+        url = req.url
+        entry = self._lookup(url, req)
+
+        if entry is not None:
+            age = self.clock() - entry.stored
+
+            if self._usable(entry, age, req_cc):
+                return self._serve(req, entry, age)
+
+            if age < entry.fresh_for + entry.stale_for and (
+                req_cc is None or req_cc.no_cache is None
+            ):
+                self._revalidate_later(req, app, url, entry)
+
+                return self._serve(req, entry, age)
+
+        return self._fetch(req, app, url, entry)
+
+    def _usable(self, entry, age, req_cc):
+        if age >= entry.fresh_for:
+            return False
+
+        if req_cc is not None:
+            if req_cc.no_cache is not None:
+                return False
+            max_age = req_cc.max_age
+
+            if isinstance(max_age, int) and age > max_age:
+                return False
+
+        return True
+
+    def _serve(self, req, entry, age):
+        headerlist = list(entry.headerlist)
+        headerlist.append(("Age", str(int(age))))
+
+        return req.ResponseClass(
+            status=entry.status,
+            headerlist=headerlist,
+            app_iter=[entry.body],
+            conditional_response=True,
+        )
+
+    def _lookup(self, url, req):
+        with self._lock:
+            variants = self._entries.get(url)
+
+            if variants is None:
+                return None
+            self._entries.move_to_end(url)
+
+        headers = req.headers
+
+        for entry in variants:
+            if tuple(headers.get(name) for name in entry.vary) == entry.vary_values:
+                return entry
+
+        return None
+
+    def _fetch(self, req, app, url, entry):
+        # Only one request at a time fetches a URL; the others wait for it
+        # and use what it stored.
+        with self._lock:
+            flight = self._flights.get(url)
+
+            if flight is None:
+                flight = self._flights[url] = threading.Event()
+                leader = True
+            else:
+                leader = False
+
+        if not leader:
+            flight.wait(self.flight_timeout)
+            new_entry = self._lookup(url, req)
+
+            if new_entry is not None and new_entry is not entry:
+                age = self.clock() - new_entry.stored
+
+                if self._usable(new_entry, age, None):
+                    return self._serve(req, new_entry, age)
+
+            return self._update(req, self._fill_request(req, entry), app, url, entry)
+
+        try:
+            return self._update(req, self._fill_request(req, entry), app, url, entry)
+        finally:
+            self._land(url, flight)
+
+    def _land(self, url, flight):
+        with self._lock:
+            if self._flights.get(url) is flight:
+                del self._flights[url]
+        flight.set()
+
+    def _revalidate_later(self, req, app, url, entry):
+        with self._lock:
+            if url in self._flights:
+                return
+            flight = self._flights[url] = threading.Event()
+
+        # The request is copied now; the original belongs to this thread
+        fill_req = self._fill_request(req, entry)
+
+        def revalidate():
+            try:
+                self._update(None, fill_req, app, url, entry)
+            finally:
+                self._land(url, flight)
+
+        self._spawn(revalidate)
+
+    def _spawn(self, func):
+        threading.Thread(target=func, daemon=True).start()
+
+    def _fill_request(self, req, entry):
+        # A GET without the client's own conditions, asking the application
+        # to revalidate the stored response if there is one
+        fill_req = req.copy_get()
+        env = fill_req.environ
+
+        for key in _CLIENT_CONDITIONALS:
+            env.pop(key, None)
+
+        if entry is not None:
+            if entry.etag is not None:
+                env["HTTP_IF_NONE_MATCH"] = entry.etag
+
+            if entry.last_modified is not None:
+                env["HTTP_IF_MODIFIED_SINCE"] = entry.last_modified
+
+        return fill_req
+
+    def _update(self, req, fill_req, app, url, entry):
+        resp = fill_req.get_response(app)
+
+        if entry is not None and resp.status_code == 304:
+            replaced = {k.lower() for k, v in resp.headerlist}
+            replaced -= _KEEP_ON_REVALIDATE
+            headerlist = [
+                (k, v) for k, v in entry.headerlist if k.lower() not in replaced
+            ]
+            headerlist.extend(
+                (k, v) for k, v in resp.headerlist if k.lower() in replaced
+            )
+            resp = fill_req.ResponseClass(
+                status=entry.status, headerlist=headerlist, app_iter=[entry.body]
+            )
+
+        new_entry = self._store(url, fill_req, resp)
+
+        if new_entry is None:
+            if entry is not None:
+                self._remove(url, entry)
+
+            if req is None:
+                return None
+            resp.conditional_response = True
+
+            return resp
+
+        if req is None:
+            return None
+
+        return self._serve(req, new_entry, self.clock() - new_entry.stored)
+
+    def _freshness(self, resp):
+        # Returns (fresh_for, stale_for) in seconds, or None when the
+        # response may not be stored
+        if resp.status_code not in self.cacheable_statuses:
+            return None
+
+        if "Set-Cookie" in resp.headers:
+            return None
+
+        vary = resp.vary
+
+        if vary and "*" in vary:
+            return None
+
+        cc = resp.cache_control
+
+        if cc.no_store or cc.private is not None:
+            return None
+
+        has_validator = resp.etag is not None or resp.last_modified is not None
+
+        if cc.no_cache is not None:
+            return (0, 0) if has_validator else None
+
+        lifetime = cc.s_maxage
+
+        if lifetime is None:
+            lifetime = cc.max_age
+
+        if lifetime is None and resp.expires is not None:
+            date = resp.date or datetime.now(UTC)
+            lifetime = (resp.expires - date).total_seconds()
+
+        if not isinstance(lifetime, (int, float)):
+            return None
+
+        lifetime = max(lifetime, 0)
+
+        if not lifetime and not has_validator:
+            return None
+
+        stale_for = cc.stale_while_revalidate
+
+        if (
+            not isinstance(stale_for, int)
+            or stale_for < 0
+            or cc.must_revalidate
+            or cc.proxy_revalidate
+        ):
+            stale_for = 0
+
+        return lifetime, stale_for
+
+    def _store(self, url, req, resp):
+        freshness = self._freshness(resp)
+
+        if freshness is None:
+            return None
+
+        content_length = resp.content_length
+
+        if content_length is not None and content_length > self.max_entry_size:
+            return None
+
+        body = resp.body
+
+        if len(body) > self.max_entry_size:
+            return None
+
+        if resp.content_length is None:
+            resp.content_length = len(body)
+
+        headers = req.headers
+        vary = tuple(name.lower() for name in resp.vary or ())
+        entry = _CacheEntry(
+            resp.status,
+            [(k, v) for k, v in resp.headerlist if k.lower() != "age"],
+            body,
+            vary,
+            tuple(headers.get(name) for name in vary),
+            self.clock() - (resp.age or 0),
+        )
+        entry.fresh_for, entry.stale_for = freshness
+        entry.etag = resp.headers.get("ETag")
+        entry.last_modified = resp.headers.get("Last-Modified")
+        self._insert(url, entry)
+
+        return entry
+
+    def _insert(self, url, entry):
+        with self._lock:
+            variants = self._entries.pop(url, None) or []
+            kept = [entry]
+
+            for other in variants:
+                # A variant with a different Vary could match the same
+                # requests as the new one
+                if other.vary == entry.vary and other.vary_values != entry.vary_values:
+                    kept.append(other)
+                else:
+                    self._count -= 1
+                    self.size -= other.size
+            self._entries[url] = kept
+            self._count += 1
+            self.size += entry.size
+
+            while self._entries and (
+                self._count > self.max_entries or self.size > self.max_size
+            ):
+                self._discard(next(iter(self._entries)))
+
+    def _remove(self, url, entry):
+        with self._lock:
+            variants = self._entries.get(url)
+
+            if variants is not None and entry in variants:
+                variants = [other for other in variants if other is not entry]
+                self._count -= 1
+                self.size -= entry.size
+
+                if variants:
+                    self._entries[url] = variants
+                else:
+                    del self._entries[url]
+
+    def _discard(self, url):
+        variants = self._entries.pop(url, ())
+
+        for entry in variants:
+            self._count -= 1
+            self.size -= entry.size
+
+
+@wsgify.middleware
+def response_cache(req, app, cache):
+    """
+    Serve the responses of ``app`` from ``cache``, a :class:`ResponseCache`::
+
+        app = response_cache(app, cache=ResponseCache())
+    """
+
+    return cache.get_response(req, app)
+
+
+@wsgify.middleware
+def auto_etag(req, app, algorithm=None):
+    """
+    Give successful ``GET`` responses of ``app`` that have a buffered body
+    (an ``app_iter`` that is a list) and no ETag a strong ETag computed with
+    :meth:`webob.Response.hash_etag`, and make them conditional::
+
+        app = auto_etag(app)
+        app = auto_etag(app, algorithm='sha256')
+
+    Streamed bodies are left alone, as they would have to be read into
+    memory to be hashed.
+    """
+    resp = req.get_response(app)
+
+    if (
+        req.method == "GET"
+        and resp.status_code == 200
+        and isinstance(resp.app_iter, list)
+        and "ETag" not in resp.headers
+    ):
+        resp.hash_etag(algorithm)
+    resp.conditional_response = True
+
+    return resp
@@ -2,6 +2,7 @@
 Represents the Cache-Control header
 """
 
+from contextlib import contextmanager
 import re
 
 
@@ -211,6 +212,32 @@ class CacheControl:
     def __str__(self):
         return serialize_cache_control(self.properties)
 
+    @contextmanager
+    def batch(self):
+        """
+        Group several changes into a single update of the header this
+        object is bound to (if any), made when the ``with`` block exits::
+
+            with response.cache_control.batch() as cc:
+                cc.public = True
+                cc.max_age = 3600
+                cc.stale_while_revalidate = 60
+        """
+        props = self.properties
+        updated = getattr(props, "updated", None)
+
+        if updated is None:
+            yield self
+
+            return
+
+        props.updated = None
+        try:
+            yield self
+        finally:
+            props.updated = updated
+            props._updated()
+
     def copy(self):
         """
         Returns a copy of this object.
@@ -32,8 +32,16 @@ class SendRequest:
 
     If you use ``send_request_app`` then simple ``httplib``
     connections will be used.
+
+    Request bodies larger than :attr:`body_buffer_size` are streamed from
+    ``wsgi.input`` (e.g. a :class:`webob.request.MultipartEncoder`) instead
+    of being read in memory first.
     """
 
+    #: Request bodies up to this size are read at once, and sent with the
+    #: headers.
+    body_buffer_size = 1 << 16
+
     def __init__(
         self,
         HTTPConnection=httplib.HTTPConnection,
@@ -88,10 +96,13 @@ class SendRequest:
             content_length = int(environ.get("CONTENT_LENGTH", "0"))
         except ValueError:
             content_length = 0
-        # FIXME: there is no streaming of the body, and that might be useful
-        # in some cases
 
-        if content_length:
+        if content_length > self.body_buffer_size:
+            # Stream the body instead of reading it in memory
+            from webob.request import LimitedLengthFile
+
+            body = LimitedLengthFile(environ["wsgi.input"], content_length)
+        elif content_length:
             body = environ["wsgi.input"].read(content_length)
         else:
             body = ""
@@ -10,7 +10,8 @@ import string
 import time
 import warnings
 
-from webob.util import bytes_, text_
+from webob.counters import _count
+from webob.util import _timed_phase, bytes_, text_
 
 __all__ = [
     "Cookie",
@@ -29,6 +30,13 @@ _marker = object()
 SAMESITE_VALIDATION = True
 
 
+def _parse_cookie_dict(header):
+    def d(b):
+        return b.decode("utf8")
+
+    return {d(k): d(v) for k, v in parse_cookie(header)}
+
+
 class RequestCookies(MutableMapping):
     _cache_key = "webob._parsed_cookies"
 
@@ -42,12 +50,12 @@ class RequestCookies(MutableMapping):
         cache, cache_header = env.get(self._cache_key, ({}, None))
 
         if cache_header == header:
-            return cache
+            _count("cookie_cache_hits")
 
-        def d(b):
-            return b.decode("utf8")
+            return cache
+        _count("cookie_parses")
 
-        cache = {d(k): d(v) for k, v in parse_cookie(header)}
+        cache = _timed_phase(env, "cookies", _parse_cookie_dict, header)
         env[self._cache_key] = (cache, header)
 
         return cache
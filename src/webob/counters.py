@@ -0,0 +1,114 @@
+"""
+Counters of the work WebOb does buffering and parsing requests.
+
+They are always on, and counted separately in each thread::
+
+    from webob.counters import counters, reset_counters
+
+    reset_counters()
+    ...  # handle requests
+    print(counters())
+    print(counters(all_threads=True))
+
+The counters are:
+
+``copy_body``, ``copy_body_bytes``
+    The calls of :meth:`webob.Request.copy_body` that copied a body, and
+    the number of bytes they copied.
+``shared_bodies``
+    The bodies of :meth:`webob.Request.copy` copies that share the body of
+    the original request instead of copying it.
+``tempfile_spills``
+    The request bodies written to a temporary file
+    (:meth:`webob.Request.make_tempfile`).
+``post_parses``, ``post_reparses``, ``post_cache_hits``
+    The form bodies parsed (:attr:`webob.Request.POST`), those of them
+    parsed again because the body had changed since they were last parsed,
+    and the accesses answered from the parsed form.
+``get_parses``, ``get_cache_hits``
+    The same, for the query string (:attr:`webob.Request.GET`).
+``cookie_parses``, ``cookie_cache_hits``
+    The same, for the ``Cookie`` header.
+``cache_control_parses``, ``cache_control_cache_hits``
+    The same, for the ``Cache-Control`` header of requests.
+"""
+
+import threading
+
+__all__ = ["counters", "reset_counters"]
+
+_local = threading.local()
+# The counters of each thread, by thread identifier
+_threads = {}
+# The totals of the threads that have ended
+_ended = {}
+_lock = threading.Lock()
+
+
+def _count(name, value=1):
+    try:
+        counts = _local.counts
+    except AttributeError:
+        counts = _local.counts = _register()
+    counts[name] = counts.get(name, 0) + value
+
+
+def _register():
+    counts = {}
+
+    with _lock:
+        current = threading.get_ident()
+        alive = {thread.ident for thread in threading.enumerate()}
+        # A thread that has ended may have had the identifier of this one
+        alive.discard(current)
+
+        for ident in list(_threads):
+            if ident not in alive:
+                _add(_ended, _threads.pop(ident))
+        _threads[current] = counts
+
+    return counts
+
+
+def _add(totals, counts):
+    for name, value in counts.items():
+        totals[name] = totals.get(name, 0) + value
+
+
+def counters(all_threads=False):
+    """
+    Return the counters of the current thread (or the totals of all
+    threads) as a ``dict``.  Counters that were never incremented are
+    missing.
+    """
+
+    if not all_threads:
+        return dict(getattr(_local, "counts", ()))
+    totals = {}
+
+    with _lock:
+        _add(totals, _ended)
+
+        for counts in list(_threads.values()):
+            # Copied at once, as the thread may be counting
+            _add(totals, dict(counts))
+
+    return totals
+
+
+def reset_counters(all_threads=False):
+    """Reset the counters of the current thread (or of all threads)."""
+
+    if not all_threads:
+        counts = getattr(_local, "counts", None)
+
+        if counts is not None:
+            counts.clear()
+
+        return
+
+    with _lock:
+        _ended.clear()
+
+        for counts in _threads.values():
+            counts.clear()
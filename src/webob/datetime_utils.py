@@ -1,6 +1,4 @@
-import calendar
 from datetime import date, datetime, timedelta, tzinfo
-from email.utils import formatdate, mktime_tz, parsedate_tz
 import time
 
 from webob.util import text_
@@ -67,6 +65,9 @@ def parse_date(value):
             value = str(value, "latin-1")
     except Exception:
         return None
+    # email.utils is slow to import, and not needed by every program
+    from email.utils import mktime_tz, parsedate_tz
+
     t = parsedate_tz(value)
 
     if t is None:
@@ -90,6 +91,8 @@ def serialize_date(dt):
         dt = dt.timetuple()
 
     if isinstance(dt, (tuple, time.struct_time)):
+        import calendar
+
         dt = calendar.timegm(dt)
 
     if not (isinstance(dt, float) or isinstance(dt, int)):
@@ -98,6 +101,8 @@ def serialize_date(dt):
             "not %r" % dt
         )
 
+    from email.utils import formatdate
+
     return formatdate(dt, usegmt=True)
 
 
@@ -6,8 +6,10 @@ application (while also allowing normal calling of the method with an
 instantiated request).
 """
 
+from webob.datetime_utils import parse_date, serialize_date
 from webob.exc import HTTPException
 from webob.request import Request
+from webob.response import Response
 from webob.util import bytes_
 
 __all__ = ["wsgify"]
@@ -69,8 +71,33 @@ class wsgify:
       response will be used.
     * Raise an exception from :mod:`webob.exc`
 
+    The function may also be an ``async def`` function.  Under an ASGI
+    server (see :class:`webob.asgi.ASGIApp`) it is awaited in the server's
+    event loop; called as a WSGI application, it is run to completion in
+    an event loop of its own (in another thread, when the calling thread
+    already runs an event loop).  Called directly with a request, it
+    returns an awaitable.
+
     Also see :func:`wsgify.middleware` for a way to make middleware.
 
+    Conditional ``GET`` and ``HEAD`` requests can be answered without
+    calling the function at all by giving a `validator`, a cheap function
+    that takes the request and returns the ETag of the resource, its
+    last modification time, or a tuple ``(etag, last_modified)``::
+
+        def article_version(req):
+            return get_article_version(req.GET['id'])
+
+        @wsgify(validator=article_version)
+        def article(req):
+            return render_article(req.GET['id'])
+
+    When the request's ``If-None-Match`` (or, if it has none,
+    ``If-Modified-Since``) matches, ``304 Not Modified`` is returned right
+    away.  Otherwise the function is called, and the ETag and
+    Last-Modified from the validator are added to its response unless it
+    already has them.
+
     You can also subclass this decorator; the most useful things to do
     in a subclass would be to change `RequestClass` or override
     `call_func` (e.g., to add ``req.urlvars`` as keyword arguments to
@@ -79,8 +106,16 @@ class wsgify:
 
     RequestClass = Request
 
+    validator = None
+
     def __init__(
-        self, func=None, RequestClass=None, args=(), kwargs=None, middleware_wraps=None
+        self,
+        func=None,
+        RequestClass=None,
+        args=(),
+        kwargs=None,
+        middleware_wraps=None,
+        validator=None,
     ):
         self.func = func
 
@@ -93,6 +128,9 @@ class wsgify:
         self.kwargs = kwargs
         self.middleware_wraps = middleware_wraps
 
+        if validator is not None:
+            self.validator = validator
+
     def __repr__(self):
         return f"<{self.__class__.__name__} at {id(self)} wrapping {self.func!r}>"
 
@@ -129,30 +167,70 @@ class wsgify:
             req.response = req.ResponseClass()
             try:
                 args, kw = self._prepare_args(None, None)
-                resp = self.call_func(req, *args, **kw)
+                resp = self._call_validated(req, args, kw)
+
+                if _isawaitable(resp):
+                    # An async function, with no event loop to run it in
+                    resp = _run_until_complete(resp)
             except HTTPException as exc:
                 resp = exc
 
-            if resp is None:
-                # FIXME: I'm not sure what this should be?
-                resp = req.response
-
-            if isinstance(resp, str):
-                resp = bytes_(resp, req.charset)
-
-            if isinstance(resp, bytes):
-                body = resp
-                resp = req.response
-                resp.write(body)
-
-            if resp is not req.response:
-                resp = req.response.merge_cookies(resp)
+            resp = self._finish_response(req, resp)
 
             return resp(environ, start_response)
         else:
             args, kw = self._prepare_args(args, kw)
 
-            return self.call_func(req, *args, **kw)
+            return self._call_validated(req, args, kw)
+
+    async def handle_async(self, req):
+        """Handle ``req`` like a call as a WSGI application would, awaiting
+        the function if it is an ``async def`` function, and return the
+        response (a WSGI application, usually a :class:`webob.Response`).
+
+        This is how :class:`webob.asgi.ASGIApp` calls async functions.
+        """
+        req.response = req.ResponseClass()
+        try:
+            args, kw = self._prepare_args(None, None)
+            resp = self._call_validated(req, args, kw)
+
+            if _isawaitable(resp):
+                resp = await resp
+        except HTTPException as exc:
+            resp = exc
+
+        return self._finish_response(req, resp)
+
+    @property
+    def is_async(self):
+        """Whether the wrapped function (or :meth:`call_func`) is an
+        ``async def`` function."""
+
+        import inspect
+
+        return inspect.iscoroutinefunction(self.func) or inspect.iscoroutinefunction(
+            self.call_func
+        )
+
+    def _finish_response(self, req, resp):
+        # Turn what the function returned into a WSGI application
+        if resp is None:
+            # FIXME: I'm not sure what this should be?
+            resp = req.response
+
+        if isinstance(resp, str):
+            resp = bytes_(resp, req.charset)
+
+        if isinstance(resp, bytes):
+            body = resp
+            resp = req.response
+            resp.write(body)
+
+        if resp is not req.response:
+            resp = req.response.merge_cookies(resp)
+
+        return resp
 
     def get(self, url, **kw):
         """Run a GET request on this application, returning a Response.
@@ -205,6 +283,76 @@ class wsgify:
 
         return self.func(req, *args, **kwargs)
 
+    def _call_validated(self, req, args, kw):
+        validator = self.validator
+
+        if validator is None:
+            return self.call_func(req, *args, **kw)
+
+        etag = last_modified = None
+        value = validator(req)
+
+        if isinstance(value, tuple):
+            etag, last_modified = value
+        elif isinstance(value, str):
+            etag = value
+        else:
+            last_modified = value
+
+        if last_modified is not None:
+            # Round trip through the header format, as the comparison with
+            # If-Modified-Since is made with what the response would send
+            last_modified = parse_date(serialize_date(last_modified))
+
+        if req.method in ("GET", "HEAD"):
+            # The same checks as Response.conditional_response_app
+            not_modified = False
+
+            if req.if_none_match and etag is not None:
+                not_modified = etag in req.if_none_match
+            elif req.if_modified_since and last_modified is not None:
+                not_modified = last_modified <= req.if_modified_since
+
+            if not_modified:
+                resp = req.ResponseClass(status=304)
+
+                if etag is not None:
+                    resp.etag = etag
+
+                if last_modified is not None:
+                    resp.last_modified = last_modified
+
+                return resp
+
+        resp = self.call_func(req, *args, **kw)
+
+        if _isawaitable(resp):
+            return self._add_validators_async(req, resp, etag, last_modified)
+        self._add_validators(req, resp, etag, last_modified)
+
+        return resp
+
+    async def _add_validators_async(self, req, resp, etag, last_modified):
+        resp = await resp
+        self._add_validators(req, resp, etag, last_modified)
+
+        return resp
+
+    def _add_validators(self, req, resp, etag, last_modified):
+        if resp is None or isinstance(resp, (str, bytes)):
+            target = req.response
+        elif isinstance(resp, Response):
+            target = resp
+        else:
+            target = None
+
+        if target is not None and 200 <= target.status_code < 300:
+            if etag is not None and "ETag" not in target.headers:
+                target.etag = etag
+
+            if last_modified is not None and "Last-Modified" not in target.headers:
+                target.last_modified = last_modified
+
     def clone(self, func=None, **kw):
         """Creates a copy/clone of this object, but with some
         parameters rebound
@@ -222,6 +370,9 @@ class wsgify:
 
         if self.kwargs:
             kwargs["kwargs"] = self.kwargs
+
+        if self.validator is not self.__class__.validator:
+            kwargs["validator"] = self.validator
         kwargs.update(kw)
 
         return self.__class__(**kwargs)
@@ -295,6 +446,34 @@ class wsgify:
         return args, kwargs
 
 
+def _isawaitable(obj):
+    # inspect.isawaitable, without importing inspect (or asyncio) for
+    # programs that have no async functions
+    return hasattr(obj, "__await__")
+
+
+def _run_until_complete(awaitable):
+    import asyncio
+
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        pass
+    else:
+        # Called by synchronous code running in an event loop (like a
+        # middleware under ASGIApp(threaded=False)), which cannot run
+        # another one: run it in a thread of its own
+        from concurrent.futures import ThreadPoolExecutor
+
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            return executor.submit(_run_until_complete, awaitable).result()
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(awaitable)
+    finally:
+        loop.close()
+
+
 class _UnboundMiddleware:
     """A `wsgify.middleware` invocation that has not yet wrapped a
     middleware function; the intermediate object when you do
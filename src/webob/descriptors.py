@@ -118,7 +118,7 @@ def header_getter(header, rfc_section):
 
     def fget(r):
         for k, v in r._headerlist:
-            if k.lower() == key:
+            if k == header or k.lower() == key:
                 return v
 
     def fset(r, value):
@@ -137,6 +137,36 @@ def header_getter(header, rfc_section):
     return property(fget, fset, fdel, doc)
 
 
+# Parsed values of these types can be handed out more than once, as
+# callers cannot modify them without going through the setter
+_shareable_types = frozenset([int, str, tuple, date, datetime, type(None)])
+
+
+def _cached_parse(r, key, raw, parse, any_type=False):
+    """
+    Return ``parse(raw)``, reusing the value parsed the last time ``key``
+    was read on ``r`` if the raw header value did not change since.
+
+    Only values of immutable types are reused, unless ``any_type`` is true.
+    """
+    try:
+        cache = r.__dict__["_parsed_headers"]
+    except KeyError:
+        cache = r.__dict__["_parsed_headers"] = {}
+    except AttributeError:
+        return parse(raw)
+
+    entry = cache.get(key)
+
+    if entry is not None and entry[0] == raw:
+        return entry[1]
+    value = parse(raw)
+
+    if any_type or type(value) in _shareable_types:
+        cache[key] = (raw, value)
+    return value
+
+
 def converter(prop, parse, serialize, convert_name=None):
     assert isinstance(prop, property)
     convert_name = convert_name or "``{}`` and ``{}``".format(
@@ -148,7 +178,7 @@ def converter(prop, parse, serialize, convert_name=None):
     hget, hset = prop.fget, prop.fset
 
     def fget(r):
-        return parse(hget(r))
+        return _cached_parse(r, fget, hget(r), parse)
 
     def fset(r, val):
         if val is not None:
@@ -5,7 +5,7 @@ Also If-Range parsing
 """
 
 from webob.datetime_utils import parse_date, serialize_date
-from webob.descriptors import _rx_etag
+from webob.descriptors import _cached_parse, _rx_etag
 from webob.util import header_docstring
 
 __all__ = ["AnyETag", "NoETag", "ETagMatcher", "IfRange", "etag_property"]
@@ -15,12 +15,15 @@ def etag_property(key, default, rfc_section, strong=True):
     doc = header_docstring(key, rfc_section)
     doc += "  Converts it as a Etag."
 
+    def parse(value):
+        return ETagMatcher.parse(value, strong=strong)
+
     def fget(req):
         value = req.environ.get(key)
         if not value:
             return default
         else:
-            return ETagMatcher.parse(value, strong=strong)
+            return _cached_parse(req, fget, value, parse, any_type=True)
 
     def fset(req, val):
         if val is None:
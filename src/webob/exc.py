@@ -263,6 +263,11 @@ ${body}""")
     # Set this to True for responses that should have no request body
     empty_body = False
 
+    # Cached ``(key, status, headerlist, conditional_response)`` used to
+    # set up the Response state when no Response keyword arguments are
+    # given; see ``_init_from_template``
+    _response_template = None
+
     def __init__(
         self,
         detail=None,
@@ -272,7 +277,10 @@ ${body}""")
         json_formatter=None,
         **kw,
     ):
-        Response.__init__(self, status=f"{self.code} {self.title}", **kw)
+        if kw:
+            Response.__init__(self, status=f"{self.code} {self.title}", **kw)
+        else:
+            self._init_from_template()
         Exception.__init__(self, detail)
 
         if headers:
@@ -284,13 +292,51 @@ ${body}""")
             self.body_template = body_template
             self.body_template_obj = Template(body_template)
 
-        if self.empty_body:
+        # The template has no Content-Type and Content-Length already, but
+        # they may come from kw or headers
+        if self.empty_body and (kw or headers):
             del self.content_type
             del self.content_length
 
         if json_formatter is not None:
             self.json_formatter = json_formatter
 
+    def _init_from_template(self):
+        # Exceptions are mostly raised without any Response keyword
+        # arguments, in which case the status line and the default headers
+        # only depend on class attributes.  Compute them once per class
+        # with the full Response constructor and copy them afterwards.
+        cls = self.__class__
+        key = (
+            cls.code,
+            cls.title,
+            cls.empty_body,
+            cls.default_content_type,
+            cls.default_charset,
+            cls.default_conditional_response,
+        )
+        template = cls.__dict__.get("_response_template")
+
+        if template is None or template[0] != key:
+            probe = cls.__new__(cls)
+            Response.__init__(probe, status=f"{cls.code} {cls.title}")
+
+            if cls.empty_body:
+                del probe.content_type
+                del probe.content_length
+            template = (
+                key,
+                probe._status,
+                tuple(probe._headerlist),
+                probe.conditional_response,
+            )
+            cls._response_template = template
+
+        _, self._status, headerlist, self.conditional_response = template
+        self._headers = None
+        self._headerlist = list(headerlist)
+        self._app_iter = [b""]
+
     def __str__(self):
         return self.detail or self.explanation
 
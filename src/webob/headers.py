@@ -1,4 +1,5 @@
-from collections.abc import MutableMapping
+from collections.abc import ItemsView, MutableMapping
+from functools import lru_cache
 
 from webob.multidict import MultiDict
 
@@ -110,6 +111,9 @@ key2header = {
 header2key = {v.upper(): k for (k, v) in key2header.items()}
 
 
+# The translations of header names are remembered.  Header names come from
+# clients, so the least recently used are dropped.
+@lru_cache(maxsize=1024)
 def _trans_key(key):
     if not isinstance(key, str):
         return None
@@ -121,6 +125,7 @@ def _trans_key(key):
         return None
 
 
+@lru_cache(maxsize=1024)
 def _trans_name(name):
     name = name.upper()
 
@@ -130,6 +135,18 @@ def _trans_name(name):
     return "HTTP_" + name.replace("-", "_")
 
 
+class _EnvironHeadersItemsView(ItemsView):
+    # Reads the values while walking the environ instead of looking every
+    # header up again by name.
+
+    def __iter__(self):
+        for key, value in self._mapping.environ.items():
+            header = _trans_key(key)
+
+            if header:
+                yield header, value
+
+
 class EnvironHeaders(MutableMapping):
     """An object that represents the headers as present in a
     WSGI environment.
@@ -156,6 +173,9 @@ class EnvironHeaders(MutableMapping):
     def keys(self):
         return filter(None, map(_trans_key, self.environ))
 
+    def items(self):
+        return _EnvironHeadersItemsView(self)
+
     def __contains__(self, hname):
         return _trans_name(hname) in self.environ
 
@@ -163,4 +183,4 @@ class EnvironHeaders(MutableMapping):
         return len(list(self.keys()))
 
     def __iter__(self):
-        yield from self.keys()
+        return iter(self.keys())
@@ -0,0 +1,321 @@
+"""
+Timing the phases of requests, and sampling them with :mod:`cProfile`.
+
+:class:`TimingMiddleware` records the wall clock and CPU time that each
+request spends in the costly parts of WebOb:
+
+``copy_body``
+    Buffering the request body (:meth:`webob.Request.copy_body`).
+``POST``
+    Parsing form data (:attr:`webob.Request.POST`).
+``GET``
+    Parsing the query string (:attr:`webob.Request.GET`).
+``cookies``
+    Parsing the ``Cookie`` header (:attr:`webob.Request.cookies`).
+``negotiation``
+    Parsing the ``Accept*`` headers (:attr:`webob.Request.accept`...).
+    Matching offers against them (``best_match()``,
+    ``acceptable_offers()``...) is not part of it: it is counted in the
+    phase that does it, usually ``app``.
+``app``
+    The rest of the call of the application.
+``app_iter``
+    Producing and closing the response body.
+
+Phases are exclusive: the time spent parsing forms within the application
+is counted in ``POST``, not in ``app`` (and the time spent buffering the
+body for it in ``copy_body``, not in ``POST``).
+
+Each request's :class:`RequestTimings` is ``environ['webob.timings']``;
+they are added up in a :class:`TimingStats`, which the middleware can also
+serve as JSON.
+"""
+
+import cProfile
+import io
+import json
+import pstats
+import random
+import threading
+import time
+
+__all__ = ["RequestTimings", "TimingMiddleware", "TimingStats"]
+
+ENVIRON_KEY = "webob.timings"
+
+
+class RequestTimings:
+    """
+    The phase timings of one request.
+
+    :attr:`phases` maps the name of each phase to a ``[count, wall, cpu]``
+    list (times in seconds); :attr:`wall` and :attr:`cpu` are the totals of
+    the request.  :attr:`profiler` is the :class:`cProfile.Profile` of the
+    request when it is sampled.
+    """
+
+    wall_clock = staticmethod(time.perf_counter)
+    cpu_clock = staticmethod(time.thread_time)
+
+    def __init__(self):
+        self.phases = {}
+        self.wall = 0.0
+        self.cpu = 0.0
+        self.profiler = None
+        # The time spent in nested phases, for each phase being timed
+        self._nested = []
+
+    def __repr__(self):
+        return "<%s %.6fs wall %.6fs CPU>" % (
+            self.__class__.__name__,
+            self.wall,
+            self.cpu,
+        )
+
+    def time(self, phase, func, *args):
+        """Call ``func(*args)``, timing it as ``phase``."""
+        nested = [0.0, 0.0]
+        self._nested.append(nested)
+        wall = self.wall_clock()
+        cpu = self.cpu_clock()
+        try:
+            return func(*args)
+        finally:
+            wall = self.wall_clock() - wall
+            cpu = self.cpu_clock() - cpu
+            self._nested.pop()
+
+            if self._nested:
+                outer = self._nested[-1]
+                outer[0] += wall
+                outer[1] += cpu
+            else:
+                self.wall += wall
+                self.cpu += cpu
+            self.add(phase, wall - nested[0], cpu - nested[1])
+
+    def add(self, phase, wall, cpu, count=1):
+        """Add time to ``phase``."""
+        entry = self.phases.get(phase)
+
+        if entry is None:
+            entry = self.phases[phase] = [0, 0.0, 0.0]
+        entry[0] += count
+        entry[1] += wall
+        entry[2] += cpu
+
+    def as_dict(self):
+        """The timings, as a JSON-compatible ``dict``."""
+
+        return {
+            "wall": self.wall,
+            "cpu": self.cpu,
+            "phases": _phases_dict(self.phases),
+        }
+
+
+class TimingStats:
+    """
+    The timings of many requests, added up.  It is thread-safe.
+
+    :attr:`profile` is a :class:`pstats.Stats` of the sampled requests (or
+    ``None``).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def __repr__(self):
+        return f"<{self.__class__.__name__} {self.requests} requests>"
+
+    def reset(self):
+        """Forget everything."""
+        with self._lock:
+            self.requests = 0
+            self.wall = 0.0
+            self.cpu = 0.0
+            self.phases = {}
+            self.profile = None
+
+    def add(self, timings):
+        """Add a :class:`RequestTimings`."""
+        with self._lock:
+            self.requests += 1
+            self.wall += timings.wall
+            self.cpu += timings.cpu
+
+            for phase, (count, wall, cpu) in timings.phases.items():
+                entry = self.phases.get(phase)
+
+                if entry is None:
+                    entry = self.phases[phase] = [0, 0.0, 0.0]
+                entry[0] += count
+                entry[1] += wall
+                entry[2] += cpu
+
+            if timings.profiler is not None:
+                if self.profile is None:
+                    self.profile = pstats.Stats(timings.profiler)
+                else:
+                    self.profile.add(timings.profiler)
+
+    def as_dict(self):
+        """The totals, as a JSON-compatible ``dict``."""
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "wall": self.wall,
+                "cpu": self.cpu,
+                "phases": _phases_dict(self.phases),
+            }
+
+    def format_profile(self, sort="cumulative", limit=50):
+        """The profile of the sampled requests, as text."""
+        output = io.StringIO()
+
+        with self._lock:
+            if self.profile is None:
+                return "No request was profiled\n"
+            self.profile.stream = output
+            self.profile.sort_stats(sort).print_stats(limit)
+
+        return output.getvalue()
+
+
+def _phases_dict(phases):
+    return {
+        phase: {"count": count, "wall": wall, "cpu": cpu}
+        for phase, (count, wall, cpu) in phases.items()
+    }
+
+
+class TimingMiddleware:
+    """
+    Middleware that times the phases of each request to ``app``.
+
+    The timings of each request are added to ``stats`` (a new
+    :class:`TimingStats` by default), and passed to ``callback(environ,
+    timings)`` when the response has been sent.  A ``profile_rate``
+    fraction of the requests (e.g. ``0.01`` for 1%) are also profiled with
+    :mod:`cProfile`.
+
+    When ``stats_path`` is set, a ``GET`` request for that path returns
+    the stats as JSON instead of calling ``app``.  Add ``?profile`` to the
+    URL to get the profile of the sampled requests as text, or ``?reset``
+    to reset the stats.
+    """
+
+    random = staticmethod(random.random)
+
+    def __init__(
+        self, app, stats=None, callback=None, profile_rate=0.0, stats_path=None
+    ):
+        self.app = app
+        self.stats = stats if stats is not None else TimingStats()
+        self.callback = callback
+        self.profile_rate = profile_rate
+        self.stats_path = stats_path
+
+    def __repr__(self):
+        return f"<{self.__class__.__name__} at {id(self)} wrapping {self.app!r}>"
+
+    def __call__(self, environ, start_response):
+        if self.stats_path is not None and environ.get("PATH_INFO") == self.stats_path:
+            return self._serve_stats(environ, start_response)
+        timings = environ[ENVIRON_KEY] = RequestTimings()
+
+        if self.profile_rate and self.random() < self.profile_rate:
+            timings.profiler = cProfile.Profile()
+        try:
+            app_iter = timings.time(
+                "app", _profiled, timings, self.app, environ, start_response
+            )
+        except BaseException:
+            self._finish(environ, timings)
+            raise
+
+        return _TimedAppIter(self, environ, timings, app_iter)
+
+    def _finish(self, environ, timings):
+        self.stats.add(timings)
+
+        if self.callback is not None:
+            self.callback(environ, timings)
+
+    def _serve_stats(self, environ, start_response):
+        query = environ.get("QUERY_STRING", "")
+
+        if query == "reset":
+            self.stats.reset()
+
+        if query == "profile":
+            content_type = "text/plain; charset=UTF-8"
+            body = self.stats.format_profile().encode("utf-8")
+        else:
+            content_type = "application/json"
+            body = json.dumps(self.stats.as_dict()).encode("utf-8")
+        start_response(
+            "200 OK",
+            [
+                ("Content-Type", content_type),
+                ("Content-Length", str(len(body))),
+                ("Cache-Control", "no-store"),
+            ],
+        )
+
+        return [body]
+
+
+def _profiled(timings, func, *args):
+    # Call func, under the profiler of the request if it has one
+    profiler = timings.profiler
+
+    if profiler is None:
+        return func(*args)
+    try:
+        profiler.enable()
+    except ValueError:
+        # Another profiler is active
+        return func(*args)
+    try:
+        return func(*args)
+    finally:
+        profiler.disable()
+
+
+_done = object()
+
+
+class _TimedAppIter:
+    # Times the iteration over app_iter, and records the timings once it
+    # is closed.
+
+    def __init__(self, middleware, environ, timings, app_iter):
+        self.middleware = middleware
+        self.environ = environ
+        self.timings = timings
+        self.app_iter = app_iter
+        self._finished = False
+
+    def __iter__(self):
+        timings = self.timings
+        iterator = timings.time("app_iter", _profiled, timings, iter, self.app_iter)
+
+        while True:
+            chunk = timings.time("app_iter", _profiled, timings, next, iterator, _done)
+
+            if chunk is _done:
+                break
+            yield chunk
+
+    def close(self):
+        if self._finished:
+            return
+        self._finished = True
+        close = getattr(self.app_iter, "close", None)
+        try:
+            if close is not None:
+                self.timings.time("app_iter", _profiled, self.timings, close)
+        finally:
+            self.middleware._finish(self.environ, self.timings)
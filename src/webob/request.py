@@ -1,10 +1,13 @@
 import binascii
+import bisect
+import codecs
 import io
+from json import JSONDecoder
 import mimetypes
 import os
 import re
+from stat import S_ISREG
 import sys
-import tempfile
 from urllib import parse as urlparse
 from urllib.parse import quote as url_quote, quote_plus, urlencode as url_encode
 import warnings
@@ -16,8 +19,8 @@ from webob.acceptparse import (
     accept_property,
 )
 from webob.cachecontrol import CacheControl, serialize_cache_control
-from webob.compat import cgi_FieldStorage
 from webob.cookies import RequestCookies
+from webob.counters import _count
 from webob.descriptors import (
     CHARSET_RE,
     SCHEME_RE,
@@ -38,15 +41,35 @@ from webob.descriptors import (
 from webob.etag import AnyETag, IfRange, NoETag, etag_property
 from webob.headers import EnvironHeaders
 from webob.multidict import GetDict, MultiDict, NestedMultiDict, NoVars
-from webob.util import bytes_, parse_qsl_text, text_, url_unquote
+from webob.util import (
+    _ContentDecoder,
+    _timed_phase,
+    bytes_,
+    json_dumps,
+    json_loads,
+    parse_qsl_text,
+    text_,
+    url_unquote,
+)
+
+__all__ = ["BaseRequest", "Request"]
 
-try:
-    import simplejson as json
-except ImportError:
-    import json
 
+_JSON_WS_RE = re.compile(r"[ \t\n\r]*")
+_JSON_NUMBER_CHARS = frozenset("0123456789+-.eE")
+_json_decoder = JSONDecoder()
 
-__all__ = ["BaseRequest", "Request"]
+
+class _ResponseClass:
+    # BaseRequest.ResponseClass is webob.response.Response, which imports
+    # this module; it is imported when it is first used.
+
+    def __get__(self, obj, objtype=None):
+        from webob.response import Response
+
+        BaseRequest.ResponseClass = Response
+
+        return Response
 
 
 class _NoDefault:
@@ -80,6 +103,22 @@ class BaseRequest:
     # in memory):
     request_body_tempfile_limit = 10 * 1024
 
+    # The size of the chunks read from the input when copying the body
+    request_body_chunk_size = 64 * 1024
+
+    # Decode the body of requests that have a Content-Encoding (gzip,
+    # deflate or br) when it is first read, with decode_content()
+    request_body_decode = False
+
+    # The limit on the decoded size of request bodies, against
+    # decompression bombs (None for no limit)
+    request_body_max_decoded_size = 64 * 1024 * 1024
+
+    # Used by ``json_body``: ``json_dumps`` must return UTF-8 encoded bytes
+    # and ``json_loads`` must accept UTF-8 encoded bytes or text.
+    json_dumps = staticmethod(json_dumps)
+    json_loads = staticmethod(json_loads)
+
     _charset = None
 
     def __init__(self, environ, **kw):
@@ -168,6 +207,8 @@ class BaseRequest:
         elif content_type != "multipart/form-data":
             return r
 
+        from webob.compat import cgi_FieldStorage
+
         fs_environ = self.environ.copy()
         fs_environ.setdefault("CONTENT_LENGTH", "0")
         fs_environ["QUERY_STRING"] = ""
@@ -201,6 +242,9 @@ class BaseRequest:
         (unlike setting req.body_file_raw).
         """
 
+        if self.request_body_decode:
+            self._decode_body()
+
         if not self.is_body_readable:
             return io.BytesIO()
 
@@ -251,6 +295,9 @@ class BaseRequest:
         If you access this value, CONTENT_LENGTH will also be updated.
         """
 
+        if self.request_body_decode:
+            self._decode_body()
+
         if not self.is_body_seekable:
             self.make_body_seekable()
 
@@ -727,18 +774,173 @@ class BaseRequest:
         self.body = b""
 
     def _json_body__get(self):
-        """Access the body of the request as JSON"""
+        """Access the body of the request as JSON
 
-        return json.loads(self.body.decode(self.charset))
+        The body is decoded with :attr:`json_loads`; UTF-8 bodies are handed
+        to it as bytes, without decoding them to text first.
+        """
+        body = self.body
+
+        if self.charset != "UTF-8":
+            body = body.decode(self.charset)
+
+        return self.json_loads(body)
 
     def _json_body__set(self, value):
-        self.body = json.dumps(value, separators=(",", ":")).encode(self.charset)
+        body = self.json_dumps(value)
+
+        if self.charset != "UTF-8":
+            body = body.decode("UTF-8").encode(self.charset)
+        self.body = body
 
     def _json_body__del(self):
         del self.body
 
     json = json_body = property(_json_body__get, _json_body__set, _json_body__del)
 
+    def iter_json_array(self, chunk_size=65536):
+        """
+        Iterate over the elements of a request body holding a JSON array.
+
+        The body is read from :attr:`body_file` in chunks of ``chunk_size``
+        bytes and each element is yielded as soon as it has been read, so
+        the body is never held in memory as a whole (only the element being
+        decoded is). A :exc:`ValueError` is raised if the body is not a
+        well-formed JSON array.
+        """
+        chunks = self._iter_body_chunks(chunk_size)
+        decoder = codecs.getincrementaldecoder(self.charset)()
+        decode = _json_decoder.raw_decode
+        buf = ""
+        pos = 0
+        eof = False
+        # 0: before "[", 1: after "[", 2: after ",", 3: after a value, 4: after "]"
+        state = 0
+
+        while True:
+            # The length of the rest of the buffer needed before going on
+            need = 0
+            pos = _JSON_WS_RE.match(buf, pos).end()
+
+            if pos < len(buf):
+                char = buf[pos]
+
+                if state in (1, 2) and char != "]":
+                    try:
+                        value, end = decode(buf, pos)
+                    except ValueError:
+                        if eof:
+                            raise
+                    else:
+                        # A value running up to the end of the buffer (or
+                        # followed by a digit, ".", "e" etc.) may be a number
+                        # that continues in the next chunk
+                        if eof or (
+                            end < len(buf) and buf[end] not in _JSON_NUMBER_CHARS
+                        ):
+                            yield value
+                            pos = end
+                            state = 3
+
+                            continue
+                    # The value is incomplete: only try again once the rest
+                    # of the buffer has doubled, so that decoding a value
+                    # that spans many chunks takes linear time
+                    need = 2 * (len(buf) - pos)
+                else:
+                    if state == 0 and char == "[":
+                        state = 1
+                    elif state in (1, 3) and char == "]":
+                        state = 4
+                    elif state == 3 and char == ",":
+                        state = 2
+                    elif state == 0:
+                        raise ValueError("Expected a JSON array")
+                    elif state == 4:
+                        raise ValueError("Extra data after JSON array")
+                    else:
+                        raise ValueError(f"Unexpected {char!r} in JSON array")
+                    pos += 1
+
+                    continue
+            elif eof:
+                if state == 4:
+                    return
+                raise ValueError("Unexpected end of JSON array")
+
+            # Read more of the body, dropping what has been consumed already
+            parts = [buf[pos:]]
+            size = len(parts[0])
+
+            while not eof:
+                data = next(chunks, None)
+
+                if data is None:
+                    eof = True
+                    text = decoder.decode(b"", True)
+                else:
+                    text = decoder.decode(data)
+                parts.append(text)
+                size += len(text)
+
+                if size >= need and size > len(parts[0]):
+                    break
+            buf = "".join(parts)
+            pos = 0
+
+    def iter_json_lines(self, chunk_size=65536):
+        """
+        Iterate over the values of a newline delimited JSON (NDJSON) request
+        body.
+
+        The body is read from :attr:`body_file` in chunks of ``chunk_size``
+        bytes, and every non-blank line is decoded with :attr:`json_loads`
+        as soon as it is complete.
+        """
+        charset = self.charset
+        pending = []
+
+        def decode(line):
+            if charset != "UTF-8":
+                line = line.decode(charset)
+
+            return self.json_loads(line)
+
+        for chunk in self._iter_body_chunks(chunk_size):
+            start = 0
+
+            while True:
+                end = chunk.find(b"\n", start)
+
+                if end == -1:
+                    pending.append(chunk[start:])
+
+                    break
+                pending.append(chunk[start:end])
+                line = b"".join(pending)
+                pending = []
+
+                if line.strip():
+                    yield decode(line)
+                start = end + 1
+
+        line = b"".join(pending)
+
+        if line.strip():
+            yield decode(line)
+
+    def _iter_body_chunks(self, chunk_size):
+        if self.is_body_seekable:
+            self.body_file_raw.seek(0)
+        body_file = self.body_file
+
+        while True:
+            data = body_file.read(chunk_size)
+
+            if not data:
+                break
+            yield data
+
     def _text__get(self):
         """
         Get/set the text value of the body
@@ -783,7 +985,10 @@ class BaseRequest:
             vars, body_file = env["webob._parsed_post_vars"]
 
             if body_file is self.body_file_raw:
+                _count("post_cache_hits")
+
                 return vars
+            _count("post_reparses")
         content_type = self.content_type
 
         if (self.method != "POST" and not content_type) or content_type not in (
@@ -798,6 +1003,15 @@ class BaseRequest:
             )
         self._check_charset()
 
+        _count("post_parses")
+
+        return _timed_phase(env, "POST", self._parse_post)
+
+    def _parse_post(self):
+        # The cgi module is slow to import, and only needed for forms
+        from webob.compat import cgi_FieldStorage
+
+        env = self.environ
         self.make_body_seekable()
         self.body_file_raw.seek(0)
 
@@ -832,8 +1046,11 @@ class BaseRequest:
             vars, qs = env["webob._parsed_query_vars"]
 
             if qs == source:
+                _count("get_cache_hits")
+
                 return vars
 
+        _count("get_parses")
         data = []
 
         if source:
@@ -843,7 +1060,8 @@ class BaseRequest:
             data = parse_qsl_text(source)
             # d = lambda b: b.decode('utf8')
             # data = [(d(k), d(v)) for k,v in data]
-        vars = GetDict(data, env)
+        # The query string is parsed (lazily) as GetDict reads it
+        vars = _timed_phase(env, "GET", GetDict, data, env)
         env["webob._parsed_query_vars"] = (vars, source)
 
         return vars
@@ -884,12 +1102,29 @@ class BaseRequest:
         """
         Copy the request and environment object.
 
-        This only does a shallow copy, except of wsgi.input
+        This only does a shallow copy, except of wsgi.input: the body is
+        shared by the requests (each one reading it at its own position)
+        when it is in memory or in a file on disk, until one of them writes
+        to it.  Other bodies are copied.
         """
         self.make_body_seekable()
         env = self.environ.copy()
         new_req = self.__class__(env)
-        new_req.copy_body()
+        raw = self.body_file_raw
+
+        if type(raw) is io.BytesIO:
+            # BytesIO objects made from the same bytes share them until one
+            # of them is written to
+            new_req.body_file_raw = io.BytesIO(raw.getvalue())
+            _count("shared_bodies")
+        elif isinstance(raw, _SharedFile) or _is_shareable_file(raw):
+            if not isinstance(raw, _SharedFile):
+                # Writes to the original file would show in the copy
+                raw = self.body_file_raw = _SharedFile(raw, self.content_length)
+            new_req.body_file_raw = raw.share()
+            _count("shared_bodies")
+        else:
+            new_req.copy_body()
 
         return new_req
 
@@ -951,6 +1186,9 @@ class BaseRequest:
         ``self.request_body_tempfile_limit``
         """
 
+        if self.request_body_decode:
+            self._decode_body()
+
         if self.is_body_seekable:
             self.body_file_raw.seek(0)
         else:
@@ -961,10 +1199,14 @@ class BaseRequest:
         Copies the body, in cases where it might be shared with another request
         object and that is not desired.
 
-        This copies the body either into a BytesIO object (through setting
-        req.body) or a temporary file.
+        This copies the body either into a BytesIO object or a temporary file
+        (once it grows beyond ``self.request_body_tempfile_limit``). The body
+        is read in chunks of ``self.request_body_chunk_size`` bytes, using
+        ``readinto`` on a reused buffer where the input supports it.
         """
+        _timed_phase(self.environ, "copy_body", self._copy_body)
 
+    def _copy_body(self):
         if self.is_body_readable:
             # Before we copy, if we can, rewind the body file
 
@@ -972,82 +1214,166 @@ class BaseRequest:
                 self.body_file_raw.seek(0)
 
             tempfile_limit = self.request_body_tempfile_limit
-            todo = self.content_length if self.content_length is not None else 65535
+            chunk_size = self.request_body_chunk_size
+            content_length = self.content_length
+            todo = content_length if content_length is not None else chunk_size
 
-            newbody = b""
+            newbody = io.BytesIO()
             fileobj = None
             input = self.body_file
+            readinto = getattr(input, "readinto", None)
 
-            while todo > 0:
-                data = input.read(min(todo, 65535))
+            if readinto is not None:
+                buffer = memoryview(bytearray(min(todo, chunk_size)))
 
-                if not data and self.content_length is None:
-                    # We attempted to read more data, but got none, break.
-                    # This can happen if for instance we are reading as much as
-                    # we can because we don't have a Content-Length...
+            try:
+                while todo > 0:
+                    size = min(todo, chunk_size)
 
-                    break
-                elif not data:
-                    # We have a Content-Length and we attempted to read, but
-                    # there was nothing more to read. Oh the humanity! This
-                    # should rarely if never happen because self.body_file
-                    # should be a LimitedLengthFile which should already have
-                    # raised if there was less data than expected.
-                    raise DisconnectionError(
-                        "Client disconnected (%s more bytes were expected)" % todo
-                    )
+                    if readinto is not None:
+                        data = buffer[: readinto(buffer[:size])]
+                    else:
+                        data = input.read(size)
+
+                    if not data and content_length is None:
+                        # We attempted to read more data, but got none, break.
+                        # This can happen if for instance we are reading as much as
+                        # we can because we don't have a Content-Length...
+
+                        break
+                    elif not data:
+                        # We have a Content-Length and we attempted to read, but
+                        # there was nothing more to read. Oh the humanity! This
+                        # should rarely if never happen because self.body_file
+                        # should be a LimitedLengthFile which should already have
+                        # raised if there was less data than expected.
+                        raise DisconnectionError(
+                            "Client disconnected (%s more bytes were expected)" % todo
+                        )
+
+                    if fileobj:
+                        fileobj.write(data)
+                    else:
+                        newbody.write(data)
 
-                if fileobj:
-                    fileobj.write(data)
-                else:
-                    newbody += data
+                        # When we have enough data that we need a tempfile, let's
+                        # create one, then drop the in-memory copy we were using
 
-                    # When we have enough data that we need a tempfile, let's
-                    # create one, then clear the temporary variable we were
-                    # using
+                        if newbody.tell() > tempfile_limit:
+                            fileobj = self.make_tempfile()
+                            fileobj.write(newbody.getbuffer())
+                            newbody = None
 
-                    if len(newbody) > tempfile_limit:
-                        fileobj = self.make_tempfile()
-                        fileobj.write(newbody)
-                        newbody = b""
+                    # Only decrement todo if Content-Length is set
 
-                # Only decrement todo if Content-Length is set
+                    if content_length is not None:
+                        todo -= len(data)
+            except BaseException:
+                # Do not leave the tempfile to the garbage collector
+
+                if fileobj:
+                    fileobj.close()
 
-                if self.content_length is not None:
-                    todo -= len(data)
+                raise
 
             if fileobj:
                 # We apparently had enough data to need a file
+                body_file = fileobj
+            else:
+                # No file created, the BytesIO is the new body (like setting
+                # req.body, but without copying the data again)
+                body_file = newbody
 
-                # Set the Content-Length to the amount of data that was just
-                # written.
-                self.content_length = fileobj.tell()
+            # Set the Content-Length to the amount of data that was just
+            # written.
+            self.content_length = length = body_file.tell()
+            _count("copy_body")
+            _count("copy_body_bytes", length)
 
-                # Seek it back to the beginning
-                fileobj.seek(0)
+            # Seek it back to the beginning
+            body_file.seek(0)
 
-                self.body_file_raw = fileobj
+            self.body_file_raw = body_file
 
-                # Allow it to be seeked in the future, so we don't need to copy
-                # for things like .body
-                self.is_body_seekable = True
+            # Allow it to be seeked in the future, so we don't need to copy
+            # for things like .body
+            self.is_body_seekable = True
 
+            if fileobj:
                 # Not strictly required since Content-Length is set
                 self.is_body_readable = True
-            else:
-                # No file created, set the body and let it deal with creating
-                # Content-Length and other vars.
-                self.body = newbody
         else:
             # Always leave the request with a valid body, and this is pretty
             # cheap.
             self.body = b""
 
+    def decode_content(self, max_size=None):
+        """
+        Decode the body of the request according to its
+        ``Content-Encoding`` (``gzip``, ``deflate``, ``br`` with the
+        ``brotli`` package, or several of them), so that :attr:`body_file`,
+        :attr:`body`, :attr:`json_body` and :attr:`POST` give the decoded
+        body.
+
+        The body is decoded as it is read.  The ``Content-Encoding`` header
+        is removed, and so is ``Content-Length`` as the decoded size is
+        unknown until the body has been read (:meth:`make_body_seekable`
+        sets it again).  Reading raises
+        :class:`~webob.exc.HTTPRequestEntityTooLarge` when the decoded body
+        is larger than ``max_size`` (by default
+        ``self.request_body_max_decoded_size``), and
+        :class:`~webob.exc.HTTPBadRequest` when it is invalid.  An unknown
+        encoding raises :class:`~webob.exc.HTTPUnsupportedMediaType` right
+        away.
+
+        Setting ``request_body_decode = True`` on the request class (or
+        passing it to the request) makes this happen when the body is first
+        read.
+        """
+        env = self.environ
+        encodings = [
+            encoding.strip()
+            for encoding in env.get("HTTP_CONTENT_ENCODING", "").split(",")
+        ]
+        encodings = [
+            encoding
+            for encoding in encodings
+            if encoding and encoding.lower() != "identity"
+        ]
+        try:
+            # The last encoding was applied last
+            decoders = [_ContentDecoder(encoding) for encoding in reversed(encodings)]
+        except ValueError as e:
+            from webob.exc import HTTPUnsupportedMediaType
+
+            raise HTTPUnsupportedMediaType(str(e)) from None
+        env.pop("HTTP_CONTENT_ENCODING", None)
+
+        if not decoders or not self.is_body_readable:
+            return
+
+        if max_size is None:
+            max_size = self.request_body_max_decoded_size
+        body_file = self.body_file
+
+        for decoder in decoders:
+            body_file = _DecodedFile(
+                body_file, decoder, max_size, self.request_body_chunk_size
+            )
+        self.body_file = body_file
+
+    def _decode_body(self):
+        if "HTTP_CONTENT_ENCODING" in self.environ:
+            self.decode_content()
+
     def make_tempfile(self):
         """
         Create a tempfile to store big request body.
         This API is not stable yet. A 'size' argument might be added.
         """
+        import tempfile
+
+        _count("tempfile_spills")
 
         return tempfile.TemporaryFile()
 
@@ -1104,7 +1430,10 @@ class BaseRequest:
         cache_header, cache_obj = env.get("webob._cache_control", (None, None))
 
         if cache_obj is not None and cache_header == value:
+            _count("cache_control_cache_hits")
+
             return cache_obj
+        _count("cache_control_parses")
         cache_obj = CacheControl.parse(
             value, updates_to=self._update_cache_control, type="request"
         )
@@ -1137,7 +1466,12 @@ class BaseRequest:
             del env["webob._cache_control"]
 
     def _update_cache_control(self, prop_dict):
-        self.environ["HTTP_CACHE_CONTROL"] = serialize_cache_control(prop_dict)
+        value = serialize_cache_control(prop_dict)
+        self.environ["HTTP_CACHE_CONTROL"] = value
+
+        if isinstance(prop_dict, CacheControl):
+            # The object that was changed still matches the new header value
+            self.environ["webob._cache_control"] = (value, prop_dict)
 
     cache_control = property(
         _cache_control__get,
@@ -1362,7 +1696,7 @@ class BaseRequest:
             return (captured[0], captured[1], app_iter)
 
     # Will be filled in later:
-    ResponseClass = None
+    ResponseClass = _ResponseClass()
 
     def send(self, application=None, catch_exc_info=False):
         """
@@ -1470,6 +1804,82 @@ class BaseRequest:
 
         return obj
 
+    @classmethod
+    def blank_factory(cls, environ=None, base_url=None, headers=None, **kw):
+        """
+        Return a function that creates blank requests faster than
+        :meth:`blank` when many of them share the same settings::
+
+            make_request = Request.blank_factory(
+                base_url='https://example.com/app',
+                headers={'Accept': 'application/json'},
+            )
+            req = make_request('/users/1?fields=name')
+
+        The returned function takes the ``path`` (urlencoded, with an
+        optional query string), and optionally ``POST``, ``headers`` and
+        keywords, like :meth:`blank`; the ``environ``, ``base_url``,
+        ``headers`` and keywords (including ``POST``) given here apply to
+        every request.  The environ is prepared once, and copied for each
+        request.  A ``path`` that is a full URL is handled by :meth:`blank`.
+        """
+        template_req = cls.blank(
+            "/", environ=environ, base_url=base_url, headers=headers, **kw
+        )
+        # A body given here (e.g. with POST) is given to every request
+        body = template_req.body
+        template = template_req.environ
+        shared_headers = dict(headers or {})
+        content_type = template.get("CONTENT_TYPE")
+        adhoc_attrs = template.get("webob.adhoc_attrs")
+
+        for key in list(template):
+            if key.startswith("webob._"):
+                # Parsing caches belong to one request
+                del template[key]
+
+        def make_request(path, POST=None, headers=None, **request_kw):
+            if SCHEME_RE.search(path):
+                blank_kw = dict(kw, **request_kw)
+
+                if POST is not None:
+                    blank_kw["POST"] = POST
+
+                return cls.blank(
+                    path,
+                    environ=environ,
+                    base_url=base_url,
+                    headers=dict(shared_headers, **(headers or {})),
+                    **blank_kw,
+                )
+            env = template.copy()
+            env["wsgi.input"] = io.BytesIO(body)
+
+            if adhoc_attrs is not None:
+                env["webob.adhoc_attrs"] = adhoc_attrs.copy()
+
+            if "?" in path:
+                path, env["QUERY_STRING"] = path.split("?", 1)
+
+            if "%" in path or not path.isascii():
+                path = url_unquote(path)
+            env["PATH_INFO"] = path
+
+            if POST is not None:
+                post_content_type = request_kw.get("content_type", content_type)
+
+                if headers and "Content-Type" in headers:
+                    post_content_type = headers["Content-Type"]
+                environ_add_POST(env, POST, content_type=post_content_type)
+            req = cls(env, **request_kw) if request_kw else cls(env)
+
+            if headers is not None:
+                req.headers.update(headers)
+
+            return req
+
+        return make_request
+
 
 class AdhocAttrMixin:
     _setattr_stacklevel = 3
@@ -1558,6 +1968,15 @@ def environ_add_POST(env, data, content_type=None):
 
     if env["REQUEST_METHOD"] not in ("POST", "PUT"):
         env["REQUEST_METHOD"] = "POST"
+
+    if isinstance(data, MultipartEncoder):
+        # Buffered, as the form parser reads the body line by line
+        env["wsgi.input"] = io.BufferedReader(data)
+        env["webob.is_body_seekable"] = data.seekable()
+        env["CONTENT_LENGTH"] = str(data.length)
+        env["CONTENT_TYPE"] = data.content_type
+
+        return
     has_files = False
 
     if hasattr(data, "items"):
@@ -1642,6 +2061,262 @@ class LimitedLengthFile(io.RawIOBase):
         return sz
 
 
+class _DecodedFile(io.RawIOBase):
+    # The decoded data of a file, read with a _ContentDecoder
+
+    def __init__(self, file, decoder, max_size=None, chunk_size=64 * 1024):
+        self.file = file
+        self.decoder = decoder
+        self.max_size = max_size
+        self.chunk_size = chunk_size
+        self.size = 0
+
+    def __repr__(self):
+        return f"<{self.__class__.__name__}({self.file!r}, {self.decoder.encoding!r})>"
+
+    @staticmethod
+    def readable():
+        return True
+
+    def readinto(self, buffer):
+        decoder = self.decoder
+
+        if decoder is None or not len(buffer):
+            return 0
+        try:
+            while True:
+                if decoder.unconsumed:
+                    data = decoder.decode(b"", len(buffer))
+                else:
+                    chunk = self.file.read(self.chunk_size)
+
+                    if not chunk:
+                        decoder.flush()
+                        self.decoder = None
+
+                        return 0
+                    data = decoder.decode(chunk, len(buffer))
+
+                if data:
+                    break
+        except ValueError as e:
+            from webob.exc import HTTPBadRequest
+
+            raise HTTPBadRequest(str(e)) from None
+        size = len(data)
+        self.size += size
+
+        if self.max_size is not None and self.size > self.max_size:
+            from webob.exc import HTTPRequestEntityTooLarge
+
+            raise HTTPRequestEntityTooLarge(
+                "The decoded request body is larger than %d bytes" % self.max_size
+            )
+        buffer[:size] = data
+
+        return size
+
+    def close(self):
+        if not self.closed:
+            self.file.close()
+        io.RawIOBase.close(self)
+
+
+def _is_shareable_file(fileobj):
+    # Whether fileobj is a binary file on disk that _SharedFile can read
+    if not hasattr(os, "pread") or isinstance(fileobj, io.TextIOBase):
+        return False
+    try:
+        return S_ISREG(os.fstat(fileobj.fileno()).st_mode)
+    except (AttributeError, OSError, ValueError):
+        return False
+
+
+class _SharedFile(io.RawIOBase):
+    # The first ``size`` bytes of a file on disk, shared with other
+    # _SharedFile objects.  Each one has its own position (reading with
+    # os.pread on a duplicate of the file descriptor), and copies the data
+    # to a temporary file of its own when it is first written to.  Small
+    # reads and readline() are served from the last block read, so that
+    # parsing the body line by line does not cost a system call per byte.
+
+    block_size = 1 << 16
+
+    def __init__(self, fileobj, size=None):
+        self._fd = os.dup(fileobj.fileno())
+        # The file we were made from, closed with us
+        self._source = None if isinstance(fileobj, _SharedFile) else fileobj
+
+        if size is None:
+            size = os.fstat(self._fd).st_size
+        self._size = size
+        self._pos = 0
+        # The last block read, and where it starts
+        self._block = b""
+        self._block_start = 0
+        # The private copy, once written to
+        self._file = None
+
+    def __repr__(self):
+        return f"<{self.__class__.__name__} {self._size} bytes>"
+
+    def share(self):
+        """Return another _SharedFile of the same data"""
+
+        if self._file is not None:
+            # Share our copy from now on
+            fileobj = self._file
+            self._pos = fileobj.tell()
+            self._size = fileobj.seek(0, io.SEEK_END)
+            self._fd = os.dup(fileobj.fileno())
+            self._block = b""
+            self._file = None
+            fileobj.close()
+
+        return _SharedFile(self, self._size)
+
+    def fileno(self):
+        if self._file is not None:
+            return self._file.fileno()
+
+        return self._fd
+
+    @staticmethod
+    def readable():
+        return True
+
+    @staticmethod
+    def seekable():
+        return True
+
+    @staticmethod
+    def writable():
+        return True
+
+    def tell(self):
+        if self._file is not None:
+            return self._file.tell()
+
+        return self._pos
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        if self._file is not None:
+            return self._file.seek(offset, whence)
+
+        if whence == io.SEEK_CUR:
+            offset += self._pos
+        elif whence == io.SEEK_END:
+            offset += self._size
+        elif whence != io.SEEK_SET:
+            raise ValueError("Invalid whence (%r)" % whence)
+
+        if offset < 0:
+            raise ValueError("Negative seek position %d" % offset)
+        self._pos = offset
+
+        return offset
+
+    def readinto(self, buffer):
+        if self._file is not None:
+            return self._file.readinto(buffer)
+        size = min(len(buffer), self._size - self._pos)
+
+        if size <= 0:
+            return 0
+
+        if size < self.block_size:
+            offset = self._fill(size)
+            data = self._block[offset : offset + size]
+        else:
+            data = os.pread(self._fd, size, self._pos)
+        size = len(data)
+        buffer[:size] = data
+        self._pos += size
+
+        return size
+
+    def readline(self, size=-1):
+        if self._file is not None:
+            return self._file.readline(size)
+        left = self._size - self._pos
+
+        if size is None or size < 0 or size > left:
+            size = left
+        chunks = []
+
+        while size > 0:
+            offset = self._fill()
+            block = self._block
+            end = min(len(block), offset + size)
+
+            if offset >= end:
+                # The file is shorter than expected
+                break
+            newline = block.find(b"\n", offset, end)
+
+            if newline >= 0:
+                end = newline + 1
+            chunks.append(block[offset:end])
+            self._pos += end - offset
+            size -= end - offset
+
+            if newline >= 0:
+                break
+
+        return b"".join(chunks)
+
+    def _fill(self, size=1):
+        # Make sure the current block holds the next size bytes (as far as
+        # there are any), and return the offset of the position in it
+        offset = self._pos - self._block_start
+
+        if offset < 0 or offset + size > len(self._block):
+            size = min(self.block_size, self._size - self._pos)
+            self._block = os.pread(self._fd, size, self._pos) if size > 0 else b""
+            self._block_start = self._pos
+            offset = 0
+
+        return offset
+
+    def write(self, data):
+        return self._private().write(data)
+
+    def truncate(self, size=None):
+        return self._private().truncate(size)
+
+    def _private(self):
+        # Copy the data to a file of our own
+        if self._file is None:
+            import tempfile
+
+            fileobj = tempfile.TemporaryFile()
+            position = 0
+
+            while position < self._size:
+                data = os.pread(self._fd, min(self._size - position, 1 << 16), position)
+
+                if not data:
+                    break
+                fileobj.write(data)
+                position += len(data)
+            fileobj.seek(self._pos)
+            os.close(self._fd)
+            self._file = fileobj
+
+        return self._file
+
+    def close(self):
+        if not self.closed:
+            if self._file is not None:
+                self._file.close()
+            else:
+                os.close(self._fd)
+
+            if self._source is not None:
+                self._source.close()
+        io.RawIOBase.close(self)
+
+
 def _get_multipart_boundary(ctype):
     m = re.search(r"boundary=([^ ]+)", ctype, re.I)
 
@@ -1653,71 +2328,253 @@ def _encode_multipart(vars, content_type, fout=None):
     """Encode a multipart request body into a string"""
     f = fout or io.BytesIO()
     w = f.write
-
-    def wt(t):
-        w(t.encode("utf8"))
-
-    CRLF = b"\r\n"
     boundary = _get_multipart_boundary(content_type)
 
     if not boundary:
-        boundary = text_(binascii.hexlify(os.urandom(10)))
+        boundary = _new_multipart_boundary()
         content_type += "; boundary=%s" % boundary
 
+    for part in _multipart_parts(vars, boundary):
+        if not isinstance(part, bytes):
+            part = _read_file_part(part)
+        w(part)
+
+    if fout:
+        return content_type, fout
+    else:
+        return content_type, f.getvalue()
+
+
+def _new_multipart_boundary():
+    return text_(binascii.hexlify(os.urandom(10)))
+
+
+def _multipart_parts(vars, boundary):
+    # Yields the parts of the body, as bytes or as the file objects of
+    # uploaded files
+    CRLF = b"\r\n"
+
     for name, value in vars:
-        w(b"--")
-        wt(boundary)
-        w(CRLF)
-        wt("Content-Disposition: form-data")
+        header = ["--%s\r\nContent-Disposition: form-data" % boundary]
 
         if name is not None:
-            wt('; name="%s"' % name)
+            header.append('; name="%s"' % name)
         filename = None
 
         if getattr(value, "filename", None):
             filename = value.filename
         elif isinstance(value, (list, tuple)):
             filename, value = value
-
-            if hasattr(value, "read"):
-                value = value.read()
+        is_file = hasattr(value, "read")
 
         if filename is not None:
-            wt('; filename="%s"' % filename)
+            header.append('; filename="%s"' % filename)
             mime_type = mimetypes.guess_type(filename)[0]
         else:
             mime_type = None
 
-        w(CRLF)
+        header.append("\r\n")
 
         # TODO: should handle value.disposition_options
 
-        if getattr(value, "type", None):
-            wt("Content-type: %s" % value.type)
+        if not is_file and getattr(value, "type", None):
+            header.append("Content-type: %s" % value.type)
 
             if value.type_options:
                 for ct_name, ct_value in sorted(value.type_options.items()):
-                    wt(f'; {ct_name}="{ct_value}"')
-            w(CRLF)
+                    header.append(f'; {ct_name}="{ct_value}"')
+            header.append("\r\n")
         elif mime_type:
-            wt("Content-type: %s" % mime_type)
-            w(CRLF)
-        w(CRLF)
+            header.append("Content-type: %s\r\n" % mime_type)
+        header.append("\r\n")
+        yield "".join(header).encode("utf8")
+
+        if is_file:
+            yield value
+            yield CRLF
+
+            continue
 
         if hasattr(value, "value"):
             value = value.value
 
-        if isinstance(value, bytes):
-            w(value)
-        else:
-            wt(value)
-        w(CRLF)
-    wt("--%s--" % boundary)
+        if isinstance(value, str):
+            value = value.encode("utf8")
+        yield value
+        yield CRLF
+    yield ("--%s--" % boundary).encode("utf8")
+
+
+class MultipartEncoder(io.RawIOBase):
+    """
+    A ``multipart/form-data`` request body that is produced while it is
+    read, so that uploaded files are not loaded in memory.
+
+    ``fields`` are like the ``POST`` argument of :meth:`BaseRequest.blank`:
+    a dictionary or a list of ``(name, value)`` pairs, where a file is a
+    ``(filename, file)`` value.  Files that are on disk (that have a file
+    descriptor) are read in chunks as the body is read, from their current
+    position to their end; other files are read right away.  The encoder
+    takes over the files, and closes them when it is closed.
+
+    :attr:`content_type` (which includes the ``boundary``) and
+    :attr:`length` are known in advance.  Give the encoder as the ``POST``
+    of :meth:`BaseRequest.blank`, or as the ``wsgi.input`` of a request to
+    send with :class:`webob.client.SendRequest`::
+
+        req = Request.blank('/upload', POST=MultipartEncoder(
+            {'description': 'A big file', 'data': ('big.bin', open(path, 'rb'))}
+        ))
+    """
+
+    def __init__(self, fields, boundary=None):
+        if boundary is None:
+            boundary = _new_multipart_boundary()
+        self.boundary = boundary
+        self.content_type = "multipart/form-data; boundary=%s" % boundary
+
+        if hasattr(fields, "items"):
+            fields = list(fields.items())
+        # (bytes or file, start, size) for each part of the body
+        self._parts = parts = []
+        self._files = []
+        pending = bytearray()
+
+        for part in _multipart_parts(fields, boundary):
+            if isinstance(part, bytes):
+                pending += part
+
+                continue
+            self._files.append(part)
+            size = _remaining_file_size(part)
+
+            if size is None:
+                pending += _read_file_part(part)
+
+                continue
+
+            if pending:
+                parts.append((bytes(pending), 0, len(pending)))
+                pending.clear()
+            parts.append((part, part.tell(), size))
+        parts.append((bytes(pending), 0, len(pending)))
+        # Where each part starts in the body
+        self._offsets = offsets = []
+        length = 0
+
+        for data, start, size in parts:
+            offsets.append(length)
+            length += size
+        self.length = length
+        self._index = 0
+        self._part_pos = 0
+        self._pos = 0
+        self._file_pos = None
 
-    if fout:
-        return content_type, fout
-    else:
-        return content_type, f.getvalue()
+    def __repr__(self):
+        return f"<{self.__class__.__name__} {self.length} bytes>"
+
+    def __len__(self):
+        return self.length
+
+    @staticmethod
+    def readable():
+        return True
+
+    def seekable(self):
+        return all(
+            isinstance(data, bytes) or data.seekable() for data, _, _ in self._parts
+        )
+
+    def tell(self):
+        return self._pos
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        if whence == io.SEEK_CUR:
+            offset += self._pos
+        elif whence == io.SEEK_END:
+            offset += self.length
+        elif whence != io.SEEK_SET:
+            raise ValueError("Invalid whence (%r)" % whence)
+
+        if offset < 0:
+            raise ValueError("Negative seek position %d" % offset)
+        self._pos = offset
+        self._index = max(bisect.bisect_right(self._offsets, offset) - 1, 0)
+        self._part_pos = offset - self._offsets[self._index]
+        self._file_pos = None
+
+        return offset
+
+    def readinto(self, buffer):
+        parts = self._parts
+        total = 0
+
+        with memoryview(buffer) as view:
+            while total < len(view) and self._index < len(parts):
+                data, start, size = parts[self._index]
+                remaining = size - self._part_pos
+
+                if remaining <= 0:
+                    self._index += 1
+                    self._part_pos = 0
+
+                    continue
+                n = min(len(view) - total, remaining)
+
+                if isinstance(data, bytes):
+                    view[total : total + n] = data[self._part_pos : self._part_pos + n]
+                else:
+                    position = start + self._part_pos
+
+                    if self._file_pos != position:
+                        data.seek(position)
+                    n = data.readinto(view[total : total + n])
+
+                    if not n:
+                        raise OSError(
+                            "The file of a multipart body ended %d bytes early"
+                            % remaining
+                        )
+                    self._file_pos = position + n
+                self._part_pos += n
+                self._pos += n
+                total += n
+
+        return total
+
+    def close(self):
+        if not self.closed:
+            for fileobj in self._files:
+                fileobj.close()
+        io.RawIOBase.close(self)
+
+
+def _read_file_part(fileobj):
+    data = fileobj.read()
+
+    if isinstance(data, str):
+        data = data.encode("utf8")
+
+    return data
+
+
+def _remaining_file_size(fileobj):
+    # The number of bytes left in a binary file on disk, or None for other
+    # files
+    if isinstance(fileobj, io.TextIOBase):
+        return None
+    try:
+        stat = os.fstat(fileobj.fileno())
+        position = fileobj.tell()
+    except (AttributeError, OSError, ValueError):
+        return None
+
+    if not S_ISREG(stat.st_mode):
+        # A pipe or a socket, whose size is unknown
+        return None
+
+    return max(stat.st_size - position, 0)
 
 
 def detect_charset(ctype):
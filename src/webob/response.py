@@ -1,5 +1,7 @@
 from base64 import b64encode
 from datetime import datetime, timedelta
+from functools import lru_cache
+import hashlib
 from hashlib import md5
 import re
 import struct
@@ -35,19 +37,16 @@ from webob.descriptors import (
 from webob.headers import ResponseHeaders
 from webob.request import BaseRequest
 from webob.util import (
+    _ContentDecoder,
     bytes_,
+    json_dumps,
+    json_loads,
     status_generic_reasons,
     status_reasons,
     text_,
     warn_deprecation,
 )
 
-try:
-    import simplejson as json
-except ImportError:
-    import json
-
-
 __all__ = ["Response"]
 
 _PARAM_RE = re.compile(r'([a-z0-9]+)=(?:"([^"]*)"|([a-z0-9_.-]*))', re.I)
@@ -91,6 +90,17 @@ class Response:
 
     :vartype ~Response.app_iter: iterable
 
+    :cvar ~Response.body_factory: A callable taking no arguments that returns
+        the body (bytes) or an ``app_iter``.  It is only called when the body
+        is actually needed, so nothing is rendered for ``HEAD`` requests or
+        ``304 Not Modified`` responses; validators such as ``etag``,
+        ``last_modified`` and (when known) ``content_length`` should be given
+        as keyword arguments.  Unless ``conditional_response`` is given, a
+        response with a ``body_factory`` is a conditional response.  This
+        argument is mutually exclusive with ``body`` and ``app_iter``.
+
+    :vartype ~Response.body_factory: callable
+
     :cvar ~Response.content_type: Sets the ``Content-Type`` header. If no
         ``content_type`` is provided, and there is no ``headerlist``, the
         ``default_content_type`` will be automatically set. If ``headerlist``
@@ -146,6 +156,24 @@ class Response:
     * ``default_body_encoding`` is set to 'UTF-8' by default. It exists to
       allow users to get/set the ``Response`` object using ``.text``, even if
       no ``charset`` has been set for the ``Content-Type``.
+
+    * ``default_etag_algorithm`` is the :mod:`hashlib` algorithm used by
+      :meth:`~Response.hash_etag`. It is ``blake2b`` (with a 16 byte digest)
+      by default.
+
+    * ``write_chunk_size`` is ``None`` by default, and :meth:`write` appends
+      what is written to a list ``app_iter``. When it is set to a number of
+      bytes, writes are collected in a single :class:`BufferedAppIter`
+      instead, which is sent to the server in chunks of that size; this is
+      much cheaper for code that writes many small pieces. It may also be
+      given as a keyword argument.
+
+    * ``json_dumps`` and ``json_loads`` are used by ``json_body``. They are
+      :func:`webob.util.json_dumps` and :func:`webob.util.json_loads` by
+      default; ``json_dumps`` must return UTF-8 encoded bytes and
+      ``json_loads`` must accept them. Another JSON library that works with
+      bytes directly may be plugged in, e.g.
+      ``json_dumps = staticmethod(orjson.dumps)``.
     """
 
     default_content_type = "text/html"
@@ -153,6 +181,10 @@ class Response:
     unicode_errors = "strict"
     default_conditional_response = False
     default_body_encoding = "UTF-8"
+    default_etag_algorithm = "blake2b"
+    write_chunk_size = None
+    json_dumps = staticmethod(json_dumps)
+    json_loads = staticmethod(json_loads)
 
     # These two are only around so that when people pass them into the
     # constructor they correctly get saved and set, however they are not used
@@ -174,16 +206,28 @@ class Response:
         content_type=None,
         conditional_response=None,
         charset=_marker,
+        body_factory=None,
         **kw,
     ):
         # Do some sanity checking, and turn json_body into an actual body
 
+        if body_factory is not None:
+            if app_iter is not None or body is not None:
+                raise TypeError(
+                    "You may only give one of the body, app_iter and "
+                    "body_factory arguments"
+                )
+            app_iter = DeferredAppIter(body_factory)
+
+            if conditional_response is None:
+                conditional_response = True
+
         if app_iter is None and body is None and ("json_body" in kw or "json" in kw):
             if "json_body" in kw:
                 json_body = kw.pop("json_body")
             else:
                 json_body = kw.pop("json")
-            body = json.dumps(json_body, separators=(",", ":")).encode("UTF-8")
+            body = self.json_dumps(json_body)
 
             if content_type is None:
                 content_type = "application/json"
@@ -270,19 +314,13 @@ class Response:
             if not has_charset and charset is _marker and self.default_charset:
                 new_charset = self.default_charset
 
-            # Optimize for the default_content_type as shipped by
-            # WebOb, becuase we know that 'text/html' has a charset,
-            # otherwise add a charset if the content_type has a charset.
-            #
             # Even if the user supplied charset explicitly, we do not add
             # it to the Content-Type unless it has has a charset, instead
             # the user supplied charset is solely used for encoding the
             # body if it is a text_type
 
-            if new_charset and (
-                content_type == "text/html" or _content_type_has_charset(content_type)
-            ):
-                content_type += "; charset=" + new_charset
+            if new_charset:
+                content_type = _content_type_header(content_type, new_charset)
 
             self._headerlist.append(("Content-Type", content_type))
 
@@ -318,7 +356,7 @@ class Response:
         elif app_iter is None and not code_has_body:
             app_iter = [b""]
 
-        self._app_iter = app_iter
+        self._app_iter = _async_app_iter(app_iter)
 
         # Loop through all the remaining keyword arguments
 
@@ -537,6 +575,9 @@ class Response:
         if isinstance(app_iter, list) and len(app_iter) == 1:
             return app_iter[0]
 
+        if isinstance(app_iter, BufferedAppIter):
+            return bytes(app_iter.buffer)
+
         if app_iter is None:
             raise AttributeError("No body has been set")
         try:
@@ -590,18 +631,18 @@ class Response:
 
         .. note::
 
-           This will automatically :meth:`~bytes.decode` the
-           :attr:`~Response.body` as ``UTF-8`` on get, and
-           :meth:`~str.encode` the :meth:`json.dumps` as ``UTF-8``
-           before assigning to :attr:`~Response.body`.
+           The :attr:`~Response.body` is passed as ``UTF-8`` encoded bytes to
+           :attr:`json_loads` on get, and the ``UTF-8`` encoded bytes
+           returned by :attr:`json_dumps` are assigned to
+           :attr:`~Response.body` on set.
 
         """
         # Note: UTF-8 is a content-type specific default for JSON
 
-        return json.loads(self.body.decode("UTF-8"))
+        return self.json_loads(self.body)
 
     def _json_body__set(self, value):
-        self.body = json.dumps(value, separators=(",", ":")).encode("UTF-8")
+        self.body = self.json_dumps(value)
 
     def _json_body__del(self):
         del self.body
@@ -626,6 +667,9 @@ class Response:
         if app_iter is None:  # pragma: no cover
             return False
 
+        if isinstance(app_iter, BufferedAppIter):
+            return bool(app_iter.buffer)
+
         return True
 
     has_body = property(_has_body__get)
@@ -698,6 +742,16 @@ class Response:
     )
 
     def write(self, text):
+        text = self._write_bytes(text)
+        text_len = len(text)
+        self._write_app_iter().append(text)
+
+        if self.content_length is not None:
+            self.content_length += text_len
+
+        return text_len
+
+    def _write_bytes(self, text):
         if not isinstance(text, bytes):
             if not isinstance(text, str):
                 msg = "You can only write str to a Response.body_file, not %s"
@@ -707,9 +761,17 @@ class Response:
                 msg = "You can only write text to Response if charset has " "been set"
                 raise TypeError(msg)
             text = text.encode(self.charset)
-        text_len = len(text)
+
+        return text
+
+    def _write_app_iter(self):
+        # The app_iter written to: a list, or a BufferedAppIter if
+        # write_chunk_size is set
         app_iter = self._app_iter
 
+        if isinstance(app_iter, BufferedAppIter):
+            return app_iter
+
         if not isinstance(app_iter, list):
             try:
                 new_app_iter = self._app_iter = list(app_iter)
@@ -717,12 +779,11 @@ class Response:
                 iter_close(app_iter)
             app_iter = new_app_iter
             self.content_length = sum(len(chunk) for chunk in app_iter)
-        app_iter.append(text)
 
-        if self.content_length is not None:
-            self.content_length += text_len
+        if self.write_chunk_size:
+            app_iter = self._app_iter = BufferedAppIter(app_iter, self.write_chunk_size)
 
-        return text_len
+        return app_iter
 
     #
     # app_iter
@@ -742,7 +803,7 @@ class Response:
         if self._app_iter is not None:
             # Undo the automatically-set content-length
             self.content_length = None
-        self._app_iter = value
+        self._app_iter = _async_app_iter(value)
 
     def _app_iter__del(self):
         self._app_iter = []
@@ -752,6 +813,37 @@ class Response:
         _app_iter__get, _app_iter__set, _app_iter__del, doc=_app_iter__get.__doc__
     )
 
+    def _body_factory__get(self):
+        """
+        The callable that will produce the body, if the body has not been
+        produced yet (see the ``body_factory`` argument of
+        :class:`~Response`); otherwise ``None``.  Setting it replaces the
+        body and removes the ``Content-Length`` header.
+        """
+        app_iter = self._app_iter
+
+        if isinstance(app_iter, DeferredAppIter) and app_iter.app_iter is None:
+            return app_iter.factory
+
+        return None
+
+    def _body_factory__set(self, value):
+        self.app_iter = DeferredAppIter(value)
+
+    body_factory = property(
+        _body_factory__get, _body_factory__set, doc=_body_factory__get.__doc__
+    )
+
+    def _resolve_app_iter(self):
+        # Run a body factory before the status is sent, so that what it
+        # raises can still become an error response
+        app_iter = self._app_iter
+
+        if isinstance(app_iter, DeferredAppIter):
+            self._app_iter = app_iter = app_iter.resolve()
+
+        return app_iter
+
     #
     # headers attrs
     #
@@ -915,21 +1007,10 @@ class Response:
 
             has_charset = "charset=" in content_type
 
-            new_charset = None
-
-            if not has_charset and self.default_charset:
-                new_charset = self.default_charset
-
-            # Optimize for the default_content_type as shipped by
-            # WebOb, becuase we know that 'text/html' has a charset,
-            # otherwise add a charset if the content_type has a charset.
-            #
             # We add the default charset if the content-type is "texty".
 
-            if new_charset and (
-                content_type == "text/html" or _content_type_has_charset(content_type)
-            ):
-                content_type += "; charset=" + new_charset
+            if not has_charset and self.default_charset:
+                content_type = _content_type_header(content_type, self.default_charset)
 
             self.headers["Content-Type"] = content_type
 
@@ -1181,9 +1262,11 @@ class Response:
             self._cache_control_obj.header_value = value
 
         if self._cache_control_obj.header_value != value:
+            # The header was changed directly; refresh the properties without
+            # writing them back to the header
             new_obj = CacheControl.parse(value, type="response")
-            self._cache_control_obj.properties.clear()
-            self._cache_control_obj.properties.update(new_obj.properties)
+            dict.clear(self._cache_control_obj.properties)
+            dict.update(self._cache_control_obj.properties, new_obj.properties)
             self._cache_control_obj.header_value = value
 
         return self._cache_control_obj
@@ -1222,6 +1305,10 @@ class Response:
         else:
             self.headers["Cache-Control"] = value
 
+        if self._cache_control_obj is not None:
+            # Our own change, the properties already match the header
+            self._cache_control_obj.header_value = value
+
     cache_control = property(
         _cache_control__get,
         _cache_control__set,
@@ -1246,32 +1333,33 @@ class Response:
             seconds = timedelta_to_seconds(seconds)
         cache_control = self.cache_control
 
-        if seconds is None:
-            pass
-        elif not seconds:
-            # To really expire something, you have to force a
-            # bunch of these cache control attributes, and IE may
-            # not pay attention to those still so we also set
-            # Expires.
-            cache_control.no_store = True
-            cache_control.no_cache = True
-            cache_control.must_revalidate = True
-            cache_control.max_age = 0
-            cache_control.post_check = 0
-            cache_control.pre_check = 0
-            self.expires = datetime.utcnow()
-
-            if "last-modified" not in self.headers:
-                self.last_modified = datetime.utcnow()
-            self.pragma = "no-cache"
-        else:
-            cache_control.properties.clear()
-            cache_control.max_age = seconds
-            self.expires = datetime.utcnow() + timedelta(seconds=seconds)
-            self.pragma = None
+        with cache_control.batch():
+            if seconds is None:
+                pass
+            elif not seconds:
+                # To really expire something, you have to force a
+                # bunch of these cache control attributes, and IE may
+                # not pay attention to those still so we also set
+                # Expires.
+                cache_control.no_store = True
+                cache_control.no_cache = True
+                cache_control.must_revalidate = True
+                cache_control.max_age = 0
+                cache_control.post_check = 0
+                cache_control.pre_check = 0
+                self.expires = datetime.utcnow()
+
+                if "last-modified" not in self.headers:
+                    self.last_modified = datetime.utcnow()
+                self.pragma = "no-cache"
+            else:
+                cache_control.properties.clear()
+                cache_control.max_age = seconds
+                self.expires = datetime.utcnow() + timedelta(seconds=seconds)
+                self.pragma = None
 
-        for name, value in kw.items():
-            setattr(cache_control, name, value)
+            for name, value in kw.items():
+                setattr(cache_control, name, value)
 
     cache_expires = property(lambda self: self._cache_expires, _cache_expires)
 
@@ -1302,36 +1390,33 @@ class Response:
             self.content_length = sum(map(len, self._app_iter))
         self.content_encoding = "gzip"
 
-    def decode_content(self):
+    def decode_content(self, lazy=False, max_size=None):
+        """
+        Decode the content according to its ``Content-Encoding`` (``gzip``,
+        ``deflate``, or ``br`` when the ``brotli`` package is installed).
+
+        The body is decoded in chunks of at most 64 KiB.  With ``lazy``, the
+        ``app_iter`` is replaced with one that decodes the body as it is
+        iterated over (and ``Content-Length`` is removed), so that memory
+        use does not depend on the size of the body.  When the decoded body
+        is larger than ``max_size`` bytes, a ``ValueError`` is raised (while
+        iterating, with ``lazy``), as it is for invalid content.
+        """
         content_encoding = self.content_encoding or "identity"
 
         if content_encoding == "identity":
             return
 
-        if content_encoding not in ("gzip", "deflate"):
-            raise ValueError(
-                "I don't know how to decode the content %s" % content_encoding
-            )
-
-        if content_encoding == "gzip":
-            from gzip import GzipFile
-            from io import BytesIO
-
-            gzip_f = GzipFile(filename="", mode="r", fileobj=BytesIO(self.body))
-            self.body = gzip_f.read()
-            self.content_encoding = None
-            gzip_f.close()
+        if lazy:
+            self.app_iter = decode_app_iter(self._app_iter, content_encoding, max_size)
+            self.content_length = None
         else:
-            try:
-                # RFC7230 section 4.2.2 specifies that the body should be wrapped
-                # inside a ZLIB (RFC1950) container ...
-                self.body = zlib.decompress(self.body)
-            except zlib.error:
-                # ... but there are nonconformant implementations around which send
-                # the data without the ZLIB container, so we use maximum window size
-                # decompression without header check (the - sign)
-                self.body = zlib.decompress(self.body, -15)
-            self.content_encoding = None
+            # Check the encoding before reading the body, and keep the body
+            # when it cannot be decoded
+            decoder = _ContentDecoder(content_encoding)
+            body = self.body
+            self.body = b"".join(_decode_app_iter([body], decoder, max_size))
+        self.content_encoding = None
 
     def md5_etag(self, body=None, set_content_md5=False):
         """
@@ -1354,6 +1439,40 @@ class Response:
         if set_content_md5:
             self.content_md5 = md5_digest
 
+    def hash_etag(self, algorithm=None):
+        """
+        Generate a strong etag for the response object by hashing the body
+        with ``algorithm`` (any name :func:`hashlib.new` accepts; by default
+        :attr:`default_etag_algorithm`).
+
+        Unlike :meth:`md5_etag`, this does not join the body into a single
+        string: the chunks of :attr:`app_iter` are hashed one at a time.  An
+        ``app_iter`` that is not a list is iterated once and replaced by the
+        list of its chunks, setting ``self.content_length`` if it was not
+        known.
+
+        Sets ``self.etag``.
+        """
+
+        if algorithm is None:
+            algorithm = self.default_etag_algorithm
+        app_iter = self._app_iter
+
+        if isinstance(app_iter, (list, tuple)):
+            self.etag = _hash_etag(algorithm, app_iter)
+
+            return
+
+        chunks = []
+        try:
+            self.etag = _hash_etag(algorithm, app_iter, chunks.append)
+        finally:
+            iter_close(app_iter)
+        self._app_iter = chunks
+
+        if self.content_length is None:
+            self.content_length = sum(map(len, chunks))
+
     @staticmethod
     def _make_location_absolute(environ, value):
         # urllib.parse.urlsplit() (called internally by urljoin) strips
@@ -1399,14 +1518,16 @@ class Response:
 
         headerlist = self._abs_headerlist(environ)
 
-        start_response(self.status, headerlist)
-
         if environ["REQUEST_METHOD"] == "HEAD":
+            start_response(self.status, headerlist)
             # Special case here...
 
             return EmptyResponse(self._app_iter)
 
-        return self._app_iter
+        app_iter = self._resolve_app_iter()
+        start_response(self.status, headerlist)
+
+        return app_iter
 
     _safe_methods = ("GET", "HEAD")
 
@@ -1468,6 +1589,7 @@ class Response:
 
                 return [body]
             else:
+                self._resolve_app_iter()
                 app_iter = self.app_iter_range(content_range.start, content_range.stop)
 
                 if app_iter is not None:
@@ -1488,12 +1610,15 @@ class Response:
 
                     return app_iter
 
-        start_response(self.status, headerlist)
-
         if method == "HEAD":
+            start_response(self.status, headerlist)
+
             return EmptyResponse(self._app_iter)
 
-        return self._app_iter
+        app_iter = self._resolve_app_iter()
+        start_response(self.status, headerlist)
+
+        return app_iter
 
     def app_iter_range(self, start, stop):
         """
@@ -1544,9 +1669,33 @@ class ResponseBodyFile:
         """
         Write a sequence of lines to the response.
         """
+        response = self.response
+        app_iter = response._write_app_iter()
+        written = 0
 
         for item in seq:
-            self.write(item)
+            item = response._write_bytes(item)
+            app_iter.append(item)
+            written += len(item)
+
+        if response.content_length is not None:
+            response.content_length += written
+
+    def getbuffer(self):
+        """
+        Return a :class:`memoryview` of the body written so far, without
+        copying it.  The response's ``app_iter`` is turned into a
+        :class:`BufferedAppIter` if it is not one already.  Like
+        :meth:`io.BytesIO.getbuffer`, writing to the response raises
+        :exc:`BufferError` while the view is alive.
+        """
+        response = self.response
+        app_iter = response._write_app_iter()
+
+        if not isinstance(app_iter, BufferedAppIter):
+            app_iter = response._app_iter = BufferedAppIter(app_iter)
+
+        return memoryview(app_iter.buffer)
 
     def close(self):
         raise NotImplementedError("Response bodies cannot be closed")
@@ -1561,8 +1710,12 @@ class ResponseBodyFile:
 
         if not self.response.has_body:
             return 0
+        app_iter = self.response.app_iter
+
+        if isinstance(app_iter, BufferedAppIter):
+            return len(app_iter.buffer)
 
-        return sum(len(chunk) for chunk in self.response.app_iter)
+        return sum(len(chunk) for chunk in app_iter)
 
 
 class AppIterRange:
@@ -1626,6 +1779,183 @@ class AppIterRange:
         iter_close(self.app_iter)
 
 
+class BufferedAppIter:
+    """
+    An ``app_iter`` that collects the body in a :class:`bytearray` and
+    yields it in chunks of ``chunk_size`` bytes, made from the initial
+    ``chunks``.  :meth:`Response.write` uses it when
+    ``Response.write_chunk_size`` is set.
+    """
+
+    def __init__(self, chunks=(), chunk_size=1 << 16):
+        self.buffer = buffer = bytearray()
+
+        for chunk in chunks:
+            buffer += chunk
+        self.chunk_size = chunk_size
+        # Add data to the end of the body
+        self.append = self.write = buffer.extend
+
+    def __repr__(self):
+        return f"<{self.__class__.__name__} {len(self.buffer)} bytes>"
+
+    def __iter__(self):
+        buffer = self.buffer
+        chunk_size = self.chunk_size
+
+        if len(buffer) <= chunk_size:
+            if buffer:
+                yield bytes(buffer)
+
+            return
+
+        for start in range(0, len(buffer), chunk_size):
+            # A short-lived view so that the buffer may still grow while
+            # this is suspended
+            with memoryview(buffer) as view:
+                chunk = bytes(view[start : start + chunk_size])
+            yield chunk
+
+
+class DeferredAppIter:
+    """
+    An ``app_iter`` that calls ``factory`` to produce the real body the
+    first time it is iterated over (see the ``body_factory`` argument of
+    :class:`~Response`).  Closing it before that does not call the factory.
+    """
+
+    def __init__(self, factory):
+        self.factory = factory
+        self.app_iter = None
+
+    def __repr__(self):
+        return f"<{self.__class__.__name__} for {self.factory!r}>"
+
+    def resolve(self):
+        """Call the factory (once) and return the ``app_iter`` it produced."""
+
+        if self.app_iter is None:
+            app_iter = self.factory()
+
+            if isinstance(app_iter, bytes):
+                app_iter = [app_iter]
+            self.app_iter = app_iter
+
+        return self.app_iter
+
+    def __iter__(self):
+        return iter(self.resolve())
+
+    def close(self):
+        if self.app_iter is not None:
+            iter_close(self.app_iter)
+
+
+class AsyncAppIter:
+    """
+    An ``app_iter`` for an asynchronous iterable body, like an async
+    generator.  A :class:`~Response` wraps bodies that can only be
+    iterated over with ``async for`` in one automatically.
+
+    ASGI servers (see :mod:`webob.asgi`) iterate over it with ``async
+    for`` and close it with ``await app_iter.aclose()``.  It can also be
+    iterated over synchronously (by a WSGI server, or to read
+    ``Response.body``), outside of any running event loop: it then runs
+    the iterator in an event loop of its own.  :meth:`close` closes the
+    iterator (with its ``aclose()`` method) in either case.
+    """
+
+    def __init__(self, async_iter):
+        self.async_iter = async_iter
+        self._loop = None
+        self._closed = False
+
+    def __repr__(self):
+        return f"<{self.__class__.__name__} for {self.async_iter!r}>"
+
+    def __aiter__(self):
+        return self.async_iter.__aiter__()
+
+    def __iter__(self):
+        if self._loop is None:
+            import asyncio
+
+            self._loop = asyncio.new_event_loop()
+        loop = self._loop
+        iterator = self.async_iter.__aiter__()
+
+        while True:
+            try:
+                chunk = loop.run_until_complete(iterator.__anext__())
+            except StopAsyncIteration:
+                break
+            yield chunk
+
+    async def aclose(self):
+        """Close the iterator, in the running event loop."""
+
+        if self._closed:
+            return
+        self._closed = True
+        aclose = getattr(self.async_iter, "aclose", None)
+        try:
+            if aclose is not None:
+                await aclose()
+        finally:
+            loop = self._loop
+
+            if loop is not None and not loop.is_running():
+                # Awaited in another event loop, where this one cannot run
+                self._loop = None
+                loop.close()
+
+    def close(self):
+        """
+        Close the iterator.  In a running event loop (where it cannot be
+        waited for) this schedules :meth:`aclose` instead.
+        """
+
+        if self._closed:
+            return
+
+        if self._loop is None:
+            import asyncio
+
+            try:
+                running = asyncio.get_running_loop()
+            except RuntimeError:
+                pass
+            else:
+                self._close_task = running.create_task(self.aclose())
+
+                return
+            self._loop = asyncio.new_event_loop()
+        try:
+            self._loop.run_until_complete(self.aclose())
+        finally:
+            self._close_loop()
+
+    def _close_loop(self):
+        loop, self._loop = self._loop, None
+
+        if loop is not None:
+            loop.run_until_complete(loop.shutdown_asyncgens())
+            loop.close()
+
+
+def _async_app_iter(app_iter):
+    # Wrap bodies that can only be iterated over asynchronously
+    if (
+        app_iter is not None
+        and not isinstance(app_iter, (list, tuple))
+        and hasattr(app_iter, "__aiter__")
+        and not hasattr(app_iter, "__iter__")
+    ):
+        return AsyncAppIter(app_iter)
+
+    return app_iter
+
+
 class EmptyResponse:
     """
     An empty WSGI response.
@@ -1662,6 +1992,39 @@ def _content_type_has_charset(content_type):
     return content_type.startswith("text/") or _is_xml(content_type)
 
 
+# Applications use a handful of content types, so the Content-Type header
+# values are remembered (the least recently used are dropped).
+@lru_cache(maxsize=256)
+def _content_type_header(content_type, charset):
+    """Return ``content_type`` with ``; charset=`` added if it is "texty"."""
+    # Optimize for the default_content_type as shipped by WebOb, because
+    # we know that 'text/html' has a charset, otherwise add a charset if
+    # the content_type has a charset.
+
+    if content_type == "text/html" or _content_type_has_charset(content_type):
+        header = content_type + "; charset=" + charset
+    else:
+        header = content_type
+
+    return header
+
+
+def _hash_etag(algorithm, app_iter, keep=None):
+    if algorithm == "blake2b":
+        hasher = hashlib.blake2b(digest_size=16)
+    else:
+        hasher = hashlib.new(algorithm)
+    update = hasher.update
+
+    for chunk in app_iter:
+        update(chunk)
+
+        if keep is not None:
+            keep(chunk)
+
+    return text_(b64encode(hasher.digest())).strip("=")
+
+
 def _request_uri(environ):
     """Like ``wsgiref.url.request_uri``, except eliminates ``:80`` ports.
 
@@ -1697,6 +2060,69 @@ def iter_close(iter):
         iter.close()
 
 
+def json_array_app_iter(items, dumps=json_dumps, buffer_size=1 << 16):
+    """
+    Serialize ``items`` as a JSON array without building it in memory.
+
+    Each item is serialized with ``dumps`` (which must return UTF-8 encoded
+    bytes) as it is consumed, and the output is yielded in chunks of roughly
+    ``buffer_size`` bytes. Use it as the ``app_iter`` of a response::
+
+        Response(app_iter=json_array_app_iter(rows),
+                 content_type="application/json")
+    """
+    buf = bytearray(b"[")
+    sep = b""
+    try:
+        for item in items:
+            buf += sep
+            buf += dumps(item)
+            sep = b","
+
+            if len(buf) >= buffer_size:
+                yield bytes(buf)
+                buf = bytearray()
+        buf += b"]"
+        yield bytes(buf)
+    finally:
+        iter_close(items)
+
+
+def decode_app_iter(app_iter, encoding, max_size=None, chunk_size=1 << 16):
+    """
+    Decode an ``app_iter`` encoded with ``encoding`` (see
+    :meth:`Response.decode_content`) as it is iterated over, yielding
+    chunks of at most ``chunk_size`` bytes.  ``app_iter`` is closed at the
+    end.  An unknown ``encoding`` raises ``ValueError`` right away.
+    """
+
+    return _decode_app_iter(app_iter, _ContentDecoder(encoding), max_size, chunk_size)
+
+
+def _decode_app_iter(app_iter, decoder, max_size=None, chunk_size=1 << 16):
+    size = 0
+    try:
+        for item in app_iter:
+            data = decoder.decode(item, chunk_size)
+
+            while True:
+                if data:
+                    size += len(data)
+
+                    if max_size is not None and size > max_size:
+                        raise ValueError(
+                            "The decoded body is larger than %d bytes" % max_size
+                        )
+                    yield data
+
+                if not decoder.unconsumed:
+                    break
+                data = decoder.decode(b"", chunk_size)
+        decoder.flush()
+    finally:
+        iter_close(app_iter)
+
+
 def gzip_app_iter(app_iter):
     size = 0
     crc = zlib.crc32(b"") & 0xFFFFFFFF
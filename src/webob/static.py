@@ -1,3 +1,4 @@
+import errno
 import mimetypes
 import os
 
@@ -42,24 +43,45 @@ class FileApp:
             msg = f"Can't open {self.filename!r}: {e}"
             return exc.HTTPNotFound(comment=msg)
 
-        try:
-            file = self._open(self.filename, "rb")
-        except OSError as e:
+        if not os.access(
+            self.filename, os.R_OK, effective_ids=os.access in os.supports_effective_ids
+        ):
+            # The file is not opened before its content is sent: it is
+            # refused here for HEAD requests and 304 Not Modified as well
+            e = PermissionError(errno.EACCES, os.strerror(errno.EACCES), self.filename)
             msg = "You are not permitted to view this file (%s)" % e
-            return exc.HTTPForbidden(msg)
 
-        if "wsgi.file_wrapper" in req.environ:
-            app_iter = req.environ["wsgi.file_wrapper"](file, BLOCK_SIZE)
-        else:
-            app_iter = FileIter(file)
+            return exc.HTTPForbidden(msg)
 
-        return Response(
-            app_iter=app_iter,
+        resp = Response(
+            body_factory=lambda: self._app_iter(req.environ),
             content_length=stat.st_size,
             last_modified=stat.st_mtime,
             # @@ etag
             **self.kw,
-        ).conditional_response_app
+        )
+
+        def app(environ, start_response):
+            # The file is only opened when its content is sent, not for
+            # HEAD requests or 304 Not Modified responses
+            try:
+                return resp.conditional_response_app(environ, start_response)
+            except exc.HTTPException as e:
+                return e(environ, start_response)
+
+        return app
+
+    def _app_iter(self, environ):
+        try:
+            file = self._open(self.filename, "rb")
+        except OSError as e:
+            msg = "You are not permitted to view this file (%s)" % e
+            raise exc.HTTPForbidden(msg)
+
+        if "wsgi.file_wrapper" in environ:
+            return environ["wsgi.file_wrapper"](file, BLOCK_SIZE)
+
+        return FileIter(file)
 
 
 class FileIter:
@@ -0,0 +1,328 @@
+"""
+Streaming responses, with explicit control over when the data that has
+been produced is sent, and Server-Sent Events.
+
+A :class:`StreamingResponse` is made from a *source*: an iterable (or an
+async iterable, for ASGI servers) of ``bytes`` or ``str`` items.  The items
+are collected and sent as one chunk when the source yields :data:`FLUSH`,
+when more than :attr:`~StreamingResponse.buffer_size` bytes are waiting,
+and at the end::
+
+    def report(rows):
+        for row in rows:
+            yield format_row(row)
+            if row.last_of_group:
+                yield FLUSH
+
+    return StreamingResponse(report(rows), content_type='text/csv')
+
+An :class:`EventStreamResponse` frames each item as an event of a
+``text/event-stream`` and flushes it immediately; it can also send
+heartbeats to keep an idle connection open.  Both can be compressed with
+``resp.encode_content()``: the compressed stream is flushed
+(``Z_SYNC_FLUSH``) at every flush point, so that clients can decompress
+each chunk as soon as they receive it.
+"""
+
+import asyncio
+import struct
+import time
+import zlib
+
+from webob.response import AsyncAppIter, Response, _gzip_header, iter_close
+
+__all__ = ["FLUSH", "EventStreamResponse", "StreamingResponse", "format_event"]
+
+
+class _Flush:
+    def __repr__(self):
+        return "FLUSH"
+
+
+#: Yielded by the source of a :class:`StreamingResponse` to send the data
+#: collected so far.
+FLUSH = _Flush()
+
+
+class StreamingResponse(Response):
+    """
+    A response whose body is produced by ``source`` while it is sent.
+
+    ``source`` is an iterable, or an async iterable (see
+    :class:`webob.response.AsyncAppIter`), of ``bytes`` and ``str`` items
+    (``str`` items are encoded with the response charset), and of
+    :data:`FLUSH` markers.  A synchronous source may also yield ``None``
+    when it has nothing to send; this gives a heartbeat a chance to be sent
+    (see :attr:`heartbeat`).  The source is closed when the response body
+    is.
+
+    The other arguments are those of :class:`~webob.response.Response`
+    (``body`` and ``app_iter`` excepted); the class attributes below can
+    also be given as keyword arguments.
+    """
+
+    #: Send the data collected so far when more than this many bytes are
+    #: waiting, even without a flush.
+    buffer_size = 1 << 16
+
+    #: Flush after every item of the source.
+    flush_items = False
+
+    #: When set, send :attr:`heartbeat_data` when nothing has been sent for
+    #: this many seconds.  With a synchronous source this is only checked
+    #: when the source yields an item (or ``None``).
+    heartbeat = None
+
+    #: What a heartbeat sends.
+    heartbeat_data = b""
+
+    #: The clock heartbeats are timed with.
+    clock = staticmethod(time.monotonic)
+
+    _gzip = False
+
+    def __init__(self, source=(), **kw):
+        if "body" in kw or "app_iter" in kw or "body_factory" in kw:
+            raise TypeError("The body of a StreamingResponse is its source")
+        Response.__init__(self, app_iter=[], **kw)
+        self.source = source
+
+        # The generators only read the settings once they are started
+        if hasattr(source, "__aiter__"):
+            self._app_iter = AsyncAppIter(self._agenerate(source))
+        else:
+            self._app_iter = self._generate(source)
+
+    def encode_content(self, encoding="gzip", lazy=True):
+        """
+        Compress the body with ``encoding`` (``gzip``, or ``identity`` to
+        undo it), as it is produced.  Each flush ends with a
+        ``Z_SYNC_FLUSH`` of the compressor.
+
+        This must be called before the body is iterated over; ``lazy`` is
+        ignored.
+        """
+        assert encoding in ("identity", "gzip"), "Unknown encoding: %r" % encoding
+        self._gzip = encoding == "gzip"
+        self.content_encoding = "gzip" if self._gzip else None
+        self.content_length = None
+
+    def encode(self, item):
+        """
+        Return the bytes to send for an ``item`` of the source.  Subclasses
+        can override this to frame or serialize items.
+        """
+
+        if isinstance(item, str):
+            charset = self.charset
+
+            if charset is None:
+                raise TypeError(
+                    "You can only stream bytes to a response without a charset"
+                )
+
+            return item.encode(charset)
+
+        return item
+
+    def _generate(self, source):
+        output = _Output(self._gzip)
+        heartbeat = self.heartbeat
+        clock = self.clock
+        last_sent = clock()
+        try:
+            for item in source:
+                if item is None:
+                    if heartbeat is None or clock() - last_sent < heartbeat:
+                        continue
+                    chunk = self._send_heartbeat(output)
+                else:
+                    chunk = self._send(output, item)
+
+                if chunk:
+                    last_sent = clock()
+                    yield chunk
+            chunk = output.finish()
+
+            if chunk:
+                yield chunk
+        finally:
+            iter_close(source)
+
+    async def _agenerate(self, source):
+        output = _Output(self._gzip)
+        heartbeat = self.heartbeat
+        iterator = source.__aiter__()
+        pending = None
+        try:
+            while True:
+                if pending is None:
+                    pending = asyncio.ensure_future(iterator.__anext__())
+
+                if heartbeat is not None:
+                    # Keep waiting for the same item after a heartbeat
+                    done, _ = await asyncio.wait({pending}, timeout=heartbeat)
+
+                    if not done:
+                        yield self._send_heartbeat(output)
+
+                        continue
+                try:
+                    item = await pending
+                except StopAsyncIteration:
+                    break
+                finally:
+                    if pending.done():
+                        pending = None
+
+                if item is not None:
+                    chunk = self._send(output, item)
+
+                    if chunk:
+                        yield chunk
+            chunk = output.finish()
+
+            if chunk:
+                yield chunk
+        finally:
+            if pending is not None:
+                pending.cancel()
+                try:
+                    # The source must not be running when it is closed
+                    await pending
+                except (asyncio.CancelledError, StopAsyncIteration):
+                    pass
+            aclose = getattr(source, "aclose", None)
+
+            if aclose is not None:
+                await aclose()
+
+    def _send(self, output, item):
+        # Add item to the output, and return what must be sent now
+        if item is FLUSH:
+            return output.flush()
+        output.write(self.encode(item))
+
+        if self.flush_items:
+            return output.flush()
+
+        if len(output.buffer) > self.buffer_size:
+            return output.take()
+
+        return None
+
+    def _send_heartbeat(self, output):
+        output.write(self.heartbeat_data)
+
+        return output.flush()
+
+
+class _Output:
+    # The data waiting to be sent, compressed if gzip is true.
+
+    def __init__(self, gzip):
+        self.buffer = bytearray()
+        self.compress = None
+
+        if gzip:
+            self.buffer += _gzip_header
+            self.compress = zlib.compressobj(
+                9, zlib.DEFLATED, -zlib.MAX_WBITS, zlib.DEF_MEM_LEVEL, 0
+            )
+            self.crc = zlib.crc32(b"")
+            self.size = 0
+
+    def write(self, data):
+        if self.compress is None:
+            self.buffer += data
+        else:
+            self.crc = zlib.crc32(data, self.crc)
+            self.size += len(data)
+            self.buffer += self.compress.compress(data)
+
+    def take(self):
+        chunk = bytes(self.buffer)
+        self.buffer.clear()
+
+        return chunk
+
+    def flush(self):
+        if self.compress is not None:
+            self.buffer += self.compress.flush(zlib.Z_SYNC_FLUSH)
+
+        return self.take()
+
+    def finish(self):
+        if self.compress is not None:
+            self.buffer += self.compress.flush()
+            self.buffer += struct.pack("<2L", self.crc, self.size & 0xFFFFFFFF)
+
+        return self.take()
+
+
+def format_event(data=None, event=None, id=None, retry=None, comment=None):
+    """
+    Return an event of a ``text/event-stream``, as ``bytes``.
+
+    ``data`` (``str`` or ``bytes``) may span several lines.  ``retry`` is
+    the reconnection time in milliseconds.  A ``comment`` is ignored by
+    clients.
+    """
+    lines = []
+
+    if comment is not None:
+        lines.extend(":" + line for line in _splitlines(comment))
+
+    for name, value in (("event", event), ("id", id)):
+        if value is not None:
+            value = str(value)
+
+            if "\n" in value or "\r" in value or (name == "id" and "\0" in value):
+                raise ValueError(f"Invalid event {name}: {value!r}")
+            lines.append(f"{name}: {value}")
+
+    if retry is not None:
+        lines.append("retry: %d" % retry)
+
+    if data is not None:
+        if isinstance(data, bytes):
+            data = data.decode("utf-8")
+        lines.extend("data: " + line for line in _splitlines(data))
+
+    return ("\n".join(lines) + "\n\n").encode("utf-8")
+
+
+def _splitlines(text):
+    # Only CR, LF and CRLF end lines in an event stream
+    return text.replace("\r\n", "\n").replace("\r", "\n").split("\n")
+
+
+class EventStreamResponse(StreamingResponse):
+    """
+    A ``text/event-stream`` response that sends the items of ``source`` as
+    Server-Sent Events, each in a chunk of its own.
+
+    Items can be ``str`` (the data of an event), ``dict`` (the keyword
+    arguments of :func:`format_event`), or ``bytes`` (sent as they are).
+    Heartbeats are comments.  ``Cache-Control: no-cache`` is set unless
+    the response has a ``Cache-Control`` header already.
+    """
+
+    default_content_type = "text/event-stream"
+    flush_items = True
+    heartbeat_data = b":\n\n"
+
+    def __init__(self, source=(), **kw):
+        StreamingResponse.__init__(self, source, **kw)
+
+        if "Cache-Control" not in self.headers:
+            self.cache_control = "no-cache"
+
+    def encode(self, item):
+        if isinstance(item, str):
+            return format_event(item)
+
+        if isinstance(item, dict):
+            return format_event(**item)
+
+        return item
@@ -1,8 +1,14 @@
+from html import escape
 import warnings
+import zlib
 
-from webob.compat import escape
 from webob.headers import _trans_key
 
+try:
+    import simplejson as json
+except ImportError:
+    import json
+
 
 def unquote(string):
     if not string:
@@ -79,6 +85,26 @@ def html_escape(s):
     return text_(s)
 
 
+def json_dumps(value):
+    """Serialize ``value`` to compact JSON, returned as UTF-8 encoded bytes.
+
+    This is the default ``json_dumps`` of :class:`webob.request.BaseRequest`
+    and :class:`webob.response.Response`.
+    """
+
+    return json.dumps(value, separators=(",", ":")).encode("UTF-8")
+
+
+def json_loads(value):
+    """Deserialize JSON from UTF-8 encoded bytes (or text).
+
+    This is the default ``json_loads`` of :class:`webob.request.BaseRequest`
+    and :class:`webob.response.Response`.
+    """
+
+    return json.loads(value)
+
+
 def header_docstring(header, rfc_section):
     if header.isupper():
         header = _trans_key(header)
@@ -95,6 +121,176 @@ def header_docstring(header, rfc_section):
     )
 
 
+def _timed_phase(environ, phase, func, *args):
+    # Call func, timing it as a phase of the request when the request is
+    # profiled (see webob.profile)
+    timings = environ.get("webob.timings")
+
+    if timings is None:
+        return func(*args)
+
+    return timings.time(phase, func, *args)
+
+
+class _ContentDecoder:
+    # Decodes data encoded with a content-coding (gzip, deflate or br) as
+    # it arrives.  decode() returns at most max_length bytes (when it is
+    # not 0) and keeps the input it has not used yet (for br, also the
+    # output it has not returned yet); call it with no new data while
+    # .unconsumed is true.  Invalid data raises ValueError.
+
+    # The br decompressor of older versions of brotli has no output limit:
+    # it is given the input in slices of this size, so that a small input
+    # cannot expand to a huge output at once
+    brotli_slice_size = 256
+
+    def __init__(self, encoding):
+        self.encoding = encoding = encoding.strip().lower()
+        self._input = b""
+        self._output = b""
+        # Whether the br decompressor may have more output without input
+        self._brotli_more = False
+        self._brotli = None
+        self._zlib = None
+
+        if encoding in ("gzip", "x-gzip"):
+            self._wbits = 16 + zlib.MAX_WBITS
+        elif encoding == "deflate":
+            self._wbits = zlib.MAX_WBITS
+        elif encoding == "br":
+            try:
+                import brotli
+            except ImportError:
+                try:
+                    import brotlicffi as brotli
+                except ImportError:
+                    raise ValueError(
+                        "Decoding br content requires the brotli package"
+                    ) from None
+            self._brotli = brotli.Decompressor()
+            self._brotli_error = brotli.error
+            # brotli >= 1.2 limits the output itself
+            self._brotli_limited = hasattr(self._brotli, "can_accept_more_data")
+        else:
+            raise ValueError("I don't know how to decode the content %s" % encoding)
+
+        if self._brotli is None:
+            self._zlib = zlib.decompressobj(self._wbits)
+        # The deflate input received before any output, to retry raw
+        # deflate with
+        self._head = b"" if encoding == "deflate" else None
+
+    @property
+    def unconsumed(self):
+        # Whether decode() has more output to give without new input
+        return bool(self._input or self._output or self._brotli_more)
+
+    def decode(self, data=b"", max_length=0):
+        if self._brotli is not None:
+            return self._decode_brotli(data, max_length)
+
+        if self._input:
+            data = self._input + data
+        self._input = b""
+        decompressor = self._zlib
+
+        if decompressor.eof:
+            if self.encoding == "deflate" or not data.strip(b"\0"):
+                # Ignore what follows the data (or padding)
+                return b""
+            # Another gzip member
+            decompressor = self._zlib = zlib.decompressobj(self._wbits)
+        try:
+            output = decompressor.decompress(data, max_length)
+        except zlib.error as e:
+            if self._head is None:
+                raise ValueError(f"Invalid {self.encoding} content: {e}") from None
+            # RFC 7230 section 4.2.2 specifies that deflate data is wrapped
+            # in a zlib (RFC 1950) container, but some implementations send
+            # raw deflate data
+            self._wbits = -zlib.MAX_WBITS
+            decompressor = self._zlib = zlib.decompressobj(self._wbits)
+            data, self._head = self._head + data, None
+
+            return self.decode(data, max_length)
+
+        if self._head is not None:
+            self._head = None if output else self._head + data
+        self._input = decompressor.unconsumed_tail
+
+        if decompressor.eof and decompressor.unused_data:
+            self._input = decompressor.unused_data
+
+        return output
+
+    def _decode_brotli(self, data, max_length):
+        # The input is decompressed until there are max_length bytes of
+        # output, a slice at a time (or with the output limit of newer
+        # versions of brotli); the input not used yet is kept, and so is the
+        # output beyond max_length (as a view, to not copy it again at each
+        # call)
+        if self._input:
+            data = bytes(self._input) + data
+        decompressor = self._brotli
+        limited = self._brotli_limited and max_length
+        output = [self._output]
+        size = len(self._output)
+        position = 0
+        try:
+            while not max_length or size < max_length:
+                if self._brotli_more:
+                    # Output left from the last input
+                    data_in = b""
+                elif position < len(data):
+                    end = len(data) if limited else position + self.brotli_slice_size
+                    data_in = data[position:end]
+                    position = end
+                else:
+                    break
+
+                if limited:
+                    limit = max_length - size
+                    chunk = decompressor.process(data_in, output_buffer_limit=limit)
+                    self._brotli_more = (
+                        len(chunk) >= limit or not decompressor.can_accept_more_data()
+                    )
+                else:
+                    chunk = decompressor.process(data_in)
+                    self._brotli_more = False
+
+                if not chunk and not data_in:
+                    # Nothing more without new input
+                    self._brotli_more = False
+
+                    break
+                output.append(chunk)
+                size += len(chunk)
+        except self._brotli_error as e:
+            raise ValueError("Invalid br content: %s" % e) from None
+        self._input = memoryview(data)[position:] if position < len(data) else b""
+        output = b"".join(output)
+
+        if not max_length or len(output) <= max_length:
+            self._output = b""
+
+            return output
+        output = memoryview(output)
+        self._output = output[max_length:]
+
+        return bytes(output[:max_length])
+
+    def flush(self):
+        """Check that the data is complete, at the end of the input"""
+
+        if self._brotli is not None:
+            finished = self._brotli.is_finished()
+        else:
+            finished = self._zlib.eof
+
+        if not finished:
+            raise ValueError("Truncated %s content" % self.encoding)
+
+
 def warn_deprecation(text, version, stacklevel):
     # version specifies when to start raising exceptions instead of warnings
 
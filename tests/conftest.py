@@ -70,3 +70,64 @@ def serve():
                 log.debug("server stopped")
 
     return _serve
+
+
+class DummyBrotli:
+    # Stands in for the brotli module: each byte "decompresses" to 1000
+    # copies of itself, and "!" is invalid.  The number of bytes given to
+    # each call of process() is recorded in processed.
+    processed = []
+
+    class error(Exception):
+        pass
+
+    class Decompressor:
+        def __init__(self):
+            self.finished = False
+
+        def process(self, data):
+            DummyBrotli.processed.append(len(data))
+
+            if b"!" in data:
+                raise DummyBrotli.error("invalid")
+            self.finished = True
+
+            return b"".join(bytes([byte]) * 1000 for byte in data)
+
+        def is_finished(self):
+            return self.finished
+
+    class LimitedDecompressor(Decompressor):
+        # As in brotli >= 1.2, where the output can be limited
+        def __init__(self):
+            super().__init__()
+            self.pending = b""
+
+        def process(self, data, output_buffer_limit=None):
+            if data:
+                assert not self.pending
+                self.pending = super().process(data)
+            limit = output_buffer_limit or len(self.pending)
+            output, self.pending = self.pending[:limit], self.pending[limit:]
+
+            return output
+
+        def can_accept_more_data(self):
+            return not self.pending
+
+
+@pytest.fixture
+def dummy_brotli(monkeypatch):
+    import sys
+
+    monkeypatch.setitem(sys.modules, "brotli", DummyBrotli)
+    monkeypatch.setattr(DummyBrotli, "processed", [])
+
+    return DummyBrotli
+
+
+@pytest.fixture
+def dummy_brotli_limited(monkeypatch, dummy_brotli):
+    monkeypatch.setattr(dummy_brotli, "Decompressor", dummy_brotli.LimitedDecompressor)
+
+    return dummy_brotli
@@ -1,58 +1,477 @@
 #!/usr/bin/env python
+"""
+Benchmarks of the WebOb code paths that matter most for performance.
+
+They only need the standard library and run offline::
+
+    python tests/performance_test.py                     # run them all
+    python tests/performance_test.py -k request -k accept
+    python tests/performance_test.py -o before.json      # save the results
+    python tests/performance_test.py -o after.json --compare before.json
+
+Each benchmark is timed with :mod:`timeit`: the number of calls per run is
+calibrated to take at least ``--min-time`` seconds, and the best of
+``--repeat`` runs is reported (the mean and standard deviation are saved
+too).  The ``import_*`` benchmarks run ``python -X importtime`` in a new
+interpreter for each run instead, and report the time spent importing.
+Compare results from the same machine and Python only.
+"""
+
+import argparse
+import atexit
+import datetime
+import importlib.metadata
+import io
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import timeit
+
+from webob import exc
+from webob.acceptparse import (
+    create_accept_charset_header,
+    create_accept_encoding_header,
+    create_accept_header,
+    create_accept_language_header,
+)
+from webob.cookies import SignedSerializer
+from webob.request import Request
 from webob.response import Response
+from webob.static import FileApp
+
+BENCHMARKS = {}
+
+
+def benchmark(func):
+    """
+    Register a benchmark.  ``func`` does the setup and returns the function
+    that is timed.
+    """
+    BENCHMARKS[func.__name__] = func
+
+    return func
+
+
+def _start_response(status, headerlist, exc_info=None):
+    pass
+
+
+def _drain(app_iter):
+    try:
+        for chunk in app_iter:
+            pass
+    finally:
+        close = getattr(app_iter, "close", None)
+
+        if close is not None:
+            close()
+
+
+QUERY_STRING = "&".join("key%d=value%d" % (i, i) for i in range(20))
+FORM_BODY = QUERY_STRING.encode("ascii")
+COOKIE = "; ".join("cookie%d=value%d" % (i, i) for i in range(10))
+
+
+def _multipart_body():
+    boundary = "----webob-benchmark"
+    lines = []
+
+    for i in range(10):
+        lines += [
+            "--" + boundary,
+            'Content-Disposition: form-data; name="field%d"' % i,
+            "",
+            "value%d" % i,
+        ]
+    lines += [
+        "--" + boundary,
+        'Content-Disposition: form-data; name="upload"; filename="data.bin"',
+        "Content-Type: application/octet-stream",
+        "",
+        "x" * 16384,
+        "--" + boundary + "--",
+        "",
+    ]
+
+    return "multipart/form-data; boundary=" + boundary, "\r\n".join(lines).encode()
+
+
+@benchmark
+def request_blank():
+    return lambda: Request.blank("/path/to/resource?a=1")
+
+
+@benchmark
+def request_blank_factory():
+    make_request = Request.blank_factory()
+
+    return lambda: make_request("/path/to/resource?a=1")
+
+
+@benchmark
+def request_get():
+    environ = Request.blank("/?" + QUERY_STRING).environ
+
+    def run():
+        env = environ.copy()
+        env.pop("webob._parsed_query_vars", None)
+        Request(env).GET
+
+    return run
+
+
+@benchmark
+def request_post_urlencoded():
+    environ = Request.blank(
+        "/",
+        method="POST",
+        content_type="application/x-www-form-urlencoded",
+    ).environ
+
+    def run():
+        env = environ.copy()
+        env["wsgi.input"] = io.BytesIO(FORM_BODY)
+        env["CONTENT_LENGTH"] = str(len(FORM_BODY))
+        Request(env).POST
+
+    return run
+
+
+@benchmark
+def request_post_multipart():
+    content_type, body = _multipart_body()
+    environ = Request.blank("/", method="POST", content_type=content_type).environ
+
+    def run():
+        env = environ.copy()
+        env["wsgi.input"] = io.BytesIO(body)
+        env["CONTENT_LENGTH"] = str(len(body))
+        Request(env).POST
+
+    return run
+
+
+@benchmark
+def request_cookies():
+    environ = Request.blank("/", headers={"Cookie": COOKIE}).environ
+
+    def run():
+        env = environ.copy()
+        env.pop("webob._parsed_cookies", None)
+        Request(env).cookies["cookie5"]
+
+    return run
+
+
+@benchmark
+def accept_best_match():
+    accept = create_accept_header(
+        "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8"
+    )
+    offers = ["application/json", "text/html", "text/plain"]
+
+    return lambda: accept.best_match(offers)
+
+
+@benchmark
+def accept_acceptable_offers():
+    offers = ["application/json", "text/html", "text/plain"]
+    header = "text/html;level=1,text/html;q=0.7,application/*;q=0.5,*/*;q=0.1"
+
+    return lambda: create_accept_header(header).acceptable_offers(offers)
+
+
+@benchmark
+def accept_charset_encoding():
+    charset = create_accept_charset_header("utf-8, iso-8859-1;q=0.5")
+    encoding = create_accept_encoding_header("gzip, deflate, br;q=0.9")
+
+    def run():
+        charset.acceptable_offers(["utf-8", "latin-1"])
+        encoding.acceptable_offers(["gzip", "identity"])
+
+    return run
+
+
+@benchmark
+def accept_language_lookup():
+    header = "fr-CH, fr;q=0.9, en;q=0.8, de;q=0.7, *;q=0.5"
+    tags = ["en-US", "de", "fr-FR", "it"]
+
+    return lambda: create_accept_language_header(header).lookup(tags, default="en")
+
+
+@benchmark
+def response_init():
+    return lambda: Response("Hello world!")
+
+
+@benchmark
+def response_call():
+    environ = Request.blank("/").environ
+
+    def run():
+        _drain(Response("Hello world!")(environ, _start_response))
+
+    return run
+
+
+@benchmark
+def response_json():
+    data = {"items": list(range(50)), "name": "benchmark"}
 
+    return lambda: Response(json_body=data).body
 
-def make_middleware(app):
-    from repoze.profile.profiler import AccumulatingProfileMiddleware
 
-    return AccumulatingProfileMiddleware(
-        app,
-        log_filename="/tmp/profile.log",
-        discard_first_request=True,
-        flush_at_shutdown=True,
-        path="/__profile__",
+@benchmark
+def conditional_response_range():
+    body = b"x" * 65536
+    environ = Request.blank("/", headers={"Range": "bytes=1000-20000"}).environ
+
+    def run():
+        resp = Response(body, conditional_response=True)
+        _drain(resp(environ, _start_response))
+
+    return run
+
+
+@benchmark
+def conditional_response_not_modified():
+    environ = Request.blank("/", headers={"If-None-Match": '"abc"'}).environ
+
+    def run():
+        resp = Response("Hello world!", etag="abc", conditional_response=True)
+        _drain(resp(environ, _start_response))
+
+    return run
+
+
+@benchmark
+def file_app():
+    fd, filename = tempfile.mkstemp(suffix=".txt")
+    atexit.register(os.remove, filename)
+    os.write(fd, b"x" * 65536)
+    os.close(fd)
+    app = FileApp(filename)
+    environ = Request.blank("/").environ
+
+    def run():
+        _drain(app(environ.copy(), _start_response))
+
+    return run
+
+
+@benchmark
+def signed_serializer():
+    serializer = SignedSerializer("secret", "salt")
+    data = {"user": "someone", "roles": ["admin", "editor"], "id": 42}
+
+    return lambda: serializer.loads(serializer.dumps(data))
+
+
+@benchmark
+def exc_render_html():
+    environ = Request.blank("/", headers={"Accept": "text/html"}).environ
+
+    def run():
+        _drain(exc.HTTPNotFound()(environ, _start_response))
+
+    return run
+
+
+@benchmark
+def exc_render_json():
+    environ = Request.blank("/", headers={"Accept": "application/json"}).environ
+
+    def run():
+        _drain(exc.HTTPForbidden()(environ, _start_response))
+
+    return run
+
+
+@benchmark
+def import_webob():
+    return "import webob"
+
+
+@benchmark
+def import_webob_request_response():
+    return "from webob import Request, Response"
+
+
+@benchmark
+def import_webob_dec():
+    return "import webob.dec"
+
+
+@benchmark
+def import_webob_exc():
+    return "import webob.exc"
+
+
+_IMPORTS_START = "-- webob benchmark imports --"
+
+
+def run_benchmark(func, repeat=5, min_time=0.2):
+    """
+    Time ``func`` and return the statistics, in seconds per call.
+    """
+    timer = timeit.Timer(func)
+    number = 1
+
+    while True:
+        elapsed = timer.timeit(number)
+
+        if elapsed >= min_time:
+            break
+        number = max(number * 2, int(number * min_time / max(elapsed, 1e-9)))
+    times = [t / number for t in timer.repeat(repeat, number)]
+
+    return {
+        "number": number,
+        "repeat": repeat,
+        "best": min(times),
+        "mean": statistics.mean(times),
+        "stdev": statistics.stdev(times) if len(times) > 1 else 0.0,
+    }
+
+
+def run_import_benchmark(statement, repeat=5):
+    """
+    Time the imports done by ``statement`` with ``python -X importtime``,
+    in a new interpreter for each run, and return the statistics in
+    seconds.
+    """
+    code = f"import sys; sys.stderr.write({_IMPORTS_START!r} + '\\n'); {statement}"
+    env = dict(os.environ)
+    # Find the same webob as this script
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, sys.path))
+    times = []
+
+    # The first run may write the bytecode caches
+    for i in range(repeat + 1):
+        output = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", code],
+            env=env,
+            stderr=subprocess.PIPE,
+            check=True,
+            text=True,
+        ).stderr
+        times.append(_parse_importtime(output))
+    times = times[1:]
+
+    return {
+        "number": 1,
+        "repeat": repeat,
+        "best": min(times),
+        "mean": statistics.mean(times),
+        "stdev": statistics.stdev(times) if len(times) > 1 else 0.0,
+    }
+
+
+def _parse_importtime(output):
+    # Add up the cumulative times of the top-level imports after the start
+    lines = output.split(_IMPORTS_START, 1)[1].splitlines()
+    total = 0
+
+    for line in lines:
+        if not line.startswith("import time:"):
+            continue
+        self_us, cumulative_us, name = line[len("import time:") :].split("|")
+
+        if not name[1:].startswith(" "):
+            total += int(cumulative_us)
+
+    return total / 1e6
+
+
+def select(patterns):
+    return [
+        name
+        for name in BENCHMARKS
+        if not patterns or any(pattern in name for pattern in patterns)
+    ]
+
+
+def metadata():
+    try:
+        version = importlib.metadata.version("WebOb")
+    except importlib.metadata.PackageNotFoundError:
+        version = None
+
+    return {
+        "date": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        "python": sys.version,
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+        "webob": version,
+    }
+
+
+def _format(seconds):
+    for unit, scale in (("s", 1), ("ms", 1e-3), ("us", 1e-6)):
+        if seconds >= scale:
+            return f"{seconds / scale:.2f} {unit}"
+
+    return f"{seconds / 1e-9:.0f} ns"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument(
+        "-k",
+        dest="patterns",
+        action="append",
+        default=[],
+        help="only run the benchmarks whose name contains this (repeatable)",
     )
+    parser.add_argument("-o", "--output", help="save the results to this JSON file")
+    parser.add_argument("--compare", help="compare with the results in this JSON file")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--min-time", type=float, default=0.2)
+    parser.add_argument("--list", action="store_true", help="list the benchmarks")
+    args = parser.parse_args(argv)
+    names = select(args.patterns)
+
+    if args.list:
+        print("\n".join(names))
+
+        return 0
+
+    baseline = {}
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)["benchmarks"]
+
+    results = {}
+
+    for name in names:
+        func = BENCHMARKS[name]()
+
+        if isinstance(func, str):
+            result = run_import_benchmark(func, args.repeat)
+        else:
+            result = run_benchmark(func, args.repeat, args.min_time)
+        results[name] = result
+        line = f"{name:40} {_format(result['best']):>12}"
+
+        if name in baseline:
+            # Above 1 is slower than the baseline
+            ratio = result["best"] / baseline[name]["best"]
+            line += f"  {ratio:6.2f}x"
+        print(line, flush=True)
 
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"metadata": metadata(), "benchmarks": results}, f, indent=2)
 
-def simple_app(environ, start_response):
-    resp = Response("Hello world!")
-    return resp(environ, start_response)
+    return 0
 
 
 if __name__ == "__main__":
-    import os
-    import signal
-    import sys
-
-    if sys.argv[1:]:
-        arg = sys.argv[1]
-    else:
-        arg = None
-    if arg in ["open", "run"]:
-        import subprocess
-        import time
-        import webbrowser
-
-        os.environ["SHOW_OUTPUT"] = "0"
-        proc = subprocess.Popen([sys.executable, __file__])
-        time.sleep(1)
-        subprocess.call(["ab", "-n", "1000", "http://localhost:8080/"])
-        if arg == "open":
-            webbrowser.open("http://localhost:8080/__profile__")
-        print("Hit ^C to end")
-        try:
-            while 1:
-                input()
-        finally:
-            os.kill(proc.pid, signal.SIGKILL)
-    else:
-        from paste.httpserver import serve
-
-        if os.environ.get("SHOW_OUTPUT") != "0":
-            print("Note you can also use:)")
-            print(f"  {sys.executable} {__file__} open")
-            print('to run ab and open a browser (or "run" to just run ab)')
-            print("Now do:")
-            print("ab -n 1000 http://localhost:8080/")
-            print("wget -O - http://localhost:8080/__profile__")
-        serve(make_middleware(simple_app))
+    sys.exit(main())
@@ -0,0 +1,391 @@
+import asyncio
+import json
+import sys
+
+import pytest
+
+from webob.asgi import (
+    ASGIApp,
+    ASGIInput,
+    ASGIRequest,
+    environ_from_scope,
+    send_response,
+)
+from webob.dec import wsgify
+from webob.request import DisconnectionError
+from webob.response import Response
+
+
+def make_scope(path="/", method="GET", headers=(), query_string=b"", **kw):
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": method,
+        "scheme": "http",
+        "path": path,
+        "root_path": "",
+        "query_string": query_string,
+        "headers": [(k.encode("latin-1"), v.encode("latin-1")) for k, v in headers],
+        "client": ("127.0.0.1", 5000),
+        "server": ("example.com", 8000),
+    }
+    scope.update(kw)
+
+    return scope
+
+
+def make_receive(*chunks, disconnect=False):
+    messages = [
+        {"type": "http.request", "body": chunk, "more_body": i < len(chunks) - 1}
+        for i, chunk in enumerate(chunks or [b""])
+    ]
+
+    if disconnect:
+        messages[-1]["more_body"] = True
+        messages.append({"type": "http.disconnect"})
+
+    async def receive():
+        return messages.pop(0)
+
+    return receive
+
+
+class Sent(list):
+    async def __call__(self, message):
+        self.append(message)
+
+    @property
+    def status(self):
+        return self[0]["status"]
+
+    @property
+    def headers(self):
+        return dict(self[0]["headers"])
+
+    @property
+    def body(self):
+        return b"".join(m["body"] for m in self[1:])
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def call(app, scope, receive=None):
+    sent = Sent()
+    run(app(scope, receive or make_receive(), sent))
+
+    return sent
+
+
+def test_environ_from_scope():
+    scope = make_scope(
+        "/app/café",
+        query_string=b"a=1",
+        root_path="/app",
+        headers=[
+            ("host", "example.com:8000"),
+            ("content-type", "text/plain"),
+            ("x-forwarded-for", "1.1.1.1"),
+            ("x-forwarded-for", "2.2.2.2"),
+            ("cookie", "a=1"),
+            ("cookie", "b=2"),
+        ],
+    )
+    environ = environ_from_scope(scope)
+    assert environ["SCRIPT_NAME"] == "/app"
+    assert environ["PATH_INFO"] == "/café".encode().decode("latin-1")
+    assert environ["QUERY_STRING"] == "a=1"
+    assert environ["SERVER_NAME"] == "example.com"
+    assert environ["SERVER_PORT"] == "8000"
+    assert environ["REMOTE_ADDR"] == "127.0.0.1"
+    assert environ["CONTENT_TYPE"] == "text/plain"
+    assert environ["HTTP_X_FORWARDED_FOR"] == "1.1.1.1, 2.2.2.2"
+    assert environ["HTTP_COOKIE"] == "a=1; b=2"
+    assert environ["asgi.scope"] is scope
+    req = ASGIRequest(environ)
+    assert req.path_info == "/café"
+    assert req.url == "http://example.com:8000/app/caf%C3%A9?a=1"
+    assert req.cookies == {"a": "1", "b": "2"}
+    assert req.scope is scope
+
+
+def test_environ_from_scope_minimal():
+    environ = environ_from_scope({"type": "http", "method": "GET", "path": "/"})
+    assert environ["SERVER_NAME"] == "localhost"
+    assert environ["SERVER_PORT"] == "80"
+    assert "REMOTE_ADDR" not in environ
+
+
+def test_load_body_lazy_post():
+    scope = make_scope(
+        method="POST",
+        headers=[
+            ("content-type", "application/x-www-form-urlencoded"),
+            ("content-length", "7"),
+        ],
+    )
+    req = ASGIRequest.from_scope(scope, make_receive(b"a=1", b"&b=2"))
+    with pytest.raises(RuntimeError):
+        req.body
+
+    run(req.load_body())
+    assert req.POST["b"] == "2"
+    assert req.body == b"a=1&b=2"
+    run(req.load_body())
+    assert req.body == b"a=1&b=2"
+
+
+def test_load_body_chunked_json():
+    scope = make_scope(method="POST", headers=[("content-type", "application/json")])
+    req = ASGIRequest.from_scope(scope, make_receive(b'{"a": ', b"[1, 2]}"))
+    run(req.load_body())
+    assert req.content_length == 13
+    assert req.json_body == {"a": [1, 2]}
+
+
+def test_load_body_tempfile():
+    class BigRequest(ASGIRequest):
+        request_body_tempfile_limit = 4
+
+    scope = make_scope(method="PUT", headers=[("content-length", "10")])
+    req = BigRequest.from_scope(scope, make_receive(b"01234", b"56789"))
+    run(req.load_body())
+    assert not isinstance(req.body_file_raw, __import__("io").BytesIO)
+    assert req.body == b"0123456789"
+    req.body_file_raw.close()
+
+
+def test_body_stream():
+    scope = make_scope(method="POST", headers=[("content-length", "10")])
+    req = ASGIRequest.from_scope(scope, make_receive(b"01234", b"56789"))
+    assert isinstance(req.body_stream, ASGIInput)
+
+    async def read():
+        first = await req.body_stream.aread(3)
+        second = await req.body_stream.aread(4)
+        rest = await req.body_stream.aread()
+
+        return first, second, rest
+
+    assert run(read()) == (b"012", b"3456", b"789")
+
+
+def test_body_stream_read_all():
+    receive = make_receive(b"01234", b"", b"56789")
+    stream = ASGIInput(receive)
+    assert repr(stream) == "<ASGIInput for %r>" % receive
+    assert run(stream.aread()) == b"0123456789"
+    assert stream.complete
+
+    with pytest.raises(RuntimeError):
+        stream.read()
+
+
+def test_body_stream_partial_then_load():
+    scope = make_scope(method="POST", headers=[("content-length", "10")])
+    req = ASGIRequest.from_scope(scope, make_receive(b"01234", b"56789"))
+
+    async def read():
+        head = await req.body_stream.aread(2)
+        await req.load_body()
+
+        return head
+
+    assert run(read()) == b"01"
+    assert req.body == b"23456789"
+
+
+def test_body_stream_disconnect():
+    req = ASGIRequest.from_scope(
+        make_scope(method="POST"), make_receive(b"abc", disconnect=True)
+    )
+
+    async def read():
+        return [chunk async for chunk in req.body_stream]
+
+    with pytest.raises(DisconnectionError):
+        run(read())
+
+
+@pytest.mark.parametrize("threaded", [True, False])
+def test_asgi_app(threaded):
+    @wsgify
+    def app(req):
+        return Response(json_body={"path": req.path, "body": req.text})
+
+    scope = make_scope("/x", method="POST", headers=[("content-length", "2")])
+    sent = call(ASGIApp(app, threaded=threaded), scope, make_receive(b"hi"))
+    assert sent.status == 200
+    assert sent.headers[b"content-type"] == b"application/json"
+    assert len(sent) == 2
+    assert sent[1]["more_body"] is False
+    assert json.loads(sent.body) == {"path": "/x", "body": "hi"}
+
+
+@pytest.mark.parametrize("threaded", [True, False])
+def test_asgi_app_streamed(threaded):
+    closed = []
+
+    def app(environ, start_response):
+        def body():
+            start_response("201 Created", [("X-Thing", "1")])
+            try:
+                yield b"a"
+                yield b""
+                yield b"b"
+            finally:
+                closed.append(True)
+
+        return body()
+
+    sent = call(ASGIApp(app, threaded=threaded), make_scope())
+    assert sent.status == 201
+    assert sent.headers == {b"x-thing": b"1"}
+    assert [m["body"] for m in sent[1:]] == [b"a", b"b", b""]
+    assert sent[-1]["more_body"] is False
+    assert closed == [True]
+
+
+def test_asgi_app_list_body():
+    class MyRequest(ASGIRequest):
+        pass
+
+    def app(environ, start_response):
+        start_response("200 OK", [("Content-Type", "text/plain")])
+
+        return [b"a", b"", bytearray(b"b"), b"c"]
+
+    wrapped = ASGIApp(app, RequestClass=MyRequest)
+    assert wrapped.RequestClass is MyRequest
+    assert repr(wrapped).startswith("<ASGIApp at ")
+    assert repr(wrapped).endswith("wrapping %r>" % app)
+    sent = call(wrapped, make_scope())
+    assert [m["body"] for m in sent[1:]] == [b"a", b"b", b"c"]
+    assert [m["more_body"] for m in sent[1:]] == [True, True, False]
+
+
+def test_asgi_app_write_unsupported():
+    def app(environ, start_response):
+        write = start_response("200 OK", [])
+        write(b"x")
+
+    with pytest.raises(NotImplementedError):
+        call(ASGIApp(app, threaded=False), make_scope())
+
+
+def test_asgi_app_start_response_exc_info():
+    def app(environ, start_response):
+        start_response("200 OK", [])
+
+        try:
+            raise ValueError("late")
+        except ValueError:
+            start_response("500 Internal Server Error", [], sys.exc_info())
+
+    with pytest.raises(ValueError, match="late"):
+        call(ASGIApp(app), make_scope())
+
+
+def test_asgi_app_head_and_conditional():
+    app = ASGIApp(
+        wsgify(lambda req: Response("hello", etag="x", conditional_response=True))
+    )
+    sent = call(app, make_scope(method="HEAD"))
+    assert sent.status == 200
+    assert sent.headers[b"content-length"] == b"5"
+    assert sent.body == b""
+    sent = call(app, make_scope(headers=[("if-none-match", '"x"')]))
+    assert sent.status == 304
+
+
+def test_asgi_app_no_start_response():
+    with pytest.raises(RuntimeError):
+        call(ASGIApp(lambda environ, start_response: [b""]), make_scope())
+
+
+def test_asgi_app_lifespan():
+    messages = [{"type": "lifespan.startup"}, {"type": "lifespan.shutdown"}]
+
+    async def receive():
+        return messages.pop(0)
+
+    sent = Sent()
+    run(ASGIApp(None)({"type": "lifespan"}, receive, sent))
+    assert [m["type"] for m in sent] == [
+        "lifespan.startup.complete",
+        "lifespan.shutdown.complete",
+    ]
+
+
+def test_asgi_app_websocket_unsupported():
+    with pytest.raises(ValueError):
+        call(ASGIApp(None), {"type": "websocket"})
+
+
+def test_send_response():
+    req = ASGIRequest.from_scope(make_scope("/a"))
+    resp = Response(location="/b", status=302)
+    sent = Sent()
+    run(send_response(resp, sent, req.environ))
+    assert sent.status == 302
+    assert sent.headers[b"location"] == b"http://example.com:8000/b"
+
+
+def test_async_wsgify_and_async_body():
+    log = []
+
+    @wsgify
+    async def app(req):
+        await req.load_body()
+
+        async def body():
+            try:
+                yield b"got "
+                yield req.body
+            finally:
+                log.append("closed")
+
+        return Response(app_iter=body(), content_type="text/plain")
+
+    sent = call(ASGIApp(app), make_scope(method="POST"), make_receive(b"x", b"y"))
+    assert sent.status == 200
+    assert sent.body == b"got xy"
+    assert sent[-1]["more_body"] is False
+    assert log == ["closed"]
+
+
+def test_async_wsgify_under_sync_middleware():
+    import threading
+
+    threads = []
+
+    @wsgify
+    async def app(req):
+        threads.append(threading.current_thread())
+
+        return Response("async " + req.text)
+
+    def middleware(environ, start_response):
+        return app(environ, start_response)
+
+    sent = call(
+        ASGIApp(middleware, threaded=False),
+        make_scope(method="POST"),
+        make_receive(b"body"),
+    )
+    assert sent.status == 200
+    assert sent.body == b"async body"
+    assert threads[0] is not threading.current_thread()
+
+
+def test_async_wsgify_exception():
+    from webob.exc import HTTPForbidden
+
+    @wsgify
+    async def app(req):
+        raise HTTPForbidden()
+
+    sent = call(ASGIApp(app), make_scope())
+    assert sent.status == 403
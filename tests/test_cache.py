@@ -0,0 +1,477 @@
+import threading
+
+import pytest
+
+from webob.cache import ResponseCache, auto_etag, response_cache
+from webob.dec import wsgify
+from webob.request import Request
+from webob.response import Response
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class CountingApp:
+    def __init__(self, **kw):
+        self.calls = []
+        self.kw = kw
+        self.body = b"hello"
+
+    @wsgify
+    def __call__(self, req):
+        self.calls.append(req)
+        kw = dict(self.kw)
+        etag = kw.get("etag")
+
+        if etag is not None and etag in req.if_none_match:
+            resp = Response(status=304, etag=etag)
+
+            if "cache_control" in kw:
+                resp.cache_control = kw["cache_control"]
+
+            return resp
+
+        return Response(self.body, **kw)
+
+
+def make_app(cache=None, **kw):
+    inner = CountingApp(**kw)
+
+    if cache is None:
+        cache = ResponseCache()
+    cache.clock = Clock()
+    cache._spawn = lambda func: func()
+
+    return inner, cache, response_cache(inner, cache=cache)
+
+
+def get(app, path="/", **kw):
+    return Request.blank(path, **kw).get_response(app)
+
+
+def test_fresh_response_is_served_from_cache():
+    inner, cache, app = make_app(cache_control="max-age=60")
+    resp = get(app)
+    assert resp.body == b"hello"
+    assert resp.headers["Age"] == "0"
+    cache.clock.now += 10
+    resp = get(app)
+    assert resp.body == b"hello"
+    assert resp.headers["Age"] == "10"
+    assert len(inner.calls) == 1
+    assert len(cache) == 1
+
+
+def test_query_string_is_part_of_key():
+    inner, cache, app = make_app(cache_control="max-age=60")
+    get(app, "/?a=1")
+    get(app, "/?a=2")
+    get(app, "/?a=1")
+    assert len(inner.calls) == 2
+
+
+def test_head_served_from_get():
+    inner, cache, app = make_app(cache_control="max-age=60")
+    resp = get(app, method="HEAD")
+    assert resp.body == b""
+    assert inner.calls[0].method == "GET"
+    resp = get(app)
+    assert resp.body == b"hello"
+    assert len(inner.calls) == 1
+
+
+def test_conditional_request_answered_by_cache():
+    inner, cache, app = make_app(cache_control="max-age=60", etag="abc")
+    get(app)
+    resp = get(app, if_none_match='"abc"')
+    assert resp.status_code == 304
+    assert len(inner.calls) == 1
+    resp = get(app, range=(1, 3))
+    assert resp.status_code == 206
+    assert resp.body == b"el"
+    assert len(inner.calls) == 1
+
+
+def test_client_conditionals_not_forwarded_on_fill():
+    inner, cache, app = make_app(cache_control="max-age=60", etag="abc")
+    resp = get(app, if_none_match='"abc"')
+    assert resp.status_code == 304
+    assert not inner.calls[0].if_none_match
+    assert get(app).body == b"hello"
+    assert len(inner.calls) == 1
+
+
+@pytest.mark.parametrize(
+    "kw",
+    [
+        {},
+        {"cache_control": "no-store, max-age=60"},
+        {"cache_control": "private, max-age=60"},
+        {"cache_control": "max-age=60", "vary": "*"},
+        {"cache_control": "max-age=60", "status": 500},
+        {"cache_control": "no-cache"},
+        {"cache_control": "max-age=0"},
+    ],
+)
+def test_not_stored(kw):
+    inner, cache, app = make_app(**kw)
+    get(app)
+    get(app)
+    assert len(inner.calls) == 2
+    assert len(cache) == 0
+
+
+def test_set_cookie_not_stored():
+    @wsgify
+    def inner(req):
+        resp = Response("hi", cache_control="max-age=60")
+        resp.set_cookie("a", "b")
+
+        return resp
+
+    cache = ResponseCache()
+    app = response_cache(inner, cache=cache)
+    get(app)
+    assert len(cache) == 0
+
+
+def test_s_maxage_wins_over_max_age():
+    inner, cache, app = make_app(cache_control="max-age=0, s-maxage=60")
+    get(app)
+    get(app)
+    assert len(inner.calls) == 1
+
+
+def test_expires():
+    from datetime import datetime, timedelta
+
+    from webob.datetime_utils import UTC
+
+    now = datetime.now(UTC).replace(microsecond=0)
+    inner, cache, app = make_app(date=now, expires=now + timedelta(seconds=30))
+    get(app)
+    cache.clock.now += 20
+    get(app)
+    assert len(inner.calls) == 1
+    cache.clock.now += 20
+    get(app)
+    assert len(inner.calls) == 2
+
+
+def test_vary():
+    inner, cache, app = make_app(cache_control="max-age=60", vary="Accept-Language")
+    get(app, headers={"Accept-Language": "en"})
+    get(app, headers={"Accept-Language": "fr"})
+    get(app, headers={"Accept-Language": "en"})
+    get(app, headers={"Accept-Language": "fr"})
+    assert len(inner.calls) == 2
+    assert len(cache) == 2
+
+
+def test_request_no_cache_and_no_store():
+    inner, cache, app = make_app(cache_control="max-age=60")
+    get(app)
+    get(app, headers={"Cache-Control": "no-store"})
+    assert len(inner.calls) == 2
+    get(app, headers={"Cache-Control": "no-cache"})
+    assert len(inner.calls) == 3
+    cache.clock.now += 10
+    get(app, headers={"Cache-Control": "max-age=5"})
+    assert len(inner.calls) == 4
+    get(app, headers={"Cache-Control": "max-age=5"})
+    assert len(inner.calls) == 4
+
+
+def test_bypass_authorization():
+    inner, cache, app = make_app(cache_control="max-age=60")
+    get(app, headers={"Authorization": "Basic Zm9vOmJhcg=="})
+    assert len(cache) == 0
+
+
+def test_unsafe_method_invalidates():
+    inner, cache, app = make_app(cache_control="max-age=60")
+    get(app)
+    get(app, method="POST")
+    assert len(cache) == 0
+    get(app)
+    assert len(inner.calls) == 3
+
+
+def test_stale_revalidated_with_etag():
+    inner, cache, app = make_app(cache_control="max-age=60", etag="abc")
+    get(app)
+    cache.clock.now += 100
+    resp = get(app)
+    assert resp.status_code == 200
+    assert resp.body == b"hello"
+    assert resp.headers["Age"] == "0"
+    assert inner.calls[1].if_none_match.etags == ["abc"]
+    get(app)
+    assert len(inner.calls) == 2
+
+
+def test_stale_replaced_when_changed():
+    inner, cache, app = make_app(cache_control="max-age=60", etag="abc")
+    get(app)
+    cache.clock.now += 100
+    inner.kw["etag"] = "def"
+    inner.body = b"world"
+    assert get(app).body == b"world"
+    assert get(app).body == b"world"
+    assert len(inner.calls) == 2
+    assert len(cache) == 1
+
+
+def test_stale_dropped_when_no_longer_cacheable():
+    inner, cache, app = make_app(cache_control="max-age=60")
+    get(app)
+    cache.clock.now += 100
+    inner.kw["cache_control"] = "no-store"
+    assert get(app).body == b"hello"
+    assert len(cache) == 0
+
+
+def test_stale_while_revalidate():
+    inner, cache, app = make_app(
+        cache_control="max-age=60, stale-while-revalidate=30", etag="abc"
+    )
+    spawned = []
+    cache._spawn = spawned.append
+    get(app)
+    cache.clock.now += 70
+    resp = get(app)
+    assert resp.headers["Age"] == "70"
+    assert len(inner.calls) == 1
+    assert len(spawned) == 1
+    # Only one revalidation at a time
+    get(app)
+    assert len(spawned) == 1
+    spawned[0]()
+    assert len(inner.calls) == 2
+    assert get(app).headers["Age"] == "0"
+    cache.clock.now += 100
+    get(app)
+    assert len(spawned) == 1
+    assert len(inner.calls) == 3
+
+
+def test_stale_revalidated_with_last_modified():
+    inner, cache, app = make_app(
+        cache_control="max-age=60", last_modified="Wed, 01 Jan 2020 00:00:00 GMT"
+    )
+    get(app)
+    cache.clock.now += 100
+    assert get(app).body == b"hello"
+    assert inner.calls[-1].environ["HTTP_IF_MODIFIED_SINCE"] == (
+        "Wed, 01 Jan 2020 00:00:00 GMT"
+    )
+    assert "HTTP_IF_NONE_MATCH" not in inner.calls[-1].environ
+
+
+def test_stale_variant_dropped_keeps_others():
+    inner, cache, app = make_app(cache_control="max-age=60", vary="Accept")
+    get(app, headers={"Accept": "text/html"})
+    get(app, headers={"Accept": "text/plain"})
+    assert len(cache) == 2
+    cache.clock.now += 100
+    inner.kw["cache_control"] = "no-store"
+    get(app, headers={"Accept": "text/html"})
+    assert len(cache) == 1
+    inner.kw["cache_control"] = "max-age=60"
+    get(app, headers={"Accept": "text/plain"})
+    assert len(inner.calls) == 4
+
+
+def test_stale_while_revalidate_dropped_when_no_longer_cacheable():
+    inner, cache, app = make_app(cache_control="max-age=60, stale-while-revalidate=30")
+    spawned = []
+    cache._spawn = spawned.append
+    get(app)
+    cache.clock.now += 70
+    inner.kw["cache_control"] = "no-store"
+    assert get(app).body == b"hello"
+    spawned[0]()
+    assert len(inner.calls) == 2
+    assert len(cache) == 0
+    assert cache._flights == {}
+
+
+def test_spawn_runs_in_thread():
+    done = threading.Event()
+    threads = []
+
+    def func():
+        threads.append(threading.current_thread())
+        done.set()
+
+    ResponseCache()._spawn(func)
+    assert done.wait(5)
+    assert threads[0] is not threading.current_thread()
+    assert threads[0].daemon
+
+
+def test_stale_while_revalidate_ignored_with_must_revalidate():
+    inner, cache, app = make_app(
+        cache_control="max-age=60, stale-while-revalidate=30, must-revalidate"
+    )
+    get(app)
+    cache.clock.now += 70
+    get(app)
+    assert len(inner.calls) == 2
+
+
+def test_lru_eviction_by_count():
+    inner, cache, app = make_app(
+        cache=ResponseCache(max_entries=2), cache_control="max-age=60"
+    )
+    get(app, "/a")
+    get(app, "/b")
+    get(app, "/a")
+    get(app, "/c")
+    assert len(cache) == 2
+    get(app, "/a")
+    assert len(inner.calls) == 3
+    get(app, "/b")
+    assert len(inner.calls) == 4
+
+
+def test_eviction_by_size():
+    inner, cache, app = make_app(
+        cache=ResponseCache(max_size=200, max_entry_size=150),
+        cache_control="max-age=60",
+    )
+    inner.body = b"x" * 100
+    get(app, "/a")
+    get(app, "/b")
+    assert len(cache) == 1
+    assert cache.size <= 200
+    inner.body = b"x" * 200
+    get(app, "/c")
+    assert len(cache) == 1
+
+
+def test_streamed_body_size():
+    inner, cache, app = make_app(
+        cache=ResponseCache(max_entry_size=150), cache_control="max-age=60"
+    )
+
+    @wsgify
+    def streamed(req):
+        inner.calls.append(req)
+        size = int(req.path_info.strip("/"))
+
+        return Response(app_iter=iter([b"x" * size]), cache_control="max-age=60")
+
+    app = response_cache(streamed, cache=cache)
+    resp = get(app, "/100")
+    assert resp.content_length == 100
+    assert len(cache) == 1
+    assert get(app, "/100").body == b"x" * 100
+    assert len(get(app, "/200").body) == 200
+    assert len(cache) == 1
+    get(app, "/0")
+    assert get(app, "/0").content_length == 0
+    assert len(cache) == 2
+    assert len(inner.calls) == 3
+
+
+def test_clear_and_invalidate():
+    inner, cache, app = make_app(cache_control="max-age=60")
+    get(app, "/a")
+    get(app, "/b")
+    cache.invalidate("http://localhost/a")
+    assert len(cache) == 1
+    cache.clear()
+    assert len(cache) == 0
+    assert cache.size == 0
+
+
+def test_single_flight():
+    started = threading.Event()
+    release = threading.Event()
+    calls = []
+
+    @wsgify
+    def inner(req):
+        calls.append(req)
+        started.set()
+        release.wait(5)
+
+        return Response("slow", cache_control="max-age=60")
+
+    cache = ResponseCache()
+    app = response_cache(inner, cache=cache)
+    results = []
+
+    def worker():
+        results.append(get(app).body)
+
+    threads = [threading.Thread(target=worker) for i in range(4)]
+    threads[0].start()
+    started.wait(5)
+
+    for thread in threads[1:]:
+        thread.start()
+
+    release.set()
+
+    for thread in threads:
+        thread.join(5)
+    assert results == [b"slow"] * 4
+    assert len(calls) == 1
+
+
+def test_single_flight_follower_fetches_when_nothing_stored():
+    inner, cache, app = make_app()
+    # Another request is fetching the URL, and stores nothing
+    flight = cache._flights["http://localhost/"] = threading.Event()
+    flight.set()
+    assert get(app).body == b"hello"
+    assert len(inner.calls) == 1
+    assert cache._flights["http://localhost/"] is flight
+
+
+def test_repr():
+    inner, cache, app = make_app(cache_control="max-age=60")
+    get(app)
+    assert repr(cache) == "<ResponseCache 1 entries, %d bytes>" % cache.size
+
+
+def test_auto_etag():
+    calls = []
+
+    @wsgify
+    def inner(req):
+        calls.append(req)
+
+        return Response("hello")
+
+    app = auto_etag(inner)
+    resp = get(app)
+    assert resp.etag
+    etag = resp.etag
+    resp = get(app, if_none_match='"%s"' % etag)
+    assert resp.status_code == 304
+    assert resp.body == b""
+    assert len(calls) == 2
+
+
+def test_auto_etag_leaves_streamed_and_tagged_responses():
+    @wsgify
+    def inner(req):
+        if req.path == "/stream":
+            return Response(app_iter=iter([b"a", b"b"]))
+
+        return Response("tagged", etag="own")
+
+    app = auto_etag(inner, algorithm="sha256")
+    resp = get(app, "/stream")
+    assert resp.etag is None
+    assert resp.body == b"ab"
+    assert get(app).etag == "own"
+    assert get(app, method="POST").etag == "own"
@@ -280,3 +280,41 @@ class TestCacheControl:
     def test_repr(self):
         cc = self.make_one({"a": "1"}, "typ")
         assert repr(cc) == "<CacheControl 'a=1'>"
+
+    def test_batch(self):
+        from webob.cachecontrol import CacheControl
+
+        calls = []
+        cc = CacheControl.parse("", updates_to=calls.append, type="response")
+
+        with cc.batch() as batch_cc:
+            assert batch_cc is cc
+            cc.public = True
+            cc.max_age = 10
+
+            with cc.batch():
+                cc.s_maxage = 20
+            assert calls == []
+        assert calls == [cc]
+        assert str(cc) == "max-age=10, public, s-maxage=20"
+
+    def test_batch_updates_on_error(self):
+        from webob.cachecontrol import CacheControl
+
+        calls = []
+        cc = CacheControl.parse("", updates_to=calls.append, type="response")
+
+        with pytest.raises(ValueError):
+            with cc.batch():
+                cc.max_age = 10
+                raise ValueError
+        assert calls == [cc]
+        cc.public = True
+        assert calls == [cc, cc]
+
+    def test_batch_unbound(self):
+        cc = self.make_one({}, "response")
+
+        with cc.batch():
+            cc.max_age = 10
+        assert str(cc) == "max-age=10"
@@ -112,6 +112,29 @@ class TestSendRequest:
         assert inst.start_response_called
         assert list(iterable) == [b"foo"]
 
+    def test___call___small_body_is_read(self):
+        environ = self._makeEnviron(
+            {"wsgi.input": io.BytesIO(b"abcdef"), "CONTENT_LENGTH": "4"}
+        )
+        conn_factory = DummyConnectionFactory(DummyResponse("msg"))
+        inst = self._makeOne(HTTPConnection=conn_factory)
+        inst(environ, lambda status, headers: None)
+        assert conn_factory.request.body == b"abcd"
+
+    def test___call___large_body_is_streamed(self):
+        from webob.request import LimitedLengthFile
+
+        environ = self._makeEnviron(
+            {"wsgi.input": io.BytesIO(b"abcdef"), "CONTENT_LENGTH": "4"}
+        )
+        conn_factory = DummyConnectionFactory(DummyResponse("msg"))
+        inst = self._makeOne(HTTPConnection=conn_factory)
+        inst.body_buffer_size = 2
+        inst(environ, lambda status, headers: None)
+        body = conn_factory.request.body
+        assert isinstance(body, LimitedLengthFile)
+        assert body.read() == b"abcd"
+
     def test___call___with_webob_client_timeout_and_timeout_supported(self):
         environ = self._makeEnviron()
         environ["webob.client.timeout"] = 10
@@ -268,4 +291,5 @@ class DummyRequestFactory:
         self.kw = kw
 
     def __call__(self, method, path, body, headers):
+        self.body = body
         return self
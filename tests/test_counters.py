@@ -0,0 +1,100 @@
+import io
+import threading
+
+from webob.counters import counters, reset_counters
+from webob.request import Request
+
+
+def test_parse_counters():
+    reset_counters()
+    req = Request.blank(
+        "/?a=1",
+        POST={"b": "2"},
+        headers={"Cookie": "c=3", "Cache-Control": "no-cache"},
+    )
+
+    for i in range(2):
+        req.GET
+        req.POST
+        req.cookies.get("c")
+        req.cache_control.no_cache
+    req.body = b"b=3"
+    req.POST
+    assert counters() == {
+        "get_parses": 1,
+        "get_cache_hits": 1,
+        "post_parses": 2,
+        "post_cache_hits": 1,
+        "post_reparses": 1,
+        "cookie_parses": 1,
+        "cookie_cache_hits": 1,
+        "cache_control_parses": 1,
+        "cache_control_cache_hits": 1,
+    }
+
+
+def test_body_counters():
+    reset_counters()
+    req = Request.blank("/", method="PUT")
+    req.body_file_raw = io.BytesIO(b"x" * 100)
+    req.content_length = 100
+    req.is_body_seekable = False
+    req.request_body_tempfile_limit = 50
+    req.copy_body()
+    req.body_file_raw.close()
+    assert counters() == {
+        "copy_body": 1,
+        "copy_body_bytes": 100,
+        "tempfile_spills": 1,
+    }
+    reset_counters()
+    assert counters() == {}
+
+
+def test_counters_per_thread():
+    reset_counters(all_threads=True)
+    started = threading.Event()
+    done = threading.Event()
+    seen = []
+
+    def worker():
+        Request.blank("/?a=1").GET
+        seen.append(counters())
+        started.set()
+        done.wait(5)
+
+    thread = threading.Thread(target=worker)
+    thread.start()
+    started.wait(5)
+    assert seen == [{"get_parses": 1}]
+    assert "get_parses" not in counters()
+    assert counters(all_threads=True)["get_parses"] == 1
+    done.set()
+    thread.join(5)
+    # A new thread retires the counters of the threads that have ended
+    other = threading.Thread(target=lambda: Request.blank("/?b=1").GET)
+    other.start()
+    other.join(5)
+    assert counters(all_threads=True)["get_parses"] == 2
+    reset_counters(all_threads=True)
+    assert counters(all_threads=True) == {}
+
+
+def test_counters_of_ended_thread_with_same_ident():
+    from webob import counters as module
+
+    reset_counters(all_threads=True)
+    seen = []
+
+    def worker():
+        # Thread identifiers are reused: an ended thread had this one
+        with module._lock:
+            module._threads[threading.get_ident()] = {"get_parses": 1}
+        Request.blank("/?a=1").GET
+        seen.append(counters(all_threads=True))
+
+    thread = threading.Thread(target=worker)
+    thread.start()
+    thread.join(5)
+    assert seen == [{"get_parses": 2}]
+    reset_counters(all_threads=True)
@@ -321,3 +321,147 @@ class TestDecorator:
 
         app = mw(Response())
         assert app(Request.blank("/")) == "foo"
+
+    def test_validator_etag_not_modified(self):
+        calls = []
+
+        @wsgify(validator=lambda req: "v1")
+        def test_app(req):
+            calls.append(req)
+
+            return "body"
+
+        resp = Request.blank("/", if_none_match='"v1"').get_response(test_app)
+        assert resp.status_code == 304
+        assert resp.etag == "v1"
+        assert calls == []
+
+        resp = Request.blank("/", if_none_match='"v0"').get_response(test_app)
+        assert resp.status_code == 200
+        assert resp.body == b"body"
+        assert resp.etag == "v1"
+        assert len(calls) == 1
+
+    def test_validator_last_modified(self):
+        from datetime import datetime
+
+        from webob.datetime_utils import UTC
+
+        last_modified = datetime(2020, 1, 1, 12, 0, 0, 500, tzinfo=UTC)
+
+        @wsgify(validator=lambda req: last_modified)
+        def test_app(req):
+            return Response("body")
+
+        resp = Request.blank(
+            "/", if_modified_since=last_modified.replace(microsecond=0)
+        ).get_response(test_app)
+        assert resp.status_code == 304
+        assert resp.last_modified == last_modified.replace(microsecond=0)
+
+        resp = Request.blank(
+            "/", if_modified_since=datetime(2019, 1, 1, tzinfo=UTC)
+        ).get_response(test_app)
+        assert resp.status_code == 200
+        assert resp.last_modified == last_modified.replace(microsecond=0)
+
+    def test_validator_tuple_etag_wins(self):
+        @wsgify(validator=lambda req: ("v1", 0))
+        def test_app(req):
+            return Response("body", etag="own")
+
+        req = Request.blank("/", if_none_match='"v0"', if_modified_since=10)
+        resp = req.get_response(test_app)
+        assert resp.status_code == 200
+        assert resp.etag == "own"
+        assert resp.last_modified.year == 1970
+
+    def test_validator_unsafe_method(self):
+        @wsgify(validator=lambda req: "v1")
+        def test_app(req):
+            return "body"
+
+        req = Request.blank("/", method="POST", if_none_match='"v1"')
+        assert req.get_response(test_app).status_code == 200
+
+    def test_validator_none(self):
+        @wsgify(validator=lambda req: None)
+        def test_app(req):
+            return "body"
+
+        resp = Request.blank("/", if_none_match='"v1"').get_response(test_app)
+        assert resp.status_code == 200
+        assert resp.etag is None
+
+    def test_validator_wsgi_app_result(self):
+        def wsgi_app(environ, start_response):
+            start_response("200 OK", [("Content-Type", "text/plain")])
+
+            return [b"body"]
+
+        @wsgify(validator=lambda req: "v1")
+        def test_app(req):
+            return wsgi_app
+
+        resp = Request.blank("/").get_response(test_app)
+        assert resp.body == b"body"
+        assert resp.etag is None
+
+    def test_validator_direct_call_and_clone(self):
+        class App:
+            @wsgify(validator=lambda req: "v1")
+            def view(self, req):
+                return Response("body")
+
+        app = App()
+        resp = app.view(Request.blank("/", if_none_match='"v1"'))
+        assert resp.status_code == 304
+        resp = app.view(Request.blank("/"))
+        assert resp.etag == "v1"
+
+    def test_async_function(self):
+        @wsgify
+        async def test_app(req):
+            req.response.set_cookie("a", "b")
+
+            return Response("async %s" % req.path_info)
+
+        assert test_app.is_async
+        resp = Request.blank("/x").get_response(test_app)
+        assert resp.body == b"async /x"
+        assert "a=b" in resp.headers["Set-Cookie"]
+
+    def test_async_function_returns_text_and_raises(self):
+        from webob.exc import HTTPNotFound
+
+        @wsgify(validator=lambda req: "v1")
+        async def test_app(req):
+            if req.path_info == "/missing":
+                raise HTTPNotFound()
+
+            return "text"
+
+        resp = Request.blank("/").get_response(test_app)
+        assert resp.body == b"text"
+        assert resp.etag == "v1"
+        assert Request.blank("/missing").get_response(test_app).status_code == 404
+        req = Request.blank("/", if_none_match='"v1"')
+        assert req.get_response(test_app).status_code == 304
+
+    def test_async_direct_call_and_handle_async(self):
+        import asyncio
+
+        @wsgify
+        async def test_app(req):
+            return "direct"
+
+        assert asyncio.run(test_app(Request.blank("/"))) == "direct"
+        resp = asyncio.run(test_app.handle_async(Request.blank("/")))
+        assert resp.body == b"direct"
+
+    def test_sync_function_is_not_async(self):
+        @wsgify
+        def test_app(req):
+            return "sync"
+
+        assert not test_app.is_async
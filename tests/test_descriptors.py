@@ -475,6 +475,41 @@ def test_converter_date():
     assert desc.fget(req) == datetime.datetime(1994, 11, 15, 8, 12, 31, tzinfo=UTC)
 
 
+def test_converter_reuses_parsed_value():
+    from webob.descriptors import converter_date, environ_getter
+
+    req = Request.blank("/", headers={"Date": "Tue, 15 Nov 1994 08:12:31 GMT"})
+    desc = converter_date(environ_getter("HTTP_DATE", None, "14.8"))
+    first = desc.fget(req)
+    assert desc.fget(req) is first
+    req.environ["HTTP_DATE"] = "Wed, 16 Nov 1994 08:12:31 GMT"
+    second = desc.fget(req)
+    assert second is not first
+    assert second.day == 16
+    desc.fset(req, first)
+    assert desc.fget(req) == first
+
+
+def test_converter_does_not_share_mutable_values():
+    from webob.descriptors import converter, environ_getter
+
+    req = Request.blank("/", headers={"X-Foo": "a"})
+    desc = converter(environ_getter("HTTP_X_FOO"), lambda v: [v], str)
+    first = desc.fget(req)
+    first.append("b")
+    assert desc.fget(req) == ["a"]
+
+
+def test_converter_without_instance_dict():
+    from webob.descriptors import converter, parse_int, serialize_int
+
+    class Slotted:
+        __slots__ = ()
+
+    desc = converter(property(lambda r: "1"), parse_int, serialize_int)
+    assert desc.fget(Slotted()) == 1
+
+
 def test_converter_date_docstring():
     from webob.descriptors import converter_date, environ_getter
 
@@ -58,6 +58,14 @@ class Test_etag_properties:
         assert "KEY" not in req.environ
         assert req.environ["QUAY"] == "VALYOU"
 
+    def test_fget_reuses_parsed_value(self):
+        ep = etag_property("KEY", "DEFAULT", "RFC_SECTION")
+        req = self._makeDummyRequest(environ={"KEY": '"VALUE"'})
+        res = ep.fget(req)
+        assert ep.fget(req) is res
+        req.environ["KEY"] = '"OTHER"'
+        assert ep.fget(req).etags == ["OTHER"]
+
 
 class Test_AnyETag:
     def _getTargetClass(self):
@@ -111,6 +111,43 @@ def test_WSGIHTTPException_w_empty_body():
     assert "content_length" not in exc.__dict__
 
 
+def test_WSGIHTTPException_template_matches_response():
+    from webob.response import Response
+
+    for exc_class in (webob_exc.HTTPNotFound, webob_exc.HTTPNotModified):
+        exc = exc_class()
+        resp = Response(status=f"{exc.code} {exc.title}")
+
+        if exc.empty_body:
+            del resp.content_type
+            del resp.content_length
+        assert exc.status == resp.status
+        assert exc.headerlist == resp.headerlist
+        assert exc.app_iter == [b""]
+        assert exc.conditional_response is False
+
+
+def test_WSGIHTTPException_template_not_shared():
+    exc1 = webob_exc.HTTPNotFound()
+    exc1.headers["X-Foo"] = "bar"
+    exc2 = webob_exc.HTTPNotFound()
+    assert "X-Foo" not in exc2.headers
+    assert exc1.headerlist is not exc2.headerlist
+    assert exc1.app_iter is not exc2.app_iter
+
+
+def test_WSGIHTTPException_template_follows_class_attributes():
+    class Teapot(webob_exc.HTTPClientError):
+        code = 418
+        title = "I'm a teapot"
+
+    assert Teapot().status == "418 I'm a teapot"
+    Teapot.default_content_type = "text/plain"
+    exc = Teapot()
+    assert exc.content_type == "text/plain"
+    assert "_response_template" not in webob_exc.HTTPClientError.__dict__
+
+
 def test_WSGIHTTPException___str__():
     exc1 = webob_exc.WSGIHTTPException(detail="Detail")
     assert str(exc1) == "Detail"
@@ -616,3 +653,20 @@ def test_status_map_is_deterministic():
         (511, webob_exc.HTTPNetworkAuthenticationRequired),
     ):
         assert webob_exc.status_map[code] == cls
+
+
+def test_empty_body_strips_headers_given():
+    from webob.exc import HTTPNotModified
+
+    exc = HTTPNotModified(
+        headers=[
+            ("Content-Type", "text/html"),
+            ("Content-Length", "5"),
+            ("ETag", '"x"'),
+        ]
+    )
+    assert exc.headerlist == [("ETag", '"x"')]
+    exc = HTTPNotModified(
+        headers=[("Content-Type", "text/html"), ("ETag", '"x"')], charset="utf-8"
+    )
+    assert exc.headerlist == [("ETag", '"x"')]
@@ -130,3 +130,28 @@ def test__trans_key_key2header():
 def test__trans_key_httpheader():
     result = headers._trans_key("HTTP_FOO_BAR")
     assert result == "Foo-Bar"
+
+
+def test__trans_key_cached():
+    headers._trans_key.cache_clear()
+    assert headers._trans_key("HTTP_X_CACHED") == "X-Cached"
+    assert headers._trans_key("HTTP_X_CACHED") == "X-Cached"
+    assert headers._trans_key.cache_info().hits == 1
+
+
+def test__trans_name_cached():
+    headers._trans_name.cache_clear()
+    assert headers._trans_name("x-cached") == "HTTP_X_CACHED"
+    assert headers._trans_name("x-cached") == "HTTP_X_CACHED"
+    assert headers._trans_name.cache_info().hits == 1
+    assert headers._trans_name("content-type") == "CONTENT_TYPE"
+
+
+def test_EnvironHeaders_items_len_iter():
+    d = headers.EnvironHeaders(
+        {"CONTENT_TYPE": "text/plain", "HTTP_X_FOO": "bar", "SERVER_NAME": "x", 1: 2}
+    )
+    assert sorted(d.items()) == [("Content-Type", "text/plain"), ("X-Foo", "bar")]
+    assert ("X-Foo", "bar") in d.items()
+    assert len(d) == 2
+    assert sorted(d) == ["Content-Type", "X-Foo"]
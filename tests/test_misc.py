@@ -54,3 +54,40 @@ class t_esc_SuperMoose:
 )
 def test_html_escape(input, expected):
     assert expected == html_escape(input)
+
+
+def test_package_exports_are_lazy():
+    import os
+    import subprocess
+    import sys
+
+    code = (
+        "import sys, webob; "
+        "assert 'webob.request' not in sys.modules; "
+        "assert 'webob.acceptparse' not in sys.modules; "
+        "from webob.request import Request; "
+        "assert Request.ResponseClass.__module__ == 'webob.response'; "
+        "from webob import Response; "
+        "assert Request.ResponseClass is Response"
+    )
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(sys.path))
+    subprocess.run([sys.executable, "-c", code], env=env, check=True)
+
+
+def test_package_exports():
+    import webob
+    from webob.datetime_utils import UTC
+    from webob.request import BaseRequest, Request
+    from webob.response import Response
+
+    assert webob.Request is Request
+    assert webob.Response is Response
+    assert webob.UTC is UTC
+    assert BaseRequest.ResponseClass is Response
+    assert "Request" in dir(webob)
+
+    for name in webob.__all__:
+        getattr(webob, name)
+
+    with pytest.raises(AttributeError):
+        webob.missing
@@ -0,0 +1,51 @@
+import json
+
+import pytest
+
+import performance_test
+
+
+@pytest.mark.parametrize("name", sorted(performance_test.BENCHMARKS))
+def test_benchmark_runs(name):
+    func = performance_test.BENCHMARKS[name]()
+
+    if isinstance(func, str):
+        # An import benchmark
+        compile(func, name, "exec")
+    else:
+        func()
+
+
+def test_run_import_benchmark():
+    result = performance_test.run_import_benchmark("import json", repeat=1)
+    assert result["repeat"] == 1
+    assert result["best"] >= 0
+
+
+def test_parse_importtime():
+    output = (
+        "import time:        10 |         10 | site\n"
+        + performance_test._IMPORTS_START
+        + "\nimport time:       100 |        100 |   webob.util\n"
+        + "import time:       200 |        300 | webob\n"
+        + "import time:        50 |         50 | zlib\n"
+    )
+    assert performance_test._parse_importtime(output) == 350e-6
+
+
+def test_run_benchmark():
+    result = performance_test.run_benchmark(lambda: None, repeat=2, min_time=0.001)
+    assert result["number"] >= 1
+    assert 0 <= result["best"] <= result["mean"]
+
+
+def test_main_saves_and_compares(tmp_path, capsys):
+    output = tmp_path / "results.json"
+    args = ["-k", "response_init", "--repeat", "1", "--min-time", "0.001"]
+    assert performance_test.main(args + ["-o", str(output)]) == 0
+    results = json.loads(output.read_text())
+    assert list(results["benchmarks"]) == ["response_init"]
+    assert "python" in results["metadata"]
+    assert performance_test.main(args + ["--compare", str(output)]) == 0
+    assert "x" in capsys.readouterr().out.splitlines()[-1]
+    assert performance_test.main(["--list", "-k", "accept"]) == 0
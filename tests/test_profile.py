@@ -0,0 +1,225 @@
+import json
+
+import pytest
+
+from webob.dec import wsgify
+from webob.profile import RequestTimings, TimingMiddleware, TimingStats
+from webob.request import Request
+from webob.response import Response
+
+
+class Clock:
+    def __init__(self, step):
+        self.now = 0.0
+        self.step = step
+
+    def __call__(self):
+        self.now += self.step
+
+        return self.now
+
+
+@wsgify
+def form_app(req):
+    req.GET
+    req.POST
+    req.cookies.get("a")
+    req.accept.best_match(["text/html"])
+
+    return Response(app_iter=[b"a", b"b"])
+
+
+def make_request():
+    return Request.blank(
+        "/?x=1",
+        POST={"name": "value"},
+        headers={"Cookie": "a=b", "Accept": "text/html"},
+    )
+
+
+def test_phases_recorded():
+    seen = []
+    app = TimingMiddleware(form_app, callback=lambda env, t: seen.append(t))
+    resp = make_request().get_response(app)
+    assert resp.body == b"ab"
+    (timings,) = seen
+    assert set(timings.phases) == {
+        "app",
+        "app_iter",
+        "POST",
+        "GET",
+        "cookies",
+        "negotiation",
+    }
+    assert timings.wall >= sum(wall for count, wall, cpu in timings.phases.values())
+    assert app.stats.requests == 1
+    assert app.stats.as_dict()["phases"]["POST"]["count"] == 1
+
+
+def test_copy_body_recorded():
+    import io
+
+    seen = []
+    app = TimingMiddleware(form_app, callback=lambda env, t: seen.append(t))
+    req = make_request()
+    body = req.body
+    req.body_file_raw = io.BufferedReader(io.BytesIO(body))
+    req.is_body_seekable = False
+    req.content_length = len(body)
+    assert req.get_response(app).body == b"ab"
+    assert seen[0].phases["copy_body"][0] == 1
+
+
+def test_phases_are_exclusive():
+    timings = RequestTimings()
+    timings.wall_clock = Clock(1.0)
+    timings.cpu_clock = Clock(0.5)
+
+    def inner():
+        return "result"
+
+    def outer():
+        return timings.time("inner", inner)
+
+    assert timings.time("outer", outer) == "result"
+    assert timings.phases == {"inner": [1, 1.0, 0.5], "outer": [1, 2.0, 1.0]}
+    assert timings.wall == 3.0
+    assert timings.as_dict()["phases"]["outer"] == {
+        "count": 1,
+        "wall": 2.0,
+        "cpu": 1.0,
+    }
+
+
+def test_not_timed_without_middleware():
+    req = make_request()
+    req.POST
+    assert "webob.timings" not in req.environ
+
+
+def test_recorded_when_app_raises():
+    def app(environ, start_response):
+        raise ValueError
+
+    middleware = TimingMiddleware(app)
+
+    with pytest.raises(ValueError):
+        Request.blank("/").get_response(middleware)
+    assert middleware.stats.requests == 1
+
+
+def test_profile_sampling():
+    middleware = TimingMiddleware(form_app, profile_rate=0.5)
+    middleware.random = lambda: 0.9
+    make_request().get_response(middleware).body
+    assert middleware.stats.profile is None
+    middleware.random = lambda: 0.1
+    make_request().get_response(middleware).body
+    assert middleware.stats.profile is not None
+    assert "function calls" in middleware.stats.format_profile()
+
+
+def test_stats_endpoint():
+    stats = TimingStats()
+    middleware = TimingMiddleware(form_app, stats=stats, stats_path="/__timings__")
+    make_request().get_response(middleware).body
+    resp = Request.blank("/__timings__").get_response(middleware)
+    data = json.loads(resp.body)
+    assert data["requests"] == 1
+    assert "POST" in data["phases"]
+    resp = Request.blank("/__timings__?profile").get_response(middleware)
+    assert resp.text == "No request was profiled\n"
+    Request.blank("/__timings__?reset").get_response(middleware)
+    assert stats.requests == 0
+    assert stats.phases == {}
+
+
+def test_reprs():
+    timings = RequestTimings()
+    assert repr(timings) == "<RequestTimings 0.000000s wall 0.000000s CPU>"
+    assert repr(TimingStats()) == "<TimingStats 0 requests>"
+    middleware = TimingMiddleware(form_app)
+    assert repr(middleware).startswith("<TimingMiddleware at ")
+    assert repr(middleware).endswith("wrapping %r>" % form_app)
+
+
+def test_profiles_added_up():
+    middleware = TimingMiddleware(form_app, profile_rate=1.0)
+    make_request().get_response(middleware).body
+    make_request().get_response(middleware).body
+    assert middleware.stats.requests == 2
+    assert "function calls" in middleware.stats.format_profile()
+
+
+def test_profiled_while_another_profiler_is_active():
+    from webob.profile import _profiled
+
+    class ActiveProfiler:
+        def enable(self):
+            raise ValueError("Another profiling tool is already active")
+
+    timings = RequestTimings()
+    timings.profiler = ActiveProfiler()
+    assert _profiled(timings, lambda x: x * 2, 21) == 42
+
+
+def test_app_iter_closed_once():
+    closed = []
+
+    class AppIter:
+        def __iter__(self):
+            return iter([b"a", b"b"])
+
+        def close(self):
+            closed.append(True)
+
+    def app(environ, start_response):
+        start_response("200 OK", [])
+
+        return AppIter()
+
+    middleware = TimingMiddleware(app)
+    environ = Request.blank("/").environ
+    app_iter = middleware(environ, lambda *args: None)
+    assert list(app_iter) == [b"a", b"b"]
+    app_iter.close()
+    app_iter.close()
+    assert closed == [True]
+    assert middleware.stats.requests == 1
+    assert environ["webob.timings"].phases["app_iter"][0] == 5
+
+
+def test_slow_parse_counted_in_its_phase(monkeypatch):
+    from webob import request
+
+    class ManualClock:
+        now = 0.0
+
+        def __call__(self):
+            return self.now
+
+    clock = ManualClock()
+    monkeypatch.setattr(RequestTimings, "wall_clock", staticmethod(clock))
+    parse_qsl_text = request.parse_qsl_text
+
+    def slow_parse_qsl_text(source, *args):
+        for item in parse_qsl_text(source, *args):
+            clock.now += 1.0
+
+            yield item
+
+    monkeypatch.setattr(request, "parse_qsl_text", slow_parse_qsl_text)
+    seen = []
+
+    @wsgify
+    def app(req):
+        req.GET
+        clock.now += 0.5
+
+        return Response()
+
+    middleware = TimingMiddleware(app, callback=lambda env, t: seen.append(t))
+    Request.blank("/?a=1&b=2&c=3").get_response(middleware).body
+    (timings,) = seen
+    assert timings.phases["GET"][1] == 3.0
+    assert timings.phases["app"][1] == 0.5
@@ -440,6 +440,144 @@ class TestRequestCommon:
         del req.json
         assert req.body == b""
 
+    def test_json_body_custom_backend(self):
+        calls = []
+
+        class MyRequest(self._getTargetClass()):
+            @staticmethod
+            def json_loads(value):
+                calls.append(value)
+
+                return {"loaded": True}
+
+            @staticmethod
+            def json_dumps(value):
+                return b'{"dumped":true}'
+
+        body = b'{"a":1}'
+        environ = {"wsgi.input": BytesIO(body), "CONTENT_LENGTH": str(len(body))}
+        req = MyRequest(environ)
+        assert req.json_body == {"loaded": True}
+        assert calls == [body]
+        req.json_body = {"a": 1}
+        assert req.body == b'{"dumped":true}'
+
+    def test_json_body_non_utf8_charset(self):
+        body = '{"a":"\u00e9"}'.encode("latin-1")
+        environ = {
+            "wsgi.input": BytesIO(body),
+            "CONTENT_LENGTH": str(len(body)),
+            "CONTENT_TYPE": "application/json; charset=latin-1",
+        }
+        req = self._makeOne(environ)
+        assert req.json_body == {"a": "\u00e9"}
+        req.json_body = {"b": "\u00e9"}
+        assert req.body == b'{"b":"\\u00e9"}'
+
+    def _makeJSONBodyOne(self, body, **kw):
+        environ = {"wsgi.input": BytesIO(body), "CONTENT_LENGTH": str(len(body))}
+        environ.update(kw)
+
+        return self._makeOne(environ)
+
+    @pytest.mark.parametrize("chunk_size", [1, 2, 3, 7, 65536])
+    def test_iter_json_array(self, chunk_size):
+        body = b' [1, 12345, "a,]b", {"c": [1, {"d": null}]}, true, [] , -1.5e3 ] \n'
+        req = self._makeJSONBodyOne(body)
+        result = list(req.iter_json_array(chunk_size=chunk_size))
+        assert result == [1, 12345, "a,]b", {"c": [1, {"d": None}]}, True, [], -1.5e3]
+
+    def test_iter_json_array_large_element(self, monkeypatch):
+        import json
+
+        from webob import request
+
+        calls = []
+
+        class Decoder:
+            def raw_decode(self, s, idx):
+                calls.append(idx)
+
+                return json.JSONDecoder().raw_decode(s, idx)
+
+        monkeypatch.setattr(request, "_json_decoder", Decoder())
+        body = json.dumps([1, "x" * 100000, 2]).encode()
+        req = self._makeJSONBodyOne(body)
+        result = list(req.iter_json_array(chunk_size=100))
+        assert result == [1, "x" * 100000, 2]
+        # The element is decoded again each time the data has doubled, not
+        # after each of its 1000 chunks
+        assert len(calls) < 20
+
+    def test_iter_json_array_empty_array(self):
+        req = self._makeJSONBodyOne(b"[ ]")
+        assert list(req.iter_json_array()) == []
+
+    def test_iter_json_array_multibyte_charset(self):
+        body = '["\u00e9\u20ac", "x"]'.encode("utf-8")
+        req = self._makeJSONBodyOne(body)
+        assert list(req.iter_json_array(chunk_size=1)) == ["\u00e9\u20ac", "x"]
+
+    def test_iter_json_array_unseekable_input(self):
+        body = b"[1, 2, 3]"
+        environ = {
+            "wsgi.input": UnseekableInput(body),
+            "CONTENT_LENGTH": str(len(body)),
+        }
+        req = self._makeOne(environ)
+        assert list(req.iter_json_array(chunk_size=2)) == [1, 2, 3]
+        assert not req.is_body_seekable
+
+    def test_iter_json_array_is_lazy(self):
+        body = b"[1, 2, 3" + b" " * 100000 + b"]"
+        req = self._makeJSONBodyOne(body)
+        it = req.iter_json_array(chunk_size=4)
+        assert next(it) == 1
+        assert req.body_file_raw.tell() < len(body)
+
+    def test_iter_json_array_seekable_body_read_from_start(self):
+        req = self._makeJSONBodyOne(b"[1, 2, 3]")
+        req.make_body_seekable()
+        req.body_file_raw.read(4)
+        assert list(req.iter_json_array(chunk_size=2)) == [1, 2, 3]
+        assert list(req.iter_json_lines()) == [[1, 2, 3]]
+
+    @pytest.mark.parametrize(
+        "body, message",
+        [
+            (b"", "Unexpected end of JSON array"),
+            (b"[1, 2", "Unexpected end of JSON array"),
+            (b'{"a": 1}', "Expected a JSON array"),
+            (b"[1 2]", "Unexpected '2' in JSON array"),
+            (b"[1,]", "Unexpected ']' in JSON array"),
+            (b"[1] 2", "Extra data after JSON array"),
+            (b"[1, nope]", "Expecting value"),
+        ],
+    )
+    def test_iter_json_array_invalid(self, body, message):
+        req = self._makeJSONBodyOne(body)
+
+        with pytest.raises(ValueError, match=message):
+            list(req.iter_json_array(chunk_size=2))
+
+    @pytest.mark.parametrize("chunk_size", [1, 4, 65536])
+    def test_iter_json_lines(self, chunk_size):
+        body = b'{"a": 1}\n\n[2, 3]\r\n"x"\n  \n4'
+        req = self._makeJSONBodyOne(body)
+        result = list(req.iter_json_lines(chunk_size=chunk_size))
+        assert result == [{"a": 1}, [2, 3], "x", 4]
+
+    def test_iter_json_lines_non_utf8_charset(self):
+        body = '"\u00e9"\n'.encode("latin-1")
+        req = self._makeJSONBodyOne(
+            body, CONTENT_TYPE="application/x-ndjson; charset=latin-1"
+        )
+        assert list(req.iter_json_lines()) == ["\u00e9"]
+
+    def test_iter_json_lines_no_body(self):
+        req = self._makeOne({})
+        assert list(req.iter_json_lines()) == []
+
     # .text
 
     def test_text_body(self):
@@ -851,6 +989,17 @@ class TestRequestCommon:
         del req.cache_control
         assert "HTTP_CACHE_CONTROL" not in req.environ
 
+    def test_cache_control_identity_after_update(self):
+        environ = {}
+        req = self._makeOne(environ)
+        cc = req.cache_control
+        cc.max_age = 5
+        assert req.environ["HTTP_CACHE_CONTROL"] == "max-age=5"
+        assert req.cache_control is cc
+        req.environ["HTTP_CACHE_CONTROL"] = "max-age=10"
+        assert req.cache_control is not cc
+        assert req.cache_control.max_age == 10
+
     def test_cache_control_set_dict(self):
         environ = {}
         req = self._makeOne(environ)
@@ -1104,6 +1253,83 @@ class TestRequestCommon:
                 content_type="application/x-www-form-urlencoded",
             )
 
+    def test_blank_factory_matches_blank(self):
+        cls = self._getTargetClass()
+        kw = dict(
+            base_url="https://example.com/app",
+            headers={"Accept": "text/html"},
+            environ={"REMOTE_ADDR": "1.2.3.4"},
+        )
+        make_request = cls.blank_factory(**kw)
+
+        for path in ("/", "/a%20b?x=1&y=2", "/caf%C3%A9", ""):
+            req = make_request(path)
+            expected = cls.blank(path, **kw)
+            env = dict(req.environ, **{"wsgi.input": None})
+            assert env == dict(expected.environ, **{"wsgi.input": None})
+
+    def test_blank_factory_requests_are_independent(self):
+        cls = self._getTargetClass()
+        make_request = cls.blank_factory(method="PUT")
+        first = make_request("/?a=1")
+        first.GET
+        first.body = b"changed"
+        second = make_request("/?a=2")
+        assert second.method == "PUT"
+        assert second.GET["a"] == "2"
+        assert second.body == b""
+        assert "webob._parsed_query_vars" not in make_request("/").environ
+        make_request = cls.blank_factory(environ={"webob.adhoc_attrs": {"a": 1}})
+        make_request("/").environ["webob.adhoc_attrs"]["a"] = 2
+        assert make_request("/").environ["webob.adhoc_attrs"] == {"a": 1}
+        # The parsing caches of a request the template is made from
+        parsed = cls.blank("/?a=1")
+        parsed.GET
+        make_request = cls.blank_factory(environ=parsed.environ)
+        assert "webob._parsed_query_vars" not in make_request("/?a=2").environ
+        assert make_request("/?a=2").GET["a"] == "2"
+
+    def test_blank_factory_post_headers_and_kw(self):
+        cls = self._getTargetClass()
+        make_request = cls.blank_factory(headers={"X-Shared": "1"})
+        req = make_request(
+            "/form", POST={"a": "1"}, headers={"X-Own": "2"}, remote_addr="5.6.7.8"
+        )
+        assert req.method == "POST"
+        assert req.POST["a"] == "1"
+        assert req.headers["X-Shared"] == "1"
+        assert req.headers["X-Own"] == "2"
+        assert req.remote_addr == "5.6.7.8"
+        req = make_request(
+            "/json", POST="{}", headers={"Content-Type": "application/json"}
+        )
+        assert req.body == b"{}"
+
+    def test_blank_factory_shared_body(self):
+        cls = self._getTargetClass()
+        make_request = cls.blank_factory(POST={"a": "b"})
+
+        for i in range(2):
+            req = make_request("/form")
+            assert req.method == "POST"
+            assert req.content_length == 3
+            assert req.body == b"a=b"
+            assert req.POST["a"] == "b"
+            req.body = b"a=c"
+        req = make_request("https://example.com/form")
+        assert req.POST["a"] == "b"
+        req = make_request("https://example.com/form", POST={"a": "c"})
+        assert req.POST["a"] == "c"
+        make_request = cls.blank_factory(method="PUT", body=b"data")
+        assert make_request("/").body == b"data"
+
+    def test_blank_factory_full_url(self):
+        cls = self._getTargetClass()
+        make_request = cls.blank_factory(headers={"X-Shared": "1"})
+        req = make_request("https://other.example.com/path?q=1")
+        assert req.url == "https://other.example.com/path?q=1"
+        assert req.headers["X-Shared"] == "1"
+
     # from_bytes
     def test_from_bytes_extra_data(self):
         _test_req_copy = _test_req.replace(
@@ -2103,6 +2329,270 @@ class TestRequest_functional:
         assert req.body_file_raw is old_body_file
         assert req.body_file is old_body_file
 
+    @pytest.mark.parametrize("chunk_size", [1, 3, 64 * 1024])
+    def test_copy_body_chunk_size(self, chunk_size):
+        body = b"0123456789" * 10
+        req = self._blankOne(
+            "/",
+            method="POST",
+            body_file=UnseekableInput(body),
+            content_length=len(body),
+        )
+        req.request_body_chunk_size = chunk_size
+        req.copy_body()
+        assert isinstance(req.body_file_raw, BytesIO)
+        assert req.is_body_seekable
+        assert req.content_length == len(body)
+        assert req.body == body
+
+    def test_copy_body_without_readinto(self):
+        body = b"0123456789"
+        req = self._blankOne("/", method="POST", body_file=UnseekableInput(body))
+        req.is_body_readable = True
+        assert not hasattr(req.body_file, "readinto")
+        req.request_body_chunk_size = 4
+        req.copy_body()
+        assert req.content_length == len(body)
+        assert req.body == body
+
+    def test_copy_body_to_tempfile(self):
+        tempfiles = []
+
+        class MyRequest(self._getTargetClass()):
+            request_body_tempfile_limit = 5
+            request_body_chunk_size = 4
+
+            def make_tempfile(self):
+                f = super().make_tempfile()
+                tempfiles.append(f)
+
+                return f
+
+        body = b"0123456789"
+        req = MyRequest.blank(
+            "/",
+            method="POST",
+            body_file=UnseekableInput(body),
+            content_length=len(body),
+        )
+        req.copy_body()
+        assert req.body_file_raw is tempfiles[0]
+        assert req.content_length == len(body)
+        assert req.is_body_readable
+        assert req.body == body
+        tempfiles[0].close()
+
+    def test_copy_shares_bytesio_body(self):
+        from webob.counters import counters, reset_counters
+
+        req = self._blankOne("/", method="POST", body=b"0123456789")
+        reset_counters()
+        req2 = req.copy()
+        assert counters() == {"shared_bodies": 1}
+        assert req2.body_file_raw is not req.body_file_raw
+        assert req2.body_file_raw.getbuffer() == b"0123456789"
+        assert req2.body_file.read(4) == b"0123"
+        assert req.body_file.read(2) == b"01"
+        req2.body_file_raw.seek(0)
+        req2.body_file_raw.write(b"xx")
+        assert req2.body == b"xx23456789"
+        assert req.body == b"0123456789"
+
+    def test_copy_shares_tempfile_body(self):
+        class MyRequest(self._getTargetClass()):
+            request_body_tempfile_limit = 5
+
+        body = b"0123456789" * 10
+        req = MyRequest.blank(
+            "/",
+            method="POST",
+            body_file=UnseekableInput(body),
+            content_length=len(body),
+        )
+        req2 = req.copy()
+        req3 = req2.copy()
+        raw, raw2, raw3 = req.body_file_raw, req2.body_file_raw, req3.body_file_raw
+        assert type(raw) is type(raw2) is type(raw3)
+        assert len({raw, raw2, raw3}) == 3
+        assert req.body == req2.body == req3.body == body
+        assert raw2.read(3) == b"012"
+        assert raw3.read(5) == b"01234"
+        raw2.seek(-2, 2)
+        assert raw2.read() == b"89"
+        assert raw.read(1) == b"0"
+        # Writing copies the body
+        raw2.seek(0)
+        raw2.write(b"xyz")
+        assert raw2.tell() == 3
+        assert raw2.read(2) == b"34"
+        assert req2.body == b"xyz" + body[3:]
+        assert req.body == req3.body == body
+        req4 = req2.copy()
+        raw2.seek(0)
+        raw2.write(b"abc")
+        assert req4.body == b"xyz" + body[3:]
+        assert req2.body == b"abc" + body[3:]
+        # Closing one of them leaves the others alone
+        raw.close()
+        assert req3.body == body
+        raw2.truncate(5)
+        assert req2.body_file_raw.seek(0, 2) == 5
+
+        for raw in (raw2, raw3, req4.body_file_raw):
+            raw.close()
+
+    def test_copy_shared_file_of_unknown_size(self, tmp_path):
+        path = tmp_path / "body"
+        path.write_bytes(b"0123456789")
+        req = self._blankOne("/", method="POST")
+        req.body_file_raw = open(path, "rb")
+        req.content_length = None
+        req.is_body_seekable = True
+        req.is_body_readable = True
+        source = req.body_file_raw
+        req2 = req.copy()
+        assert req2.body_file_raw.read() == b"0123456789"
+        req.body_file_raw.close()
+        assert source.closed
+        assert req2.body_file_raw.read() == b""
+        req2.body_file_raw.seek(0)
+        assert req2.body_file_raw.read() == b"0123456789"
+        req2.body_file_raw.close()
+
+    def test_shared_file(self, tmp_path):
+        import io
+
+        from webob.request import _is_shareable_file, _SharedFile
+
+        path = tmp_path / "body"
+        path.write_bytes(b"0123456789")
+
+        with open(path) as f:
+            assert not _is_shareable_file(f)
+
+        with open(path, "rb") as f:
+            assert _is_shareable_file(f)
+            shared = _SharedFile(f)
+            assert repr(shared) == "<_SharedFile 10 bytes>"
+            assert shared.readable() and shared.seekable() and shared.writable()
+            assert shared.fileno() != f.fileno()
+            shared.read(3)
+            assert shared.seek(2, io.SEEK_CUR) == 5
+            assert shared.tell() == 5
+
+            with pytest.raises(ValueError):
+                shared.seek(0, 3)
+
+            with pytest.raises(ValueError):
+                shared.seek(-6, io.SEEK_CUR)
+            assert shared.read() == b"56789"
+            shared.write(b"ab")
+            assert shared.fileno() == shared._file.fileno()
+            shared.seek(0)
+            assert shared.read() == b"0123456789ab"
+            shared.close()
+
+    def test_copy_shared_file_multipart_post(self, monkeypatch):
+        import os
+
+        from webob.request import _encode_multipart, _SharedFile
+
+        class MyRequest(self._getTargetClass()):
+            request_body_tempfile_limit = 100
+
+        data = bytes(range(256)) * 4096
+        content_type, body = _encode_multipart(
+            [("upload", ("data.bin", data)), ("name", "value")],
+            "multipart/form-data",
+        )
+        req = MyRequest.blank(
+            "/",
+            method="POST",
+            body_file=UnseekableInput(body),
+            content_length=len(body),
+            content_type=content_type,
+        )
+        req2 = req.copy()
+        assert isinstance(req2.body_file_raw, _SharedFile)
+        preads = []
+        pread = os.pread
+
+        def counting_pread(fd, size, offset):
+            preads.append(size)
+
+            return pread(fd, size, offset)
+
+        monkeypatch.setattr(os, "pread", counting_pread)
+        assert req2.POST["upload"].value == data
+        assert req2.POST["name"] == "value"
+        # Read in blocks, not line by line
+        assert len(preads) < 2 * len(body) // _SharedFile.block_size
+        req.body_file_raw.close()
+        req2.body_file_raw.close()
+
+    def test_shared_file_readline(self, tmp_path):
+        from webob.request import _SharedFile
+
+        path = tmp_path / "body"
+        path.write_bytes(b"ab\ncd\n" + b"x" * 10)
+
+        with open(path, "rb") as f:
+            shared = _SharedFile(f)
+            shared.block_size = 4
+            assert shared.readline() == b"ab\n"
+            assert shared.readline(1) == b"c"
+            assert shared.readline() == b"d\n"
+            assert shared.read(3) == b"xxx"
+            assert shared.readline() == b"x" * 7
+            assert shared.readline() == b""
+            shared.seek(1)
+            assert list(shared) == [b"b\n", b"cd\n", b"x" * 10]
+            shared.seek(0)
+            assert shared.read(8) == b"ab\ncd\nxx"
+            shared.write(b"!")
+            shared.seek(0)
+            assert shared.readline() == b"ab\n"
+            shared.close()
+
+        with open(path, "rb") as f:
+            shared = _SharedFile(f, 20)
+            path.write_bytes(b"ab")
+            assert shared.readline() == b"ab"
+            assert shared.readline() == b""
+            shared.close()
+
+    def test_shared_file_shorter_than_size(self, tmp_path):
+        from webob.request import _SharedFile
+
+        path = tmp_path / "body"
+        path.write_bytes(b"0123456789")
+
+        with open(path, "rb") as f:
+            shared = _SharedFile(f, 20)
+            # The file has shrunk since; the copy has what is left of it
+            path.write_bytes(b"01234")
+            shared.seek(3)
+            shared.write(b"x")
+            shared.seek(0)
+            assert shared.read() == b"012x4"
+            shared.close()
+
+    def test_copy_copies_other_bodies(self):
+        from webob.counters import counters, reset_counters
+
+        class Input(BytesIO):
+            pass
+
+        req = self._blankOne("/", method="POST")
+        req.body_file_raw = Input(b"0123")
+        req.content_length = 4
+        req.is_body_seekable = True
+        reset_counters()
+        req2 = req.copy()
+        assert counters()["copy_body"] == 1
+        assert type(req2.body_file_raw) is BytesIO
+        assert req2.body == b"0123"
+
     def test_already_consumed_stream(self):
         from webob.request import Request
 
@@ -3064,6 +3554,352 @@ def test_environ_add_POST_file_with_content_type():
     assert b'Content-type: text/plain; charset="utf-8"' in wsgi_input
 
 
+class TestMultipartEncoder:
+    def _makeOne(self, fields, boundary="xyz"):
+        from webob.request import MultipartEncoder
+
+        return MultipartEncoder(fields, boundary)
+
+    def _fields(self, tmp_path):
+        path = tmp_path / "data.bin"
+        path.write_bytes(b"0123456789" * 1000)
+
+        return [
+            ("title", "Hello"),
+            ("upload", ("data.bin", open(path, "rb"))),
+            ("memory", ("notes.txt", BytesIO(b"some notes"))),
+            ("name", "\u3053\u3093"),
+        ]
+
+    def test_same_as_encode_multipart(self, tmp_path):
+        from webob.request import _encode_multipart
+
+        fields = self._fields(tmp_path)
+        content_type, expected = _encode_multipart(
+            fields, "multipart/form-data; boundary=xyz"
+        )
+        fields[1][1][1].close()
+        inst = self._makeOne(self._fields(tmp_path))
+        assert inst.content_type == content_type
+        assert inst.length == len(expected) == len(inst)
+        assert inst.read() == expected
+        inst.close()
+
+    def test_streams_files(self, tmp_path):
+        inst = self._makeOne(self._fields(tmp_path))
+        # The headers, the file on disk, and the rest
+        assert len(inst._parts) == 3
+        chunks = iter(lambda: inst.read(4096), b"")
+        body = b"".join(chunks)
+        assert len(body) == inst.length
+        assert inst.tell() == inst.length
+        assert inst.read(10) == b""
+        inst.close()
+
+    def test_seek(self, tmp_path):
+        inst = self._makeOne(self._fields(tmp_path))
+        assert repr(inst) == "<MultipartEncoder %d bytes>" % inst.length
+        assert inst.readable()
+        body = inst.read()
+        assert inst.seekable()
+
+        for pos in (0, 5, 150, 5000, inst.length - 3, inst.length + 10):
+            assert inst.seek(pos) == pos
+            assert inst.read(100) == body[pos : pos + 100]
+        inst.seek(-10, 2)
+        assert inst.read() == body[-10:]
+        inst.seek(0)
+        inst.read(7)
+        inst.seek(3, 1)
+        assert inst.read(5) == body[10:15]
+
+        with pytest.raises(ValueError):
+            inst.seek(-1)
+
+        with pytest.raises(ValueError):
+            inst.seek(0, 3)
+        inst.close()
+
+    def test_file_start_position(self, tmp_path):
+        path = tmp_path / "data.txt"
+        path.write_bytes(b"skipped|content")
+        f = open(path, "rb")
+        f.read(8)
+        inst = self._makeOne([("f", ("data.txt", f))])
+        body = inst.read()
+        assert b"\r\n\r\ncontent\r\n--xyz--" in body
+        assert len(body) == inst.length
+        inst.close()
+
+    def test_pipe_is_read(self):
+        import os
+
+        read_fd, write_fd = os.pipe()
+        os.write(write_fd, b"piped")
+        os.close(write_fd)
+        inst = self._makeOne([("f", ("data.txt", os.fdopen(read_fd, "rb")))])
+        assert len(inst._parts) == 1
+        assert b"\r\n\r\npiped\r\n--xyz--" in inst.read()
+        inst.close()
+
+    def test_text_and_device_files_are_read(self, tmp_path):
+        import os
+
+        path = tmp_path / "data.txt"
+        path.write_text("\u3053\u3093", encoding="utf8")
+        fields = [
+            ("text", ("data.txt", open(path, encoding="utf8"))),
+            ("null", ("null.bin", open(os.devnull, "rb"))),
+        ]
+        inst = self._makeOne(fields)
+        assert len(inst._parts) == 1
+        body = inst.read()
+        assert b"\r\n\r\n\xe3\x81\x93\xe3\x82\x93\r\n--xyz" in body
+        assert body.endswith(b"application/octet-stream\r\n\r\n\r\n--xyz--")
+        inst.close()
+
+    def test_truncated_file(self, tmp_path):
+        path = tmp_path / "data.txt"
+        path.write_bytes(b"x" * 100)
+        inst = self._makeOne([("f", ("data.txt", open(path, "rb")))])
+        path.write_bytes(b"x" * 10)
+
+        with pytest.raises(OSError):
+            inst.read()
+        inst.close()
+
+    def test_close_closes_files(self, tmp_path):
+        fields = self._fields(tmp_path)
+        inst = self._makeOne(fields)
+        inst.close()
+        assert inst.closed
+        assert fields[1][1][1].closed
+        assert fields[2][1][1].closed
+
+    def test_dict_and_default_boundary(self):
+        from webob.request import MultipartEncoder
+
+        inst = MultipartEncoder({"a": "1"})
+        assert len(inst.boundary) == 20
+        assert inst.content_type.endswith("boundary=" + inst.boundary)
+        assert inst.read().endswith(b"--%s--" % inst.boundary.encode())
+
+    def test_blank(self, tmp_path):
+        from webob.request import Request
+
+        inst = self._makeOne(self._fields(tmp_path))
+        req = Request.blank("/", POST=inst)
+        assert req.method == "POST"
+        assert req.environ["wsgi.input"].raw is inst
+        assert req.content_length == inst.length
+        assert req.content_type == "multipart/form-data"
+        assert req.is_body_seekable
+        assert req.POST["title"] == "Hello"
+        assert req.POST["upload"].value == b"0123456789" * 1000
+        assert req.POST["memory"].filename == "notes.txt"
+        inst.close()
+
+    def test_blank_post_parsed_in_chunks(self):
+        from webob.request import MultipartEncoder, Request
+
+        reads = []
+
+        class CountingEncoder(MultipartEncoder):
+            def readinto(self, buffer):
+                reads.append(len(buffer))
+
+                return super().readinto(buffer)
+
+        data = bytes(range(256)) * 1024
+        inst = CountingEncoder([("upload", ("data.bin", BytesIO(data)))], "xyz")
+        req = Request.blank("/", POST=inst)
+        assert req.POST["upload"].value == data
+        assert len(reads) < 100
+        req.body_file_raw.close()
+        assert inst.closed
+
+
+class TestDecodeContent:
+    def _makeOne(self, body, encoding, content_type="application/json", **kw):
+        from webob.request import Request
+
+        return Request.blank(
+            "/",
+            method="POST",
+            body_file=UnseekableInput(body),
+            content_length=len(body),
+            content_type=content_type,
+            headers={"Content-Encoding": encoding},
+            **kw,
+        )
+
+    def test_gzip_json(self):
+        import gzip
+
+        req = self._makeOne(gzip.compress(b'{"a": [1, 2]}'), "gzip")
+        req.decode_content()
+        assert "Content-Encoding" not in req.headers
+        assert req.content_length is None
+        assert req.json_body == {"a": [1, 2]}
+        assert req.content_length == 13
+
+    def test_body_file_streams(self):
+        import gzip
+
+        data = b"0123456789" * 10000
+        req = self._makeOne(gzip.compress(data), "gzip", request_body_chunk_size=100)
+        req.decode_content()
+        body_file = req.body_file
+        assert body_file.read(5) == b"01234"
+        assert body_file.size < len(data)
+        assert body_file.read() == data[5:]
+
+    def test_several_encodings(self):
+        import gzip
+        import zlib
+
+        body = gzip.compress(zlib.compress(b"a=1&b=2"))
+        req = self._makeOne(body, "deflate, gzip", "application/x-www-form-urlencoded")
+        req.decode_content()
+        assert req.POST["b"] == "2"
+
+    def test_identity_and_no_body(self):
+        req = self._makeOne(b"abc", "identity")
+        req.decode_content()
+        assert "Content-Encoding" not in req.headers
+        assert req.content_length == 3
+        assert req.body == b"abc"
+        req = self._makeOne(b"", "gzip")
+        req.decode_content()
+        assert "Content-Encoding" not in req.headers
+        assert req.body == b""
+
+    def test_unknown_encoding(self):
+        from webob.exc import HTTPUnsupportedMediaType
+
+        req = self._makeOne(b"abc", "compress")
+
+        with pytest.raises(HTTPUnsupportedMediaType):
+            req.decode_content()
+        assert req.headers["Content-Encoding"] == "compress"
+
+    def test_invalid(self):
+        from webob.exc import HTTPBadRequest
+
+        req = self._makeOne(b"not gzip data", "gzip")
+        req.decode_content()
+
+        with pytest.raises(HTTPBadRequest):
+            req.body
+
+    def test_max_size(self):
+        import gzip
+
+        from webob.exc import HTTPRequestEntityTooLarge
+        from webob.request import Request
+
+        body = gzip.compress(b"\0" * 100000)
+        req = self._makeOne(body, "gzip")
+        req.decode_content(max_size=100001)
+        assert len(req.body) == 100000
+        req.body_file_raw.close()
+        tempfiles = []
+
+        class MyRequest(Request):
+            def make_tempfile(self):
+                f = super().make_tempfile()
+                tempfiles.append(f)
+
+                return f
+
+        req = MyRequest.blank(
+            "/",
+            method="POST",
+            body_file=UnseekableInput(body),
+            content_length=len(body),
+            headers={"Content-Encoding": "gzip"},
+            request_body_max_decoded_size=99999,
+        )
+        req.decode_content()
+
+        with pytest.raises(HTTPRequestEntityTooLarge):
+            req.body
+        # The partial copy is not left to the garbage collector
+        assert tempfiles[0].closed
+
+    def test_br_max_size(self, dummy_brotli):
+        from webob.exc import HTTPRequestEntityTooLarge
+
+        # 64 MB once decoded
+        body = b"a" * 65536
+        req = self._makeOne(body, "br", request_body_max_decoded_size=100000)
+        req.decode_content()
+
+        with pytest.raises(HTTPRequestEntityTooLarge):
+            req.body
+        assert sum(dummy_brotli.processed) < len(body)
+
+    def test_br(self, dummy_brotli):
+        from webob.exc import HTTPBadRequest
+
+        req = self._makeOne(b"ab" * 500, "br")
+        req.decode_content()
+        assert req.body == b"".join((b"a" * 1000 + b"b" * 1000) for i in range(500))
+        req.body_file_raw.close()
+        req = self._makeOne(b"ab" * 500, "br")
+        req.decode_content()
+        body_file = req.body_file
+        assert body_file.read(1000) == b"a" * 1000
+        assert body_file.read(1500) == b"b" * 1000 + b"a" * 500
+        req = self._makeOne(b"a!", "br")
+        req.decode_content()
+
+        with pytest.raises(HTTPBadRequest):
+            req.body
+
+    def test_decoded_file(self):
+        import gzip
+
+        from webob.request import _DecodedFile
+        from webob.util import _ContentDecoder
+
+        inner = BytesIO(gzip.compress(b"abc"))
+        decoded = _DecodedFile(inner, _ContentDecoder("gzip"))
+        assert repr(decoded) == "<_DecodedFile(%r, 'gzip')>" % inner
+        assert decoded.readable()
+        assert decoded.readinto(bytearray()) == 0
+        assert decoded.read() == b"abc"
+        assert decoded.decoder is None
+        assert decoded.readinto(bytearray(10)) == 0
+        decoded.close()
+        assert inner.closed
+        decoded.close()
+
+    def test_request_body_decode(self):
+        import gzip
+
+        req = self._makeOne(
+            gzip.compress(b"a=1"),
+            "gzip",
+            "application/x-www-form-urlencoded",
+            request_body_decode=True,
+        )
+        assert req.POST["a"] == "1"
+        assert "Content-Encoding" not in req.headers
+        req = self._makeOne(gzip.compress(b"abc"), "gzip", request_body_decode=True)
+        assert req.body_file.read() == b"abc"
+        req = self._makeOne(gzip.compress(b"abc"), "gzip", request_body_decode=True)
+        assert req.body_file_seekable.read() == b"abc"
+
+    def test_not_decoded_by_default(self):
+        import gzip
+
+        body = gzip.compress(b"abc")
+        req = self._makeOne(body, "gzip")
+        assert req.body == body
+        assert req.headers["Content-Encoding"] == "gzip"
+
+
 class TestRequestMultipart:
     def test_multipart_with_charset(self):
         from webob.request import Request
@@ -1208,6 +1208,47 @@ def test_cache_control_object_max_age_ten():
     assert res.headers["cache-control"] == "max-age=10"
 
 
+def test_cache_control_not_reparsed_after_update(monkeypatch):
+    from webob.cachecontrol import CacheControl
+
+    res = Response()
+    cc = res.cache_control
+    cc.max_age = 10
+    monkeypatch.setattr(CacheControl, "parse", None)
+    assert res.cache_control is cc
+    assert res.headers["Cache-Control"] == "max-age=10"
+
+
+def test_cache_control_batch():
+    res = Response()
+
+    with res.cache_control.batch() as cc:
+        cc.public = True
+        cc.max_age = 10
+        assert "Cache-Control" not in res.headers
+    assert res.headers["Cache-Control"] == "max-age=10, public"
+
+
+def test_cache_control_last_directive_removed():
+    res = Response()
+    cc = res.cache_control
+    cc.max_age = 10
+    del cc.max_age
+    assert "Cache-Control" not in res.headers
+    assert res.cache_control is cc
+    assert cc.max_age is None
+
+
+def test_cache_control_header_changed_directly():
+    res = Response()
+    cc = res.cache_control
+    cc.max_age = 10
+    res.headers["Cache-Control"] = "public,max-age=20"
+    assert res.cache_control is cc
+    assert cc.max_age == 20
+    assert res.headers["Cache-Control"] == "public,max-age=20"
+
+
 def test_cache_control_set_object_error():
     res = Response()
     with pytest.raises(AttributeError):
@@ -1457,6 +1498,52 @@ def test_response_json_body():
     assert r.body == b""
 
 
+def test_response_json_body_custom_backend():
+    class MyResponse(Response):
+        @staticmethod
+        def json_dumps(value):
+            return b"dumped"
+
+        @staticmethod
+        def json_loads(value):
+            assert value == b"dumped"
+
+            return "loaded"
+
+    r = MyResponse(json_body={"a": 1})
+    assert r.body == b"dumped"
+    assert r.json_body == "loaded"
+    r.json_body = None
+    assert r.content_length == 6
+
+
+def test_json_array_app_iter():
+    from webob.response import json_array_app_iter
+
+    assert b"".join(json_array_app_iter([])) == b"[]"
+    assert b"".join(json_array_app_iter(iter([1, {"a": 2}]))) == b'[1,{"a":2}]'
+    chunks = list(json_array_app_iter(range(5), buffer_size=4))
+    assert chunks == [b"[0,1", b",2,3", b",4]"]
+
+
+def test_json_array_app_iter_closes_items():
+    from webob.response import json_array_app_iter
+
+    closed = []
+
+    def items():
+        try:
+            yield 1
+            yield 2
+        finally:
+            closed.append(True)
+
+    app_iter = json_array_app_iter(items(), buffer_size=1)
+    assert next(app_iter) == b"[1"
+    app_iter.close()
+    assert closed == [True]
+
+
 def test_cache_expires_set_zero_then_nonzero():
     res = Response()
     res.cache_expires(seconds=0)
@@ -1547,6 +1634,25 @@ def test_content_type_has_charset():
     assert res.headers["Content-Type"] == "application/foo; charset=UTF-8"
 
 
+def test_content_type_header_cached():
+    from webob import response
+
+    response._content_type_header.cache_clear()
+    assert (
+        response._content_type_header("text/plain", "UTF-8")
+        == "text/plain; charset=UTF-8"
+    )
+    assert (
+        response._content_type_header("application/json", "UTF-8") == "application/json"
+    )
+    assert response._content_type_header.cache_info().currsize == 2
+    res = Response(content_type="text/plain", charset="latin-1")
+    assert res.headers["Content-Type"] == "text/plain; charset=latin-1"
+    assert response._content_type_header.cache_info().currsize == 3
+    response._content_type_header("text/plain", "UTF-8")
+    assert response._content_type_header.cache_info().hits >= 1
+
+
 def test_app_iter_is_same():
     class app_iter:
         pass
@@ -1556,3 +1662,425 @@ def test_app_iter_is_same():
     res = Response(status=204, app_iter=my_app_iter)
     assert res.app_iter == my_app_iter
     assert isinstance(res.app_iter, app_iter)
+
+
+class TestBodyFactory:
+    def _makeOne(self, body=b"rendered", **kw):
+        calls = []
+
+        def factory():
+            calls.append(1)
+
+            return body
+
+        kw.setdefault("etag", "abc")
+
+        return Response(body_factory=factory, **kw), calls
+
+    def test_GET_calls_factory_once(self):
+        res, calls = self._makeOne()
+        req = Request.blank("/")
+        assert req.get_response(res).body == b"rendered"
+        assert req.get_response(res).body == b"rendered"
+        assert calls == [1]
+
+    def test_HEAD_does_not_call_factory(self):
+        res, calls = self._makeOne(content_length=8)
+        req = Request.blank("/", method="HEAD")
+        resp = req.get_response(res)
+        assert resp.body == b""
+        assert resp.content_length == 8
+        assert calls == []
+
+    def test_HEAD_not_conditional_does_not_call_factory(self):
+        res, calls = self._makeOne(conditional_response=False)
+        assert not res.conditional_response
+        req = Request.blank("/", method="HEAD")
+        assert req.get_response(res).body == b""
+        assert calls == []
+
+    def test_not_modified_does_not_call_factory(self):
+        res, calls = self._makeOne()
+        assert res.conditional_response
+        req = Request.blank("/", if_none_match='"abc"')
+        resp = req.get_response(res)
+        assert resp.status_code == 304
+        assert calls == []
+
+    def test_range(self):
+        res, calls = self._makeOne(content_length=8)
+        req = Request.blank("/", range=(0, 6))
+        resp = req.get_response(res)
+        assert resp.status_code == 206
+        assert resp.body == b"render"
+
+    def test_factory_app_iter(self):
+        res, calls = self._makeOne(body=[b"a", b"b"])
+        assert res.has_body
+        assert res.body == b"ab"
+        assert calls == [1]
+
+    def test_factory_runs_before_start_response(self):
+        def factory():
+            raise ValueError
+
+        res = Response(body_factory=factory)
+        started = []
+        req = Request.blank("/")
+        with pytest.raises(ValueError):
+            res(req.environ, lambda *args: started.append(args))
+        assert started == []
+
+    def test_close_without_calling_factory(self):
+        res, calls = self._makeOne()
+        res.app_iter.close()
+        assert calls == []
+
+    def test_repr(self):
+        res, calls = self._makeOne()
+        factory = res.body_factory
+        assert repr(res.app_iter) == "<DeferredAppIter for %r>" % factory
+        assert calls == []
+
+    def test_close_resolved(self):
+        app_iter = io.BytesIO(b"foo")
+        res, calls = self._makeOne(body=app_iter)
+        deferred = res.app_iter
+        assert list(deferred) == [b"foo"]
+        deferred.close()
+        assert app_iter.closed
+
+    def test_body_factory_property(self):
+        res = Response("hello")
+        assert res.body_factory is None
+        res.body_factory = lambda: b"later"
+        assert res.content_length is None
+        factory = res.body_factory
+        assert factory() == b"later"
+        assert res.body == b"later"
+        assert res.body_factory is None
+
+    def test_body_and_factory(self):
+        with pytest.raises(TypeError):
+            Response(b"body", body_factory=lambda: b"")
+        with pytest.raises(TypeError):
+            Response(app_iter=[b""], body_factory=lambda: b"")
+
+
+def test_hash_etag():
+    res = Response(app_iter=[b"foo", b"bar"])
+    res.hash_etag()
+    etag = res.etag
+    assert etag
+    assert res.app_iter == [b"foo", b"bar"]
+    res2 = Response(b"foobar")
+    res2.hash_etag()
+    assert res2.etag == etag
+    res2.hash_etag("sha256")
+    assert res2.etag != etag
+    assert len(res2.etag) == 43
+    res2.body = b"other"
+    res2.hash_etag()
+    assert res2.etag != etag
+
+
+def test_hash_etag_streamed():
+    closed = []
+
+    class AppIter:
+        def __iter__(self):
+            yield b"foo"
+            yield b"bar"
+
+        def close(self):
+            closed.append(True)
+
+    res = Response(app_iter=AppIter())
+    res.hash_etag()
+    assert res.app_iter == [b"foo", b"bar"]
+    assert res.content_length == 6
+    assert closed == [True]
+    expected = Response(b"foobar")
+    expected.hash_etag()
+    assert res.etag == expected.etag
+
+
+def test_hash_etag_default_algorithm():
+    class MD5Response(Response):
+        default_etag_algorithm = "md5"
+
+    res = MD5Response(b"foo")
+    res.hash_etag()
+    res2 = Response(b"foo")
+    res2.md5_etag()
+    assert res.etag == res2.etag
+
+
+class TestBufferedWrites:
+    def test_writes_coalesced(self):
+        from webob.response import BufferedAppIter
+
+        res = Response(b"abc", write_chunk_size=4)
+        assert res.write(b"def") == 3
+        assert res.write("gh") == 2
+        assert isinstance(res.app_iter, BufferedAppIter)
+        assert res.content_length == 8
+        assert list(res.app_iter) == [b"abcd", b"efgh"]
+        assert res.body == b"abcdefgh"
+        res.write(b"i")
+        assert res.body == b"abcdefghi"
+        assert res.content_length == 9
+        assert Request.blank("/").get_response(res).body == b"abcdefghi"
+
+    def test_small_body_single_chunk(self):
+        res = Response(write_chunk_size=1024)
+        res.write(b"a")
+        res.write(b"b")
+        assert list(res.app_iter) == [b"ab"]
+        assert res.has_body
+
+    def test_empty(self):
+        from webob.response import BufferedAppIter
+
+        app_iter = BufferedAppIter()
+        assert repr(app_iter) == "<BufferedAppIter 0 bytes>"
+        assert list(app_iter) == []
+        assert not Response(app_iter=app_iter).has_body
+
+    def test_write_during_iteration(self):
+        from webob.response import BufferedAppIter
+
+        app_iter = BufferedAppIter([b"abcdef"], chunk_size=2)
+        assert repr(app_iter) == "<BufferedAppIter 6 bytes>"
+        it = iter(app_iter)
+        assert next(it) == b"ab"
+        app_iter.append(b"gh")
+        assert list(it) == [b"cd", b"ef"]
+
+    def test_subclass_attribute(self):
+        class BufferedResponse(Response):
+            write_chunk_size = 1 << 16
+
+        res = BufferedResponse()
+        res.body_file.writelines(["a", b"b", "c"])
+        assert res.body == b"abc"
+        assert res.content_length == 3
+        assert res.body_file.tell() == 3
+
+    def test_writelines_non_list(self):
+        res = Response(app_iter=iter([b"a", b"b"]))
+        res.body_file.writelines([b"c", "d"])
+        assert res.app_iter == [b"a", b"b", b"c", b"d"]
+        assert res.content_length == 4
+
+    def test_getbuffer(self):
+        res = Response(b"abc")
+        body_file = res.body_file
+        view = body_file.getbuffer()
+        assert bytes(view) == b"abc"
+        view[0:1] = b"x"
+        with pytest.raises(BufferError):
+            res.write(b"d")
+        view.release()
+        res.write(b"d")
+        assert res.body == b"xbcd"
+        assert res.content_length == 4
+        assert bytes(body_file.getbuffer()) == b"xbcd"
+
+
+class TestAsyncAppIter:
+    def make_body(self, log):
+        async def body():
+            try:
+                yield b"a"
+                yield b"b"
+            finally:
+                log.append("closed")
+
+        return body()
+
+    def test_wrapped_automatically(self):
+        from webob.response import AsyncAppIter
+
+        log = []
+        res = Response(app_iter=self.make_body(log))
+        assert isinstance(res.app_iter, AsyncAppIter)
+        res.app_iter = self.make_body(log)
+        assert isinstance(res.app_iter, AsyncAppIter)
+        res.app_iter = [b"x"]
+        assert res.app_iter == [b"x"]
+
+    def test_sync_iteration(self):
+        log = []
+        res = Response(app_iter=self.make_body(log))
+        assert res.body == b"ab"
+        assert log == ["closed"]
+
+    def test_close_before_exhausted(self):
+        log = []
+        res = Response(app_iter=self.make_body(log))
+        app_iter = iter(res.app_iter)
+        assert next(app_iter) == b"a"
+        res.app_iter.close()
+        assert log == ["closed"]
+        res.app_iter.close()
+        assert log == ["closed"]
+
+    def test_async_iteration(self):
+        import asyncio
+
+        log = []
+        res = Response(app_iter=self.make_body(log))
+
+        async def consume():
+            chunks = []
+
+            async for chunk in res.app_iter:
+                chunks.append(chunk)
+
+                break
+            await res.app_iter.aclose()
+
+            return chunks
+
+        assert asyncio.run(consume()) == [b"a"]
+        assert log == ["closed"]
+
+    def test_repr(self):
+        log = []
+        body = self.make_body(log)
+        res = Response(app_iter=body)
+        assert repr(res.app_iter) == "<AsyncAppIter for %r>" % body
+        res.app_iter.close()
+
+    def test_close_without_loop(self):
+        log = []
+        res = Response(app_iter=self.make_body(log))
+        res.app_iter.close()
+        assert log == []
+        assert res.app_iter._loop is None
+        res.app_iter.close()
+
+    def test_aclose_closes_own_loop(self):
+        import asyncio
+
+        log = []
+        res = Response(app_iter=self.make_body(log))
+        assert next(iter(res.app_iter)) == b"a"
+        loop = res.app_iter._loop
+        # Closed from another event loop than the one it was iterated in
+        asyncio.run(res.app_iter.aclose())
+        assert log == ["closed"]
+        assert res.app_iter._loop is None
+        assert loop.is_closed()
+        asyncio.run(res.app_iter.aclose())
+        assert log == ["closed"]
+
+    def test_close_in_running_loop_schedules_aclose(self):
+        import asyncio
+
+        log = []
+        res = Response(app_iter=self.make_body(log))
+
+        async def consume():
+            async for chunk in res.app_iter:
+                break
+            res.app_iter.close()
+            await res.app_iter._close_task
+
+        asyncio.run(consume())
+        assert log == ["closed"]
+
+
+def test_decode_content_lazy():
+    from gzip import compress
+
+    closed = []
+
+    class AppIter:
+        def __init__(self, chunks):
+            self.chunks = chunks
+
+        def __iter__(self):
+            return iter(self.chunks)
+
+        def close(self):
+            closed.append(True)
+
+    data = b"0123456789" * 20000
+    body = compress(data)
+    res = Response(app_iter=AppIter([body[:100], body[100:]]))
+    res.content_encoding = "gzip"
+    res.content_length = len(body)
+    res.decode_content(lazy=True)
+    assert res.content_encoding is None
+    assert res.content_length is None
+    assert not closed
+    chunks = list(res.app_iter)
+    assert max(map(len, chunks)) == 1 << 16
+    assert b"".join(chunks) == data
+    assert closed
+
+
+def test_decode_content_max_size():
+    from gzip import compress
+
+    res = Response(compress(b"\0" * 1000), content_encoding="gzip")
+    res.decode_content(max_size=1000)
+    assert res.body == b"\0" * 1000
+    res = Response(compress(b"\0" * 1000), content_encoding="gzip")
+
+    with pytest.raises(ValueError):
+        res.decode_content(max_size=999)
+    res = Response(compress(b"\0" * 1000), content_encoding="gzip")
+    res.decode_content(lazy=True, max_size=999)
+
+    with pytest.raises(ValueError):
+        res.body
+
+
+@pytest.mark.parametrize("lazy", [False, True])
+def test_decode_content_br_max_size(dummy_brotli, lazy):
+    # 64 MB once decoded
+    body = b"a" * 65536
+    res = Response(body, content_encoding="br")
+
+    with pytest.raises(ValueError):
+        res.decode_content(lazy=lazy, max_size=100000)
+        res.body
+    assert sum(dummy_brotli.processed) < len(body)
+
+
+def test_decode_content_truncated():
+    import gzip
+
+    res = Response(gzip.compress(b"abc")[:-4], content_encoding="gzip")
+
+    with pytest.raises(ValueError):
+        res.decode_content()
+
+
+def test_decode_app_iter_chunk_size():
+    from webob.response import decode_app_iter
+
+    body = zlib.compress(b"x" * 1000)
+    chunks = list(decode_app_iter([body], "deflate", chunk_size=100))
+    assert [len(chunk) for chunk in chunks] == [100] * 10
+
+
+def test_decode_content_lazy_unknown_encoding():
+    res = Response(b"abc", content_encoding="compress")
+
+    with pytest.raises(ValueError):
+        res.decode_content(lazy=True)
+    assert res.content_encoding == "compress"
+    assert res.body == b"abc"
+
+
+def test_decode_content_invalid_keeps_body():
+    res = Response(app_iter=iter([b"not ", b"gzip"]), content_encoding="gzip")
+
+    with pytest.raises(ValueError):
+        res.decode_content()
+    assert res.content_encoding == "gzip"
+    assert res.body == b"not gzip"
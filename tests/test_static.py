@@ -92,6 +92,39 @@ class TestFileApp:
         app._open = open_oserror
         assert 403 == get_response(app).status_code
 
+    def test_file_not_opened_for_head_or_not_modified(self):
+        def open_fail(*args, **kwargs):
+            raise AssertionError("file opened")
+
+        app = static.FileApp(self.tempfile)
+        last_modified = get_response(app, method="HEAD").last_modified
+        app._open = open_fail
+
+        resp = get_response(app, method="HEAD")
+        assert resp.status_code == 200
+        assert resp.content_length == len(b"import this\n")
+        resp = get_response(app, if_modified_since=last_modified)
+        assert resp.status_code == 304
+
+    def test_unreadable_file_forbidden_for_head(self, monkeypatch):
+        checked = []
+
+        def access(path, mode, **kw):
+            checked.append((path, mode))
+
+            return False
+
+        app = static.FileApp(self.tempfile)
+        last_modified = get_response(app, method="HEAD").last_modified
+        monkeypatch.setattr(os, "access", access)
+
+        for method in ("GET", "HEAD"):
+            resp = get_response(app, method=method)
+            assert resp.status_code == 403
+        resp = get_response(app, if_modified_since=last_modified)
+        assert resp.status_code == 403
+        assert checked[0] == (self.tempfile, os.R_OK)
+
     def test_use_wsgi_filewrapper(self):
         class TestWrapper:
             __slots__ = ("file", "block_size")
@@ -0,0 +1,205 @@
+import asyncio
+import zlib
+
+import pytest
+
+from webob.request import Request
+from webob.streaming import (
+    FLUSH,
+    EventStreamResponse,
+    StreamingResponse,
+    format_event,
+)
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def chunks(resp):
+    app_iter = resp.app_iter
+    try:
+        return list(app_iter)
+    finally:
+        app_iter.close()
+
+
+def test_flush_points():
+    assert repr(FLUSH) == "FLUSH"
+    resp = StreamingResponse(iter([b"a", "b", FLUSH, b"c", FLUSH, FLUSH, b"d"]))
+    assert resp.content_length is None
+    assert chunks(resp) == [b"ab", b"c", b"d"]
+
+
+def test_buffer_size():
+    resp = StreamingResponse(iter([b"aaa", b"bbb", b"c"]), buffer_size=4)
+    assert chunks(resp) == [b"aaabbb", b"c"]
+
+
+def test_source_closed():
+    log = []
+
+    def source():
+        try:
+            yield b"a"
+            yield FLUSH
+            yield b"b"
+        finally:
+            log.append("closed")
+
+    resp = StreamingResponse(source())
+    app_iter = iter(resp.app_iter)
+    assert next(app_iter) == b"a"
+    resp.app_iter.close()
+    assert log == ["closed"]
+
+
+def test_body_arguments_rejected():
+    with pytest.raises(TypeError):
+        StreamingResponse([], body=b"x")
+
+    with pytest.raises(TypeError):
+        StreamingResponse([], app_iter=[b"x"])
+
+
+def test_str_without_charset():
+    resp = StreamingResponse(["text"], content_type="application/octet-stream")
+
+    with pytest.raises(TypeError):
+        chunks(resp)
+
+
+def test_gzip_sync_flush():
+    resp = StreamingResponse(iter([b"first", FLUSH, b"second"]))
+    resp.encode_content()
+    assert resp.content_encoding == "gzip"
+    parts = chunks(resp)
+    assert len(parts) == 2
+    # Each flushed chunk can be decompressed as soon as it is received
+    decompress = zlib.decompressobj(16 + zlib.MAX_WBITS)
+    assert decompress.decompress(parts[0]) == b"first"
+    assert decompress.decompress(parts[1]) == b"second"
+    assert decompress.eof
+    resp = StreamingResponse(iter([b"a"]))
+    resp.encode_content()
+    resp.encode_content("identity")
+    assert resp.content_encoding is None
+    assert chunks(resp) == [b"a"]
+
+
+def test_format_event():
+    assert format_event("hi") == b"data: hi\n\n"
+    assert (
+        format_event("a\r\nb\rc", event="tick", id=3, retry=1000)
+        == b"event: tick\nid: 3\nretry: 1000\ndata: a\ndata: b\ndata: c\n\n"
+    )
+    assert format_event(comment="ping") == b":ping\n\n"
+    assert format_event("caf\u00e9".encode()) == "data: caf\u00e9\n\n".encode()
+
+    with pytest.raises(ValueError):
+        format_event("x", event="a\nb")
+
+    with pytest.raises(ValueError):
+        format_event("x", id="a\0")
+
+
+def test_event_stream():
+    resp = EventStreamResponse(iter(["one", {"data": "two", "event": "e"}, b": x\n\n"]))
+    assert resp.content_type == "text/event-stream"
+    assert resp.headers["Cache-Control"] == "no-cache"
+    assert chunks(resp) == [b"data: one\n\n", b"event: e\ndata: two\n\n", b": x\n\n"]
+    resp = EventStreamResponse([], cache_control="no-store")
+    assert resp.headers["Cache-Control"] == "no-store"
+
+
+def test_event_stream_gzip():
+    resp = EventStreamResponse(iter(["one", "two"]))
+    resp.encode_content()
+    decompress = zlib.decompressobj(16 + zlib.MAX_WBITS)
+    parts = [decompress.decompress(chunk) for chunk in chunks(resp)]
+    assert parts[:2] == [b"data: one\n\n", b"data: two\n\n"]
+
+
+def test_sync_heartbeat():
+    clock = Clock()
+
+    def source():
+        yield "one"
+        clock.now = 10
+        yield None
+        clock.now = 20
+        yield None
+        yield None
+
+    resp = EventStreamResponse(source(), heartbeat=15, clock=clock)
+    assert chunks(resp) == [b"data: one\n\n", b":\n\n"]
+
+
+def test_async_source_and_heartbeat():
+    async def source():
+        yield "one"
+        await asyncio.sleep(0.05)
+        yield "two"
+
+    resp = EventStreamResponse(source(), heartbeat=0.01)
+
+    async def consume():
+        parts = []
+
+        async for chunk in resp.app_iter:
+            parts.append(chunk)
+        await resp.app_iter.aclose()
+
+        return parts
+
+    parts = asyncio.run(consume())
+    assert parts[0] == b"data: one\n\n"
+    assert parts[-1] == b"data: two\n\n"
+    assert b":\n\n" in parts
+
+
+def test_async_source_closed_while_waiting():
+    closed = []
+
+    async def source():
+        try:
+            while True:
+                yield "tick"
+                await asyncio.sleep(1)
+        finally:
+            closed.append(True)
+
+    resp = EventStreamResponse(source(), heartbeat=0.01)
+
+    async def consume():
+        app_iter = resp.app_iter
+        iterator = app_iter.__aiter__()
+        parts = [await iterator.__anext__(), await iterator.__anext__()]
+        await app_iter.aclose()
+
+        return parts
+
+    assert asyncio.run(consume()) == [b"data: tick\n\n", b":\n\n"]
+    assert closed == [True]
+
+
+def test_async_source_iterated_synchronously():
+    async def source():
+        yield b"a"
+        yield FLUSH
+        yield b"b"
+
+    resp = StreamingResponse(source())
+    assert chunks(resp) == [b"a", b"b"]
+
+
+def test_served_as_wsgi():
+    resp = StreamingResponse(iter([b"a", FLUSH, b"b"]))
+    started = []
+    app_iter = resp(Request.blank("/").environ, lambda *args: started.append(args))
+    assert "Content-Length" not in dict(started[0][1])
+    assert list(app_iter) == [b"a", b"b"]
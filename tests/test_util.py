@@ -1,3 +1,4 @@
+import sys
 import warnings
 
 import pytest
@@ -47,3 +48,155 @@ class Test_warn_deprecation:
 
         warn_deprecation("foo", v[:3], 1)
         assert len(self.warnings) == 1
+
+
+class Test_ContentDecoder:
+    def _makeOne(self, encoding):
+        from webob.util import _ContentDecoder
+
+        return _ContentDecoder(encoding)
+
+    def _decode(self, decoder, data, chunk_size=7, max_length=5):
+        output = []
+
+        for i in range(0, len(data), chunk_size):
+            output.append(decoder.decode(data[i : i + chunk_size], max_length))
+
+            while decoder.unconsumed:
+                chunk = decoder.decode(b"", max_length)
+                assert len(chunk) <= max_length
+                output.append(chunk)
+        decoder.flush()
+
+        return b"".join(output)
+
+    def test_gzip(self):
+        import gzip
+
+        data = b"hello world " * 100
+        assert self._decode(self._makeOne("GZip"), gzip.compress(data)) == data
+
+    def test_gzip_members_and_padding(self):
+        import gzip
+
+        body = gzip.compress(b"abc") + gzip.compress(b"def") + b"\0\0"
+        assert self._decode(self._makeOne("x-gzip"), body) == b"abcdef"
+
+    def test_deflate(self):
+        import zlib
+
+        data = b"hello world " * 100
+        assert self._decode(self._makeOne("deflate"), zlib.compress(data)) == data
+
+    def test_raw_deflate(self):
+        import zlib
+
+        compress = zlib.compressobj(wbits=-zlib.MAX_WBITS)
+        body = compress.compress(b"hello world " * 100) + compress.flush()
+        decoder = self._makeOne("deflate")
+        assert self._decode(decoder, body, chunk_size=1) == b"hello world " * 100
+
+    def test_invalid(self):
+        with pytest.raises(ValueError):
+            self._makeOne("gzip").decode(b"not gzip data")
+
+    def test_truncated(self):
+        import gzip
+
+        decoder = self._makeOne("gzip")
+        decoder.decode(gzip.compress(b"abc")[:-3])
+
+        with pytest.raises(ValueError):
+            decoder.flush()
+
+    def test_unknown(self):
+        with pytest.raises(ValueError):
+            self._makeOne("compress")
+
+    def test_br(self):
+        brotli = pytest.importorskip("brotli")
+        data = b"hello world " * 100
+        assert self._decode(self._makeOne("br"), brotli.compress(data)) == data
+
+    def test_br_stub(self, dummy_brotli):
+        decoder = self._makeOne("br")
+        assert decoder.decode(b"ab", 1500) == b"a" * 1000 + b"b" * 500
+        assert decoder.unconsumed
+        assert decoder.decode(b"", 1500) == b"b" * 500
+        assert not decoder.unconsumed
+        assert decoder.decode(b"c") == b"c" * 1000
+        decoder.flush()
+
+    def test_br_stub_output_limited(self, dummy_brotli):
+        decoder = self._makeOne("br")
+        # Each slice of the input decompresses to 256000 bytes
+        assert decoder.decode(b"a" * 10000, 1000) == b"a" * 1000
+        assert dummy_brotli.processed == [decoder.brotli_slice_size]
+        assert decoder.unconsumed
+        assert len(decoder.decode(b"", 1000)) == 1000
+        assert len(dummy_brotli.processed) == 1
+        data = decoder.decode(b"b", 0)
+        assert data == b"a" * (10000000 - 2000) + b"b" * 1000
+        assert not decoder.unconsumed
+
+    def test_br_stub_limited(self, dummy_brotli_limited):
+        decoder = self._makeOne("br")
+        assert decoder.decode(b"ab", 1500) == b"a" * 1000 + b"b" * 500
+        assert decoder.unconsumed
+        assert decoder.decode(b"", 1000) == b"b" * 500
+        assert not decoder.unconsumed
+        assert decoder.decode(b"c", 1000) == b"c" * 1000
+        # The output is exactly the limit: there might be more
+        assert decoder.unconsumed
+        assert decoder.decode(b"", 1000) == b""
+        assert not decoder.unconsumed
+        assert decoder.decode(b"de", 0) == b"d" * 1000 + b"e" * 1000
+        assert decoder.decode(b"f", 10) == b"f" * 10
+        assert decoder.decode(b"", 0) == b"f" * 990
+        data = self._decode(self._makeOne("br"), b"abc", chunk_size=2, max_length=7)
+        assert data == b"a" * 1000 + b"b" * 1000 + b"c" * 1000
+        decoder.flush()
+
+    def test_br_output_limited(self):
+        brotli = pytest.importorskip("brotli")
+
+        if not hasattr(brotli.Decompressor, "can_accept_more_data"):
+            pytest.skip("brotli without output_buffer_limit")
+        body = brotli.compress(b"\0" * (64 << 20), quality=1)
+        decoder = self._makeOne("br")
+        assert decoder.decode(body, 1000) == b"\0" * 1000
+        assert len(decoder._output) < 1 << 20
+        assert decoder.unconsumed
+        size = 1000
+
+        while decoder.unconsumed:
+            size += len(decoder.decode(b"", 1 << 20))
+        decoder.flush()
+        assert size == 64 << 20
+
+    def test_br_stub_chunks(self, dummy_brotli):
+        data = self._decode(self._makeOne("br"), b"abc", chunk_size=2, max_length=7)
+        assert data == b"a" * 1000 + b"b" * 1000 + b"c" * 1000
+
+    def test_br_stub_invalid(self, dummy_brotli):
+
+        with pytest.raises(ValueError):
+            self._makeOne("br").decode(b"!")
+
+    def test_br_stub_truncated(self, dummy_brotli):
+        decoder = self._makeOne("br")
+
+        with pytest.raises(ValueError):
+            decoder.flush()
+
+    def test_br_brotlicffi(self, monkeypatch, dummy_brotli):
+        monkeypatch.setitem(sys.modules, "brotli", None)
+        monkeypatch.setitem(sys.modules, "brotlicffi", dummy_brotli)
+        assert self._makeOne("br").decode(b"a") == b"a" * 1000
+
+    def test_br_missing(self, monkeypatch):
+        monkeypatch.setitem(sys.modules, "brotli", None)
+        monkeypatch.setitem(sys.modules, "brotlicffi", None)
+
+        with pytest.raises(ValueError):
+            self._makeOne("br")